@@ -0,0 +1,61 @@
+"""Benchmarks for animate_plot.
+
+The track_ benchmark reports the peak memory allocated while an animation is
+encoded, measured with tracemalloc so that it is not affected by memory held
+by the interpreter before the benchmark runs. With frames streamed to the
+encoder it should not grow with the number of frames.
+"""
+import os
+import shutil
+import tempfile
+import tracemalloc
+import matplotlib.pyplot as plt
+from benchmarks.common import network_path
+import viswaternet as vis
+
+
+class AnimatePlot:
+    params = [10, 40]
+    param_names = ["frames"]
+    timeout = 300
+
+    def setup(self, frames):
+        self.model = vis.VisWNModel(network_path("CTown.inp"))
+        self.directory = tempfile.mkdtemp()
+        self.save_name = os.path.join(self.directory, "animation")
+
+    def teardown(self, frames):
+        plt.close("all")
+        shutil.rmtree(self.directory)
+
+    def animate(self, frames, reuse_artists=False, workers=None):
+        fig, ax = plt.subplots(figsize=(12, 12))
+        self.model.animate_plot(ax=ax,
+                                function=self.model.plot_continuous_nodes,
+                                parameter="pressure",
+                                last_timestep=frames,
+                                save_name=self.save_name,
+                                reuse_artists=reuse_artists,
+                                workers=workers)
+        plt.close(fig)
+
+    def time_animate_plot(self, frames):
+        self.animate(frames)
+
+    def time_animate_plot_reuse_artists(self, frames):
+        self.animate(frames, reuse_artists=True)
+
+    def time_animate_plot_workers(self, frames):
+        self.animate(frames, workers=4)
+
+    def peakmem_animate_plot(self, frames):
+        self.animate(frames)
+
+    def track_peak_traced_memory(self, frames):
+        tracemalloc.start()
+        try:
+            self.animate(frames)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    track_peak_traced_memory.unit = "bytes"
@@ -0,0 +1,19 @@
+"""Benchmarks for the import time of viswaternet.
+
+Each benchmark is timed in a new interpreter. Importing the package and
+accessing VisWNModel should not import WNTR or matplotlib.pyplot, which are
+only imported when a model is built from a network or a figure is drawn.
+"""
+
+
+class ImportTime:
+
+    def timeraw_import_package(self):
+        return "import viswaternet"
+
+    def timeraw_import_model(self):
+        return "import viswaternet; viswaternet.VisWNModel"
+
+    def timeraw_import_drawing(self):
+        return ("import viswaternet; "
+                "viswaternet.VisWNModel.plot_continuous_nodes")
@@ -0,0 +1,46 @@
+"""Benchmarks for element name to index lookups.
+
+NameLookupScaling shows how a fixed number of lookups scales with network
+size for list.index compared to the name to index dictionaries built by
+VisWNModel. The network benchmarks time the functions that perform one
+lookup per element on the bundled networks.
+"""
+from benchmarks.common import network_path
+import viswaternet as vis
+
+
+class NameLookupScaling:
+    params = [1000, 10000, 100000]
+    param_names = ["elements"]
+
+    def setup(self, elements):
+        self.names = ["J" + str(i) for i in range(elements)]
+        self.name_index = {name: i for i, name in enumerate(self.names)}
+        # 1000 lookups spread evenly over the name list
+        self.lookups = self.names[::max(elements // 1000, 1)]
+
+    def time_list_index(self, elements):
+        for name in self.lookups:
+            self.names.index(name)
+
+    def time_name_index(self, elements):
+        for name in self.lookups:
+            self.name_index[name]
+
+
+class NetworkLookups:
+    params = ["CTown.inp", "ky8.inp", "bwsn2.inp"]
+    param_names = ["network"]
+    timeout = 300
+
+    def setup(self, network):
+        self.model = vis.VisWNModel(network_path(network),
+                                    lazy_simulation=True)
+        self.results, self.links = self.model.get_parameter("link", "length")
+        self.results = self.results.values.tolist()
+
+    def time_get_parameter(self, network):
+        self.model.get_parameter("link", "length")
+
+    def time_bin_parameter(self, network):
+        self.model.bin_parameter(self.results, self.links, 5)
@@ -0,0 +1,262 @@
+"""Benchmarks of the main VisWNModel operations on the bundled networks.
+
+Every benchmark is run on net1, CTown, ky8 and bwsn2, from 11 to about
+12,500 nodes. time_ benchmarks report wall time and peakmem_ benchmarks the
+peak resident memory of the benchmark process. The plotting benchmarks draw
+the figure canvas, since drawing is where most of the time of a plot is
+spent.
+
+Apart from the construction benchmarks, models are created with the
+simulation results cached on disk, so EPANET is run once per network.
+"""
+import os
+import shutil
+import tempfile
+import matplotlib.pyplot as plt
+from benchmarks.common import NETWORKS, network_path, cached_model
+import viswaternet as vis
+
+
+class Construction:
+    params = NETWORKS
+    param_names = ["network"]
+    timeout = 600
+
+    def setup(self, network):
+        # Fills the result cache for time_construct_cached
+        cached_model(network)
+
+    def time_construct(self, network):
+        vis.VisWNModel(network_path(network))
+
+    def time_construct_lazy(self, network):
+        vis.VisWNModel(network_path(network), lazy_simulation=True)
+
+    def time_construct_cached(self, network):
+        cached_model(network)
+
+    def peakmem_construct(self, network):
+        vis.VisWNModel(network_path(network))
+
+
+class GetParameter:
+    params = NETWORKS
+    param_names = ["network"]
+    timeout = 600
+
+    def setup(self, network):
+        self.model = cached_model(network)
+
+    def time_static_nodes(self, network):
+        self.model.get_parameter("node", "elevation")
+
+    def time_static_links(self, network):
+        self.model.get_parameter("link", "length")
+
+    def time_timestep_nodes(self, network):
+        self.model.get_parameter("node", "pressure", 12)
+
+    def time_timestep_links(self, network):
+        self.model.get_parameter("link", "flowrate", 12)
+
+    def time_summary_nodes(self, network):
+        # Summaries are cached by the model, so the cache is cleared to time
+        # their computation
+        self.model.model.pop("summary_cache", None)
+        self.model.get_parameter("node", "pressure", "max")
+
+    def peakmem_summary_nodes(self, network):
+        self.model.model.pop("summary_cache", None)
+        self.model.get_parameter("node", "pressure", "max")
+
+
+class BinParameter:
+    params = NETWORKS
+    param_names = ["network"]
+    timeout = 600
+
+    def setup(self, network):
+        self.model = cached_model(network)
+        results, self.nodes = self.model.get_parameter("node", "pressure", 12)
+        self.results = results.values.tolist()
+
+    def time_bin_parameter(self, network):
+        self.model.bin_parameter(self.results, self.nodes, 5)
+
+    def peakmem_bin_parameter(self, network):
+        self.model.bin_parameter(self.results, self.nodes, 5)
+
+
+class Plotting:
+    params = NETWORKS
+    param_names = ["network"]
+    timeout = 600
+
+    def setup(self, network):
+        self.model = cached_model(network)
+
+    def teardown(self, network):
+        plt.close("all")
+
+    def plot(self, function, **kwargs):
+        fig, ax = plt.subplots(figsize=(12, 12))
+        function(ax=ax, **kwargs)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    def time_plot_basic_elements(self, network):
+        self.plot(self.model.plot_basic_elements)
+
+    def time_plot_discrete_nodes(self, network):
+        self.plot(self.model.plot_discrete_nodes,
+                  parameter="pressure", value="max")
+
+    def time_plot_discrete_links(self, network):
+        self.plot(self.model.plot_discrete_links,
+                  parameter="flowrate", value="max")
+
+    def time_plot_continuous_nodes(self, network):
+        self.plot(self.model.plot_continuous_nodes,
+                  parameter="pressure", value="max")
+
+    def time_plot_continuous_links(self, network):
+        self.plot(self.model.plot_continuous_links,
+                  parameter="flowrate", value="max")
+
+    def time_plot_unique_data(self, network):
+        self.plot(self.model.plot_unique_data, parameter="diameter")
+
+    def peakmem_plot_continuous_nodes(self, network):
+        self.plot(self.model.plot_continuous_nodes,
+                  parameter="pressure", value="max")
+
+    def peakmem_plot_continuous_links(self, network):
+        self.plot(self.model.plot_continuous_links,
+                  parameter="flowrate", value="max")
+
+
+class ShortAnimation:
+    params = NETWORKS
+    param_names = ["network"]
+    timeout = 600
+
+    def setup(self, network):
+        self.model = cached_model(network)
+        self.directory = tempfile.mkdtemp()
+        self.save_name = os.path.join(self.directory, "animation")
+
+    def teardown(self, network):
+        plt.close("all")
+        shutil.rmtree(self.directory)
+
+    def animate(self):
+        fig, ax = plt.subplots(figsize=(12, 12))
+        self.model.animate_plot(ax=ax,
+                                function=self.model.plot_continuous_nodes,
+                                parameter="pressure",
+                                last_timestep=3,
+                                save_name=self.save_name)
+        plt.close(fig)
+
+    def time_animate_plot(self, network):
+        self.animate()
+
+    def peakmem_animate_plot(self, network):
+        self.animate()
+
+
+class SaveFigures:
+    """Plots and saves a figure of each of the first eight timesteps, with
+    the images encoded either before the next plot is drawn or in the
+    background while it is."""
+    params = NETWORKS
+    param_names = ["network"]
+    timeout = 600
+
+    def setup(self, network):
+        self.model = cached_model(network)
+        self.directory = tempfile.mkdtemp()
+
+    def teardown(self, network):
+        plt.close("all")
+        shutil.rmtree(self.directory)
+
+    def save_figures(self, save_async):
+        style = vis.NetworkStyle(dpi=300, save_async=save_async)
+        for timestep in range(8):
+            fig, ax = plt.subplots(figsize=(12, 12))
+            self.model.plot_continuous_nodes(
+                ax=ax, parameter="pressure", value=timestep, style=style,
+                savefig=True,
+                save_name=os.path.join(self.directory, str(timestep)))
+            plt.close(fig)
+        self.model.wait_for_saves()
+
+    def time_save_figures(self, network):
+        self.save_figures(False)
+
+    def time_save_figures_async(self, network):
+        self.save_figures(True)
+
+
+class PlotBatch:
+    """Draws and saves figures of twelve statistics, with plot_batch and
+    with the equivalent loop of individual plotting calls."""
+    params = NETWORKS
+    param_names = ["network"]
+    timeout = 900
+
+    def setup(self, network):
+        self.model = cached_model(network)
+        self.directory = tempfile.mkdtemp()
+        self.specs = []
+        for function, parameters in (
+                ("plot_continuous_nodes", ("pressure", "head")),
+                ("plot_continuous_links", ("flowrate", "velocity"))):
+            for parameter in parameters:
+                for value in ("min", "max", "mean"):
+                    self.specs.append(
+                        {"function": function,
+                         "parameter": parameter,
+                         "value": value,
+                         "save_name": os.path.join(
+                             self.directory, parameter + "_" + value + "_")})
+
+    def teardown(self, network):
+        plt.close("all")
+        shutil.rmtree(self.directory)
+
+    def time_individual_calls(self, network):
+        for spec in self.specs:
+            spec = dict(spec)
+            function = getattr(self.model, spec.pop("function"))
+            fig, ax = plt.subplots(figsize=self.model.figsize)
+            ax.set_frame_on(self.model.axis_frame)
+            function(ax=ax, savefig=True, **spec)
+            plt.close(fig)
+
+    def time_plot_batch(self, network):
+        self.model.plot_batch(self.specs, savefig=True)
+
+    def time_plot_batch_workers(self, network):
+        self.model.plot_batch(self.specs, savefig=True, workers=4)
+
+
+class Ensemble:
+    # bwsn2 takes about ten seconds per simulation, so it is left out
+    params = [NETWORKS[:3], [None, 4]]
+    param_names = ["network", "workers"]
+    timeout = 600
+
+    def setup(self, network, workers):
+        self.model = cached_model(network)
+        self.scenarios = [{"demand_multiplier": 0.8 + 0.05 * i}
+                          for i in range(8)]
+
+    def time_run_ensemble(self, network, workers):
+        self.model.run_ensemble(self.scenarios, parameters=["pressure"],
+                                value="min", workers=workers)
+
+    def peakmem_run_ensemble(self, network, workers):
+        self.model.run_ensemble(self.scenarios, parameters=["pressure"],
+                                value="min", workers=workers)
@@ -0,0 +1,92 @@
+"""Benchmarks on synthetic networks of 10k, 100k and 1M elements.
+
+The networks are grids generated by viswaternet.network.synthetic_network
+with about one junction for every two pipes, and generated pressure and
+flowrate results, so EPANET is never run. They are built once by
+setup_cache since the largest takes about a minute to generate. Models use
+the native renderer, which is the renderer meant for networks of this size.
+"""
+import os
+import shutil
+import tempfile
+import matplotlib.pyplot as plt
+import benchmarks.common  # noqa: F401 (selects the Agg backend)
+import viswaternet as vis
+
+ELEMENTS = [10000, 100000, 1000000]
+
+
+def synthetic_model(elements):
+    """Returns a VisWNModel of a synthetic grid with about elements nodes
+    and links."""
+    wn = vis.network.synthetic_network(elements // 3, num_pumps=4,
+                                       num_valves=4, num_tanks=2, seed=0)
+    results = vis.network.synthetic_results(wn,
+                                            node_attributes=["pressure"],
+                                            link_attributes=["flowrate"],
+                                            seed=0)
+    return vis.VisWNModel(network_model=wn, results=results,
+                          renderer="native")
+
+
+class Scaling:
+    params = ELEMENTS
+    param_names = ["elements"]
+    timeout = 1800
+
+    def setup_cache(self):
+        return {elements: synthetic_model(elements) for elements in ELEMENTS}
+
+    def setup(self, models, elements):
+        self.model = models[elements]
+        results, self.nodes = self.model.get_parameter("node", "pressure", 12)
+        self.results = results.values.tolist()
+
+    def teardown(self, models, elements):
+        plt.close("all")
+
+    def time_get_parameter(self, models, elements):
+        self.model.get_parameter("node", "pressure", 12)
+
+    def time_get_parameter_summary(self, models, elements):
+        self.model.model.pop("summary_cache", None)
+        self.model.get_parameter("node", "pressure", "max")
+
+    def time_bin_parameter(self, models, elements):
+        self.model.bin_parameter(self.results, self.nodes, 5)
+
+    def time_plot_continuous_nodes(self, models, elements):
+        fig, ax = plt.subplots(figsize=(12, 12))
+        self.model.plot_continuous_nodes(ax=ax, parameter="pressure",
+                                         value=12)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    def time_plot_discrete_links(self, models, elements):
+        fig, ax = plt.subplots(figsize=(12, 12))
+        self.model.plot_discrete_links(ax=ax, parameter="flowrate",
+                                       value=12)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    def peakmem_plot_continuous_nodes(self, models, elements):
+        fig, ax = plt.subplots(figsize=(12, 12))
+        self.model.plot_continuous_nodes(ax=ax, parameter="pressure",
+                                         value=12)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    def time_animate_plot(self, models, elements):
+        directory = tempfile.mkdtemp()
+        try:
+            fig, ax = plt.subplots(figsize=(12, 12))
+            self.model.animate_plot(
+                ax=ax,
+                function=self.model.plot_continuous_nodes,
+                parameter="pressure",
+                last_timestep=3,
+                reuse_artists=True,
+                save_name=os.path.join(directory, "animation"))
+            plt.close(fig)
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,31 @@
+"""Shared helpers for the viswaternet benchmarks."""
+import os
+import tempfile
+import warnings
+import matplotlib
+
+matplotlib.use("Agg")
+warnings.filterwarnings("ignore")
+
+NETWORK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "examples", "Networks")
+
+# Bundled networks that the network benchmarks are run on, smallest first
+NETWORKS = ["net1.inp", "CTown.inp", "ky8.inp", "bwsn2.inp"]
+
+# Simulation results are cached here so that they are only computed once
+# per network rather than in the setup of every benchmark
+RESULT_CACHE_DIR = os.path.join(tempfile.gettempdir(),
+                                "viswaternet-benchmarks")
+
+
+def network_path(network):
+    """Returns the absolute path of one of the bundled example networks."""
+    return os.path.join(NETWORK_DIR, network)
+
+
+def cached_model(network):
+    """Returns a VisWNModel of one of the bundled example networks whose
+    simulation results are loaded from RESULT_CACHE_DIR when possible."""
+    import viswaternet as vis
+    return vis.VisWNModel(network_path(network), cache_dir=RESULT_CACHE_DIR)
@@ -15,7 +15,7 @@ requirements = ['pandas',
                'numpy',
                'matplotlib>=3.5.0',
                'wntr',
-               'imageio',
+               'imageio>=2.28',
                'imageio-ffmpeg',
                'networkx>=2.7,<=3.3']
 
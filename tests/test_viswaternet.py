@@ -2,14 +2,25 @@
 
 """Tests for `viswaternet` package."""
 
+import io
+import json
 import unittest
+from unittest import mock
 import viswaternet
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+import imageio
 
 model = viswaternet.VisWNModel("tests/net1.inp")
 style = viswaternet.NetworkStyle()
+
+
 class TestViswaternet(unittest.TestCase):
     """Tests for `viswaternet` package."""
 
@@ -22,6 +33,7 @@ class TestViswaternet(unittest.TestCase):
     def test_000_something(self):
         """Test something."""
 
+
 class TestSaveFig(unittest.TestCase):
     """Tests for save_fig function."""
     
@@ -46,6 +58,24 @@ class TestSaveFig(unittest.TestCase):
         os.remove('Test_dummynetwork.png')
         os.remove('dummynetwork.jpg')
 
+    def test_save_fig_async(self):
+        """Tests that figures saved in the background match figures saved directly."""
+        fig,ax=plt.subplots()
+        model.plot_continuous_nodes(ax,parameter='elevation')
+        ax.set_title('Elevation')
+        for save_format in ['png','jpg']:
+            for dpi in ['figure',150]:
+                viswaternet.utils.save_fig(model,save_name='Sync_',style=viswaternet.NetworkStyle(save_format=save_format,dpi=dpi))
+                future = model.save_fig(save_name='Async_',style=viswaternet.NetworkStyle(save_format=save_format,dpi=dpi,save_async=True))
+                model.wait_for_saves()
+                self.assertTrue(future.done(),"wait_for_saves() returns before figures are written.")
+                with open('Sync_net1.'+save_format,'rb') as f1, open(future.result(),'rb') as f2:
+                    self.assertEqual(f1.read(),f2.read(),"Figures saved in the background differ from figures saved directly.")
+                os.remove('Sync_net1.'+save_format)
+                os.remove('Async_net1.'+save_format)
+        plt.close(fig)
+
+
 class TestParameterBinning(unittest.TestCase):
     """Tests data binning."""
     
@@ -80,7 +110,27 @@ class TestParameterBinning(unittest.TestCase):
         
         interval_results, interval_names = viswaternet.network.bin_parameter(self,dummy_data,self.model['node_names'],3,style=style)
         self.assertDictEqual(correct_dict,interval_results,"bin_parameter is not producing correct dictionary structure.")
-        
+
+    def test_interval_edges(self):
+        """Tests values outside of and on the edges of custom intervals, and that elements without a value are not binned."""
+        self.model = {}
+        self.model['node_names'] = ['E1','E2','E3','E4','E5','E6','E7']
+        dummy_data=[0,1,2,4,5,9,float('nan')]
+        interval_results, interval_names = viswaternet.network.bin_parameter(self,dummy_data,self.model['node_names'],3,intervals=[1,3,5,7,8],disable_interval_deleting=True,style=style)
+        self.assertListEqual(interval_names,['< 1.000','1.000 - 3.000','3.000 - 5.000','5.000 - 7.000','7.000 - 8.000','> 8.000'],"Intervals outside of the edges are not being named properly.")
+        correct_dict={'< 1.000': {'E1':0},
+                      '1.000 - 3.000': {'E2':1,'E3':2},
+                      '3.000 - 5.000': {'E4':3},
+                      '5.000 - 7.000': {'E5':4},
+                      '7.000 - 8.000': {},
+                      '> 8.000': {'E6':5}}
+        self.assertDictEqual(correct_dict,interval_results,"Values outside of the edges are not binned correctly.")
+
+        interval_results, interval_names = viswaternet.network.bin_parameter(self,[1,1,1,9,9,9,9],self.model['node_names'],3,intervals=[0,2,4,6,8,9],style=style)
+        self.assertListEqual(interval_names,['0.000 - 2.000','8.000 - 9.000'],"Consecutive empty intervals are not all being deleted.")
+        self.assertListEqual(list(interval_results['8.000 - 9.000']),['E4','E5','E6','E7'],"The last interval does not include its upper edge.")
+
+
 class TestPlottingFunctions(unittest.TestCase):
     """Tests if plotting functions produce a plot."""
     
@@ -146,6 +196,70 @@ class TestPlottingFunctions(unittest.TestCase):
         os.remove('discrete.mp4')
         os.remove('continuous.mp4')
 
+    def test_animate_plot_reuse_artists(self):
+        fig,ax=plt.subplots()
+        model.animate_plot(ax=ax,function=model.plot_continuous_links,parameter='flowrate',last_timestep=5,save_name='reuse',reuse_artists=True)
+        self.assertTrue(os.path.isfile('reuse.mp4'),"animate_plot() is not generating plot when reusing artists.")
+        self.assertEqual(len(ax.collections),0,"animate_plot() is not clearing the axes after reusing artists.")
+        os.remove('reuse.mp4')
+
+    def test_animate_plot_color_buffer(self):
+        for reuse_artists in (False,True):
+            fig,ax=plt.subplots()
+            model.animate_plot(ax=ax,function=model.plot_continuous_nodes,parameter='pressure',last_timestep=5,save_name='colors'+str(reuse_artists),save_format='gif',reuse_artists=reuse_artists,color_buffer_size=100)
+        redrawn = imageio.mimread('colorsFalse.gif')
+        reused = imageio.mimread('colorsTrue.gif')
+        self.assertEqual(len(redrawn),len(reused),"animate_plot() is not drawing all frames with precomputed colors.")
+        for redrawn_frame, reused_frame in zip(redrawn,reused):
+            self.assertTrue(np.array_equal(redrawn_frame,reused_frame),"Frames drawn with precomputed colors are not the same as redrawn frames.")
+        os.remove('colorsFalse.gif')
+        os.remove('colorsTrue.gif')
+
+    def test_animate_plot_interpolation(self):
+        for frames_per_timestep in (1,3):
+            fig,ax=plt.subplots()
+            model.animate_plot(ax=ax,function=model.plot_continuous_nodes,parameter='pressure',last_timestep=3,save_name='interpolated'+str(frames_per_timestep),save_format='gif',frames_per_timestep=frames_per_timestep)
+        timesteps = imageio.mimread('interpolated1.gif')
+        interpolated = imageio.mimread('interpolated3.gif')
+        self.assertEqual(len(interpolated),7,"animate_plot() is not drawing frames between timesteps.")
+        for timestep_frame, interpolated_frame in zip(timesteps,interpolated[::3]):
+            self.assertTrue(np.array_equal(timestep_frame,interpolated_frame),"Interpolated animations are not drawing report timesteps as they are.")
+        self.assertFalse(np.array_equal(interpolated[0],interpolated[1]),"Frames between timesteps are not interpolated.")
+        os.remove('interpolated1.gif')
+        os.remove('interpolated3.gif')
+
+    def test_animate_plot_workers(self):
+        for workers in (None,2):
+            fig,ax=plt.subplots()
+            model.animate_plot(ax=ax,function=model.plot_continuous_nodes,parameter='pressure',last_timestep=5,save_name='workers'+str(workers),save_format='gif',workers=workers)
+        serial = imageio.mimread('workersNone.gif')
+        parallel = imageio.mimread('workers2.gif')
+        self.assertEqual(len(serial),len(parallel),"animate_plot() is not drawing all frames with workers.")
+        for serial_frame, parallel_frame in zip(serial,parallel):
+            self.assertTrue(np.array_equal(serial_frame,parallel_frame),"Frames drawn with workers are not the same as frames drawn serially.")
+        os.remove('workersNone.gif')
+        os.remove('workers2.gif')
+
+    def test_discrete_links_limits(self):
+        limits_model = viswaternet.VisWNModel("tests/net1.inp")
+        limits_model.model['pos_dict']['anchor'] = (500.0, 500.0)
+        fig,ax=plt.subplots()
+        limits_model.plot_discrete_links(ax,parameter='length')
+        self.assertGreater(ax.get_xlim()[1],500,"Axis limits do not include positions added to pos_dict.")
+        plt.close(fig)
+
+    def test_capture_frame(self):
+        fig,ax=plt.subplots()
+        model.plot_continuous_nodes(ax=ax,parameter='pressure',value=5)
+        with io.BytesIO() as buff:
+            fig.savefig(buff,format='raw')
+            expected = np.frombuffer(buff.getvalue(),dtype=np.uint8)
+        frame = viswaternet.drawing.animate.capture_frame(fig)
+        self.assertTrue(np.array_equal(frame.ravel(),expected),"Frames captured from the canvas are not the same as saved figures.")
+        self.assertEqual(viswaternet.drawing.animate.capture_frame(fig,drop_alpha=True).shape,frame.shape[:2]+(3,),"The alpha channel is not being dropped from frames.")
+        plt.close(fig)
+
+
 class TestNormalizeParameter(unittest.TestCase):
     """Tests parameter normalizing function"""
     
@@ -155,6 +269,7 @@ class TestNormalizeParameter(unittest.TestCase):
         normalized_parameter = viswaternet.utils.normalize_parameter(dummy_data,0,1)
         self.assertListEqual(test_normalized,normalized_parameter,"Data is not being normalized correctly.")
 
+
 class TestUnitConversion(unittest.TestCase):
     """Tests unit conversion function"""
 
@@ -164,7 +279,11 @@ class TestUnitConversion(unittest.TestCase):
 
         output = viswaternet.utils.unit_conversion(dummy_data,'length','ft')   
         self.assertListEqual(correct_output,output,"Data is not being converted to another unit correctly.")
-        
+        self.assertAlmostEqual(viswaternet.utils.unit_conversion(5400.0,'time','hr'),1.5,msg="Scalars are not being converted to another unit correctly.")
+        series = viswaternet.utils.unit_conversion(pd.Series(dummy_data,index=['A','B','C']),'length','ft')
+        self.assertListEqual(list(series.index),['A','B','C'],"Series are losing their labels when converted to another unit.")
+
+
 class TestGetParameter(unittest.TestCase):
     
     def test_reservoir_tank_fetching(self):
@@ -172,7 +291,105 @@ class TestGetParameter(unittest.TestCase):
         self.assertAlmostEqual(results[0],91.91539,places=6,msg="Parameters are not in the correct order.")
         self.assertAlmostEqual(results[9],0,msg="Parameters are not in the correct order when reservoir data is collected.")
         self.assertAlmostEqual(results[10],40.014896,places=6,msg="Parameters are not in the correct order when tank data is collected.")
-        
+
+
+class TestGetParameterSelection(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ctown = viswaternet.VisWNModel("examples/Networks/CTown.inp")
+
+    def test_node_results(self):
+        ctown = self.ctown.model
+        pressure = ctown['results'].node['pressure']
+        excluded = set(ctown['tank_names']+ctown['reservoir_names'])
+        expected_elements = [name for name in ctown['node_names'] if name not in excluded]
+        for value, expected in (('max',pressure.max()),('min',pressure.min()),('range',pressure.max()-pressure.min()),(4,pressure.iloc[4])):
+            results, elements = self.ctown.get_parameter('node','pressure',value)
+            self.assertListEqual(elements,expected_elements,"Tanks and reservoirs are not being excluded properly.")
+            self.assertTrue(np.allclose(results.to_numpy(),expected[expected_elements].to_numpy()),"Node results are not selected correctly.")
+        results, elements = self.ctown.get_parameter('node','pressure','mean',include_tanks=True)
+        self.assertEqual(len(elements),len(ctown['node_names'])-len(ctown['reservoir_names']),"Tanks are not being included properly.")
+        self.assertTrue(np.allclose(results.to_numpy(),pressure[elements].mean().to_numpy()),"Node means are not calculated correctly.")
+
+    def test_link_attributes(self):
+        ctown = self.ctown.model
+        element_list = ctown['G_pipe_name_list'][::-2]
+        results, elements = self.ctown.get_parameter('link','diameter',element_list=element_list,include_pumps=False,include_valves=False)
+        excluded = set(ctown['pump_names']+ctown['valve_names'])
+        expected_elements = [name for name in element_list if name not in excluded]
+        self.assertListEqual(elements,expected_elements,"Pumps and valves are not being excluded properly.")
+        self.assertListEqual(results.index.tolist(),expected_elements,"Link attributes are not in the correct order.")
+        expected = ctown['wn'].query_link_attribute('diameter')[expected_elements]
+        self.assertListEqual(results.tolist(),expected.tolist(),"Link attributes are not selected correctly.")
+
+
+class TestSummaryCache(unittest.TestCase):
+
+    def test_statistics_cached(self):
+        cached_model = viswaternet.VisWNModel("tests/net1.inp")
+        pressure = cached_model.model['results'].node['pressure']
+        results, elements = cached_model.get_parameter('node','pressure','max')
+        cache = cached_model.model['summary_cache']
+        self.assertEqual(len(cache),5,"All summary statistics should be computed in one pass.")
+        for statistic, expected in (('min',pressure.min()),('max',pressure.max()),('mean',pressure.mean()),('stddev',pressure.std(ddof=0)),('range',pressure.max()-pressure.min())):
+            self.assertTrue(np.allclose(cache[('node','pressure',statistic)][1],expected.to_numpy(),rtol=1e-5),"Summary statistic "+statistic+" is not calculated correctly.")
+        cached_model.model['results'].node['pressure'] = pressure*2
+        results_doubled, elements = cached_model.get_parameter('node','pressure','max')
+        self.assertTrue(np.allclose(results_doubled.to_numpy(),2*results.to_numpy()),"Summary statistics are not invalidated when results change.")
+
+    def test_statistics_skip_nan(self):
+        nan_model = viswaternet.VisWNModel("tests/net1.inp")
+        pressure = nan_model.model['results'].node['pressure'].copy()
+        pressure.iloc[0,0] = np.nan
+        pressure.iloc[5:9,1] = np.nan
+        nan_model.model['results'].node['pressure'] = pressure
+        for statistic, expected in (('min',pressure.min()),('max',pressure.max()),('mean',pressure.mean()),('stddev',pressure.std(ddof=0)),('range',pressure.max()-pressure.min()),('p95',pressure.quantile(0.95))):
+            results = nan_model.get_parameter('node','pressure',statistic,include_tanks=True,include_reservoirs=True)[0]
+            self.assertTrue(np.allclose(results.to_numpy(),expected.to_numpy(),rtol=1e-5),"Summary statistic "+statistic+" does not skip NaN values.")
+
+    def test_cache_bound(self):
+        cached_model = viswaternet.VisWNModel("tests/net1.inp")
+        with mock.patch.object(viswaternet.network.summary_cache,'SUMMARY_CACHE_SIZE',12):
+            for parameter in ('demand','head','pressure','quality'):
+                cached_model.get_parameter('node',parameter,'mean')
+            cache = cached_model.model['summary_cache']
+            self.assertEqual(len(cache),12,"Summary cache is not bounded.")
+            self.assertNotIn(('node','demand','mean'),cache,"Least recently used statistics are not evicted first.")
+            cached_model.get_parameter('node','head','max')
+            self.assertEqual(next(reversed(cache)),('node','head','max'),"Summary cache is not least recently used.")
+
+
+class TestSummaryValues(unittest.TestCase):
+
+    def test_summary_values(self):
+        pressure = model.model['results'].node['pressure']
+        junctions = model.model['junc_names']
+        results, elements = model.get_parameter('node','pressure',('max',5,10))
+        self.assertTrue(np.allclose(results.to_numpy(),pressure.iloc[5:10][junctions].max().to_numpy()),"Timestep windows are not calculated correctly.")
+        results, elements = model.get_parameter('node','pressure',('mean',5,10))
+        self.assertTrue(np.allclose(results.to_numpy(),pressure.iloc[5:10][junctions].mean().to_numpy(),rtol=1e-5),"Timestep windows are not calculated correctly.")
+        results, elements = model.get_parameter('node','pressure','p95')
+        self.assertTrue(np.allclose(results.to_numpy(),np.percentile(pressure[junctions].to_numpy(),95,axis=0)),"Percentiles are not calculated correctly.")
+        results, elements = model.get_parameter('node','pressure',('above',90))
+        self.assertListEqual(results.tolist(),(pressure[junctions]>90).sum().tolist(),"Threshold counts are not calculated correctly.")
+        results, elements = model.get_parameter('link','flowrate',('below',0.01,0,12))
+        self.assertListEqual(results.tolist(),(model.model['results'].link['flowrate'].iloc[0:12]<0.01).sum().tolist(),"Threshold counts are not calculated correctly.")
+        for value in ('max','p95'):
+            summary_model = viswaternet.VisWNModel("tests/net1.inp")
+            results, elements = summary_model.get_parameter('node','pressure',(value,))
+            self.assertTrue(results.equals(model.get_parameter('node','pressure',value)[0]),"Summaries given as 1-tuples are not calculated correctly.")
+        with self.assertRaises(Exception):
+            model.get_parameter('node','pressure','p101')
+        with self.assertRaises(Exception):
+            model.get_parameter('node','pressure',('max',10,5))
+
+    def test_summary_labels(self):
+        self.assertEqual(viswaternet.utils.label_generator('pressure','p95'),'95th Percentile of Pressure [$m$]',"Percentile labels are not generated correctly.")
+        self.assertEqual(viswaternet.utils.label_generator('pressure',('max',5,10)),'Maximum Pressure [$m$] from timestep 5 to 10',"Window labels are not generated correctly.")
+        self.assertEqual(viswaternet.utils.label_generator('pressure',('above',90),'psi'),'Timesteps with Pressure [$m$] above 90',"Threshold labels are not generated correctly.")
+
+
 class TestInitalizeFunction(unittest.TestCase):
     
     def test_list_sizes(self):
@@ -183,6 +400,294 @@ class TestInitalizeFunction(unittest.TestCase):
         self.assertEqual(len(model.model['G_pipe_name_list']),13,"Pipes are not being collected properly.")
         self.assertEqual(len(model.model['G_list_pumps_only']),1,"Pump pipes are not being collected properly.")
         self.assertEqual(len(model.model['G_list_valves_only']),0,"Pump pipes are not being collected properly.")
+
+
+class TestGeometryStore(unittest.TestCase):
+
+    def test_geometry_arrays(self):
+        coords = model.model['node_coords']
+        endpoints = model.model['link_endpoints']
+        segments = model.model['link_segments']
+        self.assertEqual(coords.shape,(11,2),"Node coordinates are not being stored properly.")
+        self.assertEqual(endpoints.shape,(13,2),"Link endpoints are not being stored properly.")
+        self.assertEqual(segments.shape,(13,2,2),"Link segments are not being stored properly.")
+        for i, (start, end) in enumerate(model.model['pipe_list']):
+            self.assertListEqual(segments[i].tolist(),[list(model.model['pos_dict'][start]),list(model.model['pos_dict'][end])],"Link segments do not match node coordinates.")
+
+    def test_pump_midpoint(self):
+        pump = model.model['pump_names'][0]
+        start, end = model.model['G_list_pumps_only'][0]
+        midpoint = viswaternet.drawing.base.link_midpoints(model.model,[pump])
+        expected = (np.array(model.model['pos_dict'][start])+np.array(model.model['pos_dict'][end]))/2
+        self.assertListEqual(midpoint[0].tolist(),expected.tolist(),"Pump midpoints are not calculated correctly.")
+
+
+class TestLazySimulation(unittest.TestCase):
+
+    def test_simulation_deferred(self):
+        lazy_model = viswaternet.VisWNModel("tests/net1.inp", lazy_simulation=True)
+        fig,ax=plt.subplots()
+        lazy_model.plot_basic_elements(ax)
+        lazy_model.get_parameter('node','elevation')
+        self.assertNotIn('results',lazy_model.model,"Static parameters should not run the simulation.")
+        results, elements = lazy_model.get_parameter('node','pressure',5,include_tanks=True,include_reservoirs=True)
+        self.assertIn('results',lazy_model.model,"Time-dependent parameters should run the simulation.")
+        self.assertAlmostEqual(results.iloc[0],91.91539,places=6,msg="Lazily simulated results are not correct.")
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_results_reloaded(self):
+        first = viswaternet.VisWNModel("tests/net1.inp", cache_dir=self.cache_dir)
+        entries = os.listdir(self.cache_dir)
+        self.assertEqual(len(entries),1,"Simulation results are not being cached.")
+        second = viswaternet.VisWNModel("tests/net1.inp", cache_dir=self.cache_dir)
+        for element_type in ('node','link'):
+            cached = getattr(second.model['results'],element_type)
+            simulated = getattr(first.model['results'],element_type)
+            self.assertListEqual(sorted(cached),sorted(simulated),"Cached results are missing attributes.")
+            for attribute in simulated:
+                self.assertTrue(cached[attribute].equals(simulated[attribute]),"Cached results do not match simulated results.")
+
+    def test_eviction(self):
+        viswaternet.VisWNModel("tests/net1.inp", cache_dir=self.cache_dir)
+        viswaternet.VisWNModel(network_model=model.model['wn'], cache_dir=self.cache_dir, cache_size=1)
+        self.assertEqual(len(os.listdir(self.cache_dir)),1,"Old cache entries are not being evicted.")
+
+
+class TestBinaryResults(unittest.TestCase):
+
+    def test_binary_results_match(self):
+        binary = viswaternet.VisWNModel("tests/net1.inp", results_backend="binary")
+        for element_type in ('node','link'):
+            read = getattr(binary.model['results'],element_type)
+            simulated = getattr(model.model['results'],element_type)
+            self.assertListEqual(list(read),list(simulated),"Binary results are missing attributes.")
+            for attribute in simulated:
+                self.assertTrue(read[attribute].to_frame().equals(simulated[attribute]),"Binary results do not match simulated results.")
+        for value in (None, 3, 'max', 'p95'):
+            expected = model.get_parameter('link','flowrate',value=value)[0]
+            parameter = binary.get_parameter('link','flowrate',value=value)[0]
+            self.assertTrue(parameter.equals(expected),"get_parameter returns different values with binary results.")
+
+    def test_binary_animation_reads_timesteps(self):
+        from viswaternet.network.binary_results import BinaryFrame
+        binary = viswaternet.VisWNModel("tests/net1.inp", results_backend="binary")
+        directory = tempfile.mkdtemp()
+        def full_read(frame):
+            raise AssertionError("animate_plot() reads every timestep of binary results at once.")
+        try:
+            with mock.patch.object(BinaryFrame,'iloc',property(full_read)), mock.patch.object(BinaryFrame,'values',property(full_read)):
+                fig,ax=plt.subplots()
+                binary.animate_plot(binary.plot_continuous_nodes,ax=ax,parameter='pressure',last_timestep=3,save_name=os.path.join(directory,'binary'),save_format='gif')
+                plt.close(fig)
+            self.assertTrue(os.path.isfile(os.path.join(directory,'binary.gif')),"animate_plot() is not animating binary results.")
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestResultAttributes(unittest.TestCase):
+
+    def test_results_kept(self):
+        compact = viswaternet.VisWNModel("tests/net1.inp", result_attributes=['pressure','quality'])
+        results = compact.model['results']
+        self.assertListEqual(sorted(results.node),['pressure','quality'],"Node results are not being dropped.")
+        self.assertListEqual(sorted(results.link),['quality'],"Link results are not being dropped.")
+        pressure = results.node['pressure'].to_numpy()
+        self.assertEqual(pressure.dtype,np.float32,"Kept results are not float32.")
+        self.assertTrue(pressure.flags['C_CONTIGUOUS'],"Kept results are not contiguous.")
+        for value in (None, 3, 'max'):
+            expected = model.get_parameter('node','pressure',value=value)[0]
+            parameter = compact.get_parameter('node','pressure',value=value)[0]
+            self.assertTrue(parameter.equals(expected),"Kept results do not match simulated results.")
+        with self.assertRaises(Exception):
+            compact.get_parameter('link','flowrate',value='max')
+        with self.assertRaises(Exception):
+            viswaternet.VisWNModel("tests/net1.inp", result_attributes=['pressures'])
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def loaded_modules(self, code, modules):
+        code = "import sys\n"+code+"\nprint(','.join(name for name in "+repr(modules)+" if name in sys.modules))"
+        return subprocess.run([sys.executable,"-c",code],capture_output=True,text=True,check=True).stdout.strip()
+
+    def test_import_dependencies(self):
+        loaded = self.loaded_modules("import viswaternet",('wntr','pandas','matplotlib.pyplot'))
+        self.assertEqual(loaded,"","Importing viswaternet imports heavy dependencies.")
+        loaded = self.loaded_modules("import viswaternet\nviswaternet.VisWNModel",('wntr','matplotlib.pyplot','imageio'))
+        self.assertEqual(loaded,"","Heavy dependencies are imported before they are used.")
+
+    def test_submodule_access(self):
+        submodules = ['viswaternet.drawing.base','viswaternet.drawing.animate','viswaternet.drawing.style','viswaternet.network.processing','viswaternet.network.initialize','viswaternet.utils.label_generator']
+        for submodule in submodules:
+            code = "import viswaternet; "+submodule
+            result = subprocess.run([sys.executable,"-c",code],capture_output=True,text=True)
+            self.assertEqual(result.returncode,0,submodule+" is not accessible as a package attribute.")
+        with self.assertRaises(AttributeError):
+            viswaternet.drawing.missing_module
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_snapshot_reload(self):
+        path = os.path.join(self.directory, "net1.npz")
+        style = viswaternet.NetworkStyle(cmap='viridis')
+        saved = viswaternet.VisWNModel("tests/net1.inp")
+        saved.default_style = style
+        saved.save_snapshot(path, result_attributes=['pressure'])
+        loaded = viswaternet.VisWNModel.load_snapshot(path)
+        self.assertNotIn('wn', loaded.model, "Snapshots should load without the network model.")
+        for key in ('node_names','G_pipe_name_list','pipe_list','pos_dict','G_list_pumps_only','report_timestep'):
+            self.assertEqual(loaded.model[key],saved.model[key],"Snapshot does not restore "+key+".")
+        for key in ('node_coords','link_segments','node_types','link_types'):
+            self.assertTrue(np.array_equal(loaded.model[key],saved.model[key]),"Snapshot does not restore "+key+".")
+        self.assertEqual(loaded.default_style.args['cmap'],'viridis',"Snapshot does not restore the default style.")
+        for value in (None, 3, 'max'):
+            expected = saved.get_parameter('node','pressure',value=value)[0]
+            parameter = loaded.get_parameter('node','pressure',value=value)[0]
+            self.assertTrue(parameter.equals(expected),"Snapshot results do not match simulated results.")
+        with self.assertRaises(Exception):
+            loaded.get_parameter('link','flowrate',value='max')
+
+    def test_snapshot_tuple_style(self):
+        path = os.path.join(self.directory, "net1.npz")
+        saved = viswaternet.VisWNModel("tests/net1.inp")
+        saved.default_style = viswaternet.NetworkStyle(node_size=(100,400),link_width=(1,4),cmap='viridis')
+        saved.save_snapshot(path)
+        loaded = viswaternet.VisWNModel.load_snapshot(path)
+        for name in ('node_size','link_width'):
+            self.assertEqual(loaded.default_style.args[name],saved.default_style.args[name],"Snapshot does not restore tuple style arguments.")
+            self.assertIsInstance(loaded.default_style.args[name],tuple,"Snapshot restores tuple style arguments as lists.")
+        fig,ax=plt.subplots()
+        loaded.plot_continuous_nodes(ax,parameter='pressure',value='max')
+        loaded.plot_continuous_links(ax,parameter='flowrate',value='max')
+        plt.close(fig)
+
+
+class TestNativeRenderer(unittest.TestCase):
+
+    def test_native_plotting(self):
+        native_model = viswaternet.VisWNModel("tests/net1.inp", renderer='native')
+        fig,ax=plt.subplots()
+        native_model.plot_basic_elements(ax)
+        self.assertEqual(len(ax.collections),5,"Native renderer is not drawing base elements.")
+        fig,ax=plt.subplots()
+        native_model.plot_continuous_links(ax,parameter='length')
+        lengths = native_model.get_parameter('link','length')[0]
+        self.assertListEqual(ax.collections[0].get_array().tolist(),lengths.tolist(),"Native renderer is not drawing continuous links.")
+        fig,ax=plt.subplots()
+        native_model.plot_discrete_nodes(ax,parameter='elevation')
+        self.assertEqual(len(ax.get_legend().legend_handles),5,"Native renderer is not drawing discrete nodes.")
+
+    def test_invalid_renderer(self):
+        with self.assertRaises(Exception):
+            viswaternet.VisWNModel("tests/net1.inp", renderer='opengl')
+
+
+class TestSyntheticNetwork(unittest.TestCase):
+
+    def test_network_elements(self):
+        for layout, links in (('grid',180),('tree',99)):
+            wn = viswaternet.network.synthetic_network(100,layout=layout,num_reservoirs=2,num_tanks=3,num_pumps=3,num_valves=2,seed=0)
+            self.assertEqual(wn.num_junctions,100,"Synthetic networks do not have the right number of junctions.")
+            self.assertEqual((wn.num_reservoirs,wn.num_tanks,wn.num_pumps,wn.num_valves),(2,3,3,2),"Synthetic networks do not have the right number of reservoirs, tanks, pumps and valves.")
+            self.assertEqual(wn.num_links,links+5,"Synthetic "+layout+" networks do not have the right number of links.")
+
+    def test_synthetic_results(self):
+        wn = viswaternet.network.synthetic_network(50,seed=0)
+        results = viswaternet.network.synthetic_results(wn,node_attributes=['pressure'],link_attributes=['flowrate'],seed=0)
+        self.assertListEqual(list(results.link),['flowrate'],"Synthetic results include attributes that were not asked for.")
+        synthetic_model = viswaternet.VisWNModel(network_model=wn,results=results)
+        pressure, nodes = synthetic_model.get_parameter('node','pressure',24,include_tanks=True,include_reservoirs=True)
+        self.assertEqual(len(pressure),52,"Synthetic results are missing nodes.")
+        self.assertNotIn('sim',synthetic_model.model,"The simulation is run even though results were given.")
+        fig,ax=plt.subplots()
+        synthetic_model.plot_continuous_links(ax,parameter='flowrate',value='max')
+        plt.close(fig)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profile_stages(self):
+        fig,ax=plt.subplots()
+        with model.profile() as profiler:
+            model.plot_continuous_nodes(ax,parameter='pressure',value='max')
+        plt.close(fig)
+        self.assertNotIn('profiler',model.model,"The profiler is not removed after profiling.")
+        stages = profiler.report()
+        self.assertEqual(stages[0]['name'],'plot_continuous_nodes',"The plotting call is not recorded as the outer stage.")
+        inner = {stage['name']:stage for stage in stages[0]['stages']}
+        self.assertEqual(inner['get_parameter']['elements'],9,"get_parameter does not record the number of nodes.")
+        self.assertIn('draw_nodes',inner,"Nested stages are not recorded.")
+        self.assertGreaterEqual(stages[0]['duration'],inner['draw_nodes']['duration'],"Stages take longer than the stage they are nested in.")
+        report = json.loads(profiler.to_json())
+        self.assertEqual(report['totals']['plot_continuous_nodes']['calls'],1,"The JSON report does not count calls.")
+
+
+class TestPlotBatch(unittest.TestCase):
+
+    def test_batch_matches_individual_plots(self):
+        directory = tempfile.mkdtemp()
+        try:
+            specs = [{'function':'plot_continuous_nodes','parameter':'pressure','value':'max','save_name':os.path.join(directory,'pressure_')},
+                     {'function':'plot_continuous_nodes','parameter':'elevation','save_name':os.path.join(directory,'elevation_')},
+                     {'function':'plot_discrete_links','parameter':'flowrate','value':'mean','unit':'LPS','save_name':os.path.join(directory,'flowrate_')}]
+            paths = model.plot_batch(specs,savefig=True)
+            self.assertNotIn('batch',model.model,"The shared base elements are kept after the batch.")
+            for spec, path in zip(specs, paths):
+                spec = dict(spec)
+                function = getattr(model,spec.pop('function'))
+                fig,ax=plt.subplots(figsize=model.figsize)
+                ax.set_frame_on(model.axis_frame)
+                spec['save_name'] = spec['save_name']+'single_'
+                function(ax,savefig=True,**spec)
+                plt.close(fig)
+                np.testing.assert_array_equal(plt.imread(path),plt.imread(spec['save_name']+'net1.png'),"plot_batch() does not draw the same figures as the plotting functions.")
+            figures = model.plot_batch(specs[:1])
+            self.assertEqual(len(figures),1,"plot_batch() does not return the figures.")
+            plt.close(figures[0])
+            with self.assertRaises(Exception):
+                model.plot_batch(specs,workers=2)
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestEnsemble(unittest.TestCase):
+
+    def test_ensemble_statistics(self):
+        ensemble_model = viswaternet.VisWNModel("tests/net1.inp")
+        scenarios = [{'demand_multiplier': multiplier} for multiplier in (0.8, 1.0, 1.2)]
+        names = ensemble_model.run_ensemble(scenarios, parameters=['pressure',('link','flowrate')], value='max', workers=2)
+        self.assertListEqual(names,['ensemble_pressure','ensemble_flowrate'],"run_ensemble() does not return the ensemble parameters.")
+        self.assertEqual(ensemble_model.model['wn'].options.hydraulic.demand_multiplier,1.0,"run_ensemble() modifies the base network.")
+        self.assertTrue(ensemble_model.get_parameter('node','pressure',value='max')[0].equals(ensemble_model.get_parameter('node','ensemble_pressure',value=1)[0]),"Unmodified scenario does not match the simulated results.")
+        pressure = ensemble_model.get_parameter('node','ensemble_pressure')[0]
+        self.assertEqual(pressure.shape,(3,11),"Ensemble parameters should have a row per scenario.")
+        np.testing.assert_allclose(ensemble_model.get_parameter('node','ensemble_pressure',value='mean',include_tanks=True,include_reservoirs=True)[0],pressure.mean(),rtol=1e-5,err_msg="Ensemble mean is not computed over the scenarios.")
+        probability = ensemble_model.get_parameter('node','ensemble_pressure',value=('above',pressure.to_numpy()[1].mean()),include_tanks=True,include_reservoirs=True)[0]
+        self.assertTrue(probability.equals((pressure>pressure.to_numpy()[1].mean()).mean()),"Ensemble thresholds should give the probability of exceedance.")
+        ensemble_model.run_ensemble(scenarios[:1], parameters=['pressure'])
+        self.assertEqual(ensemble_model.get_parameter('node','ensemble_pressure')[0].shape,(1,11),"run_ensemble() does not replace the ensemble parameters.")
+        fig,ax=plt.subplots()
+        ensemble_model.plot_continuous_nodes(ax,parameter='ensemble_pressure',value='mean',unit='psi')
+        self.assertEqual(ax.collections[0].get_array().tolist(),viswaternet.utils.unit_conversion(ensemble_model.get_parameter('node','ensemble_pressure',value='mean')[0],'pressure','psi').tolist(),"Ensemble parameters are not plotted.")
+        with self.assertRaises(Exception):
+            ensemble_model.run_ensemble([{'elevation': 10}])
+
+
 if __name__ == '__main__':
     unittest.main()    
     
@@ -1,4 +1,8 @@
-"""Top-level package."""
+"""Top-level package.
+
+The subpackages, VisWNModel and NetworkStyle are imported the first time
+they are used, see viswaternet.lazy.
+"""
 
 __author__ = """Tyler Trimble, Meghna Sarah Thomas"""
 __email__ = 'TylerL.Trimble@utexas.edu,meghnathomas@utexas.edu'
@@ -6,8 +10,11 @@ __version__ = '1.1.0'
 
 import warnings
 
-from viswaternet import utils
-from viswaternet import network
-from viswaternet.network.initialize import VisWNModel
-from viswaternet.drawing.style import NetworkStyle
-from viswaternet import drawing
+from viswaternet.lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "utils": "viswaternet.utils",
+    "network": "viswaternet.network",
+    "drawing": "viswaternet.drawing",
+    "VisWNModel": "viswaternet.network.initialize",
+    "NetworkStyle": "viswaternet.drawing.style"})
@@ -6,9 +6,23 @@ Created on Sun Oct  2 21:20:48 2022
 """
 
 
-from .base import draw_nodes, draw_links,draw_base_elements, plot_basic_elements, draw_color_bar,draw_label,draw_legend
-from .discrete import draw_discrete_nodes, draw_discrete_links, plot_discrete_nodes, plot_discrete_links
-from .continuous import plot_continuous_nodes, plot_continuous_links
-from .unique import plot_unique_data
-from .animate import animate_plot
-from .style import NetworkStyle
\ No newline at end of file
+from viswaternet.lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "draw_nodes": "viswaternet.drawing.base",
+    "draw_links": "viswaternet.drawing.base",
+    "draw_base_elements": "viswaternet.drawing.base",
+    "plot_basic_elements": "viswaternet.drawing.base",
+    "draw_color_bar": "viswaternet.drawing.base",
+    "draw_label": "viswaternet.drawing.base",
+    "draw_legend": "viswaternet.drawing.base",
+    "draw_discrete_nodes": "viswaternet.drawing.discrete",
+    "draw_discrete_links": "viswaternet.drawing.discrete",
+    "plot_discrete_nodes": "viswaternet.drawing.discrete",
+    "plot_discrete_links": "viswaternet.drawing.discrete",
+    "plot_continuous_nodes": "viswaternet.drawing.continuous",
+    "plot_continuous_links": "viswaternet.drawing.continuous",
+    "plot_unique_data": "viswaternet.drawing.unique",
+    "animate_plot": "viswaternet.drawing.animate",
+    "plot_batch": "viswaternet.drawing.batch",
+    "NetworkStyle": "viswaternet.drawing.style"})
@@ -14,13 +14,27 @@ if parse(str(matplotlib.__version__)) < parse('3.6.0'):
     import matplotlib.tight_bbox as tight_bbox
 else:
     import matplotlib._tight_bbox as tight_bbox
-from matplotlib.transforms import Bbox, TransformedBbox, Affine2D
 import imageio
 import io
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from viswaternet.network import processing
-from viswaternet.utils import unit_conversion, convert_excel
+from viswaternet.utils import unit_conversion, convert_excel, \
+    normalize_parameter
+from viswaternet.drawing import base
+from viswaternet.network.summary_cache import CHUNK_SIZE
+from viswaternet.utils.profiling import profiled
+from viswaternet.utils.save_fig import tight_bbox_inches
 
+# Default maximum size in bytes of the precomputed colors of an animation
+# drawn with reuse_artists
+COLOR_BUFFER_SIZE = 2**28
 
+
+@profiled
 def animate_plot(
         self,
         function,
@@ -31,6 +45,10 @@ def animate_plot(
         save_name="animation",
         save_format="mp4",
         time_unit='s',
+        reuse_artists=False,
+        workers=None,
+        color_buffer_size=None,
+        frames_per_timestep=1,
         **kwargs):
     """
     Builds .gif file animating network data across timesteps.
@@ -83,16 +101,45 @@ def animate_plot(
         day                   :math:`day`
         ====================  ====================================
 
+    reuse_artists : boolean
+        If True, the figure is drawn once and only the colors (and sizes or
+        widths, if they are data dependent) of the nodes or links are
+        updated for each following frame, which is much faster for large
+        networks. Only used with plot_continuous_nodes and
+        plot_continuous_links without link arrows. Other plots are redrawn
+        for every frame.
+
+    workers : integer
+        Number of processes used to draw the frames. Each process draws
+        chunks of consecutive frames on its own figure with the same size
+        and resolution as the figure of ax, and the frames are encoded in
+        order, so the animation is the same as when drawn in a single
+        process. By default all frames are drawn in the current process.
+
+    color_buffer_size : integer
+        With reuse_artists, the colors of the nodes or links in every frame
+        are computed ahead of drawing, for as many frames at a time as fit
+        in color_buffer_size bytes. Defaults to 256 MiB.
+
+    frames_per_timestep : integer
+        Number of frames drawn for each report timestep. Frames between two
+        report timesteps are drawn with data linearly interpolated between
+        them, which makes for a smoother animation without a shorter report
+        timestep. The frame rate is not changed, so the animation is
+        frames_per_timestep times as long.
+
     kwargs : Any
         Any arguments for the plotting function passed into the function
         argument can be passed into animate_plot.
     """
     model = self.model
+    if not isinstance(frames_per_timestep, (int, np.integer)) \
+            or frames_per_timestep < 1:
+        raise Exception('frames_per_timestep must be a positive integer!')
     if ax is None:
         if ax is None:
             fig, ax = plt.subplots(figsize=self.figsize)
             ax.set_frame_on(self.axis_frame)
-    frames = []
     if function == self.plot_unique_data:
         parameter_type = kwargs.get("parameter_type", None)
         data_type = kwargs.get("data_type", None)
@@ -126,9 +173,7 @@ def animate_plot(
         data_values = [data_values[i].tolist()
                        for i in data_values.columns]
     else:
-        timesteps = int(
-            model["wn"].options.time.duration
-            / model["wn"].options.time.report_timestep)
+        timesteps = int(model["duration"] / model["report_timestep"])
         values = range(timesteps)
         if last_timestep is not None:
             values = values[first_timestep:last_timestep]
@@ -143,101 +188,433 @@ def animate_plot(
         data_type = 'continuous'
         if kwargs.get("vmin", None) is None \
                 or kwargs.get("vmax", None) is None:
-            parameter_results, element_list = processing.get_parameter(
-                self,
-                parameter_type,
-                kwargs.get("parameter"), kwargs.get("value", None))
-            kwargs["vmin"], kwargs["vmax"] = make_vmin_vmax(parameter_results,
-                                                            kwargs)
-            parameter_results = parameter_results.transpose()
+            kwargs["vmin"], kwargs["vmax"] = make_vmin_vmax(
+                result_limits(self, parameter_type, kwargs.get("parameter")),
+                kwargs)
     if function == self.plot_discrete_nodes \
             or function == self.plot_discrete_links:
         kwargs["disable_interval_deleting"] = True
         data_type = 'discrete'
         if kwargs.get("intervals", None) is None:
-            parameter_results, element_list = processing.get_parameter(
-                self, parameter_type, kwargs.get(
-                    "parameter"), kwargs.get("value", None))
-            kwargs["intervals"] = make_intervals(parameter_results, kwargs)
-        parameter_results = parameter_results.transpose()
+            kwargs["intervals"] = make_intervals(
+                result_limits(self, parameter_type, kwargs.get("parameter")),
+                kwargs)
     if plt.isinteractive():
         plt_interactive = plt.isinteractive()
         plt.ioff()
     else:
         plt_interactive = False
-    for value in values:
-        fig = ax.get_figure()
+    if reuse_artists:
+        style = kwargs.get("style", None)
+        if style is None:
+            style = self.default_style
+        if data_type != 'continuous' \
+                or function == self.plot_unique_data \
+                or (parameter_type == 'link'
+                    and style.args['link_arrows'] is True):
+            reuse_artists = False
+
+    if frames_per_timestep > 1 and len(values) > 0:
+        # Frames are numbered in fractions of a timestep, and the last
+        # timestep has no frames after it to interpolate towards
+        values = range(values[0] * frames_per_timestep,
+                       values[-1] * frames_per_timestep + 1)
+
+    def timestep_kwargs(timestep):
+        # Arguments of the plotting function at a report timestep
         if function == self.plot_unique_data:
             try:
-                kwargs["custom_data_values"] = [custom_data_values[0],
-                                                custom_data_values[1][value]]
+                return {"custom_data_values": [
+                    custom_data_values[0], custom_data_values[1][timestep]]}
             except Exception:
-                kwargs["custom_data_values"] = [element_list,
-                                                data_values[value]]
-                kwargs["parameter"] = 'custom_data'
-            function(ax=ax, savefig=False, **kwargs)
-        else:
-            kwargs["value"] = [parameter_results.iloc[:, value],
-                               element_list]
-            function(ax=ax, savefig=False, **kwargs)
-        handles, labels = [], []
-        time = value*model["wn"].options.time.report_timestep
+                return {"custom_data_values": [element_list,
+                                               data_values[timestep]],
+                        "parameter": 'custom_data'}
+        # Only the results of the timestep are read, so results that are
+        # read from the EPANET output file are not loaded in full
+        return {"value": list(processing.get_parameter(
+            self, parameter_type, kwargs.get("parameter"), timestep,
+            include_tanks=True, include_reservoirs=True))}
+
+    def frame_spec(value):
+        # Arguments of the plotting function and title of a single frame
+        timestep, step = divmod(value, frames_per_timestep)
+        frame_kwargs = timestep_kwargs(timestep)
+        if step > 0:
+            if function == self.plot_unique_data:
+                key, i = "custom_data_values", 1
+            else:
+                key, i = "value", 0
+            frame_kwargs[key][i] = interpolate_timesteps(
+                frame_kwargs[key][i],
+                timestep_kwargs(timestep + 1)[key][i],
+                step / frames_per_timestep)
+        time = timestep*model["report_timestep"]
+        if step > 0:
+            time = time + (step / frames_per_timestep
+                           * model["report_timestep"])
         time = unit_conversion(time, "time", time_unit)
+        if step > 0:
+            time = round(time, 3)
+        return frame_kwargs, "Timestep "+str(time)+" "+time_unit
+
+    # Frames are passed to the encoder as soon as they are drawn so that
+    # only a bounded number of frames is held in memory at a time
+    writer = get_writer(save_name, save_format, fps)
+    video = save_format not in ("gif", "GIF")
+    # Videos have no alpha channel, so it is not passed to the encoder
+    capture = {"drop_alpha": video}
+
+    def append_frame(mat):
+        # The video encoder writes frames out as they are appended, but the
+        # GIF writer keeps them until it is closed, so they are copied out
+        # of the canvas buffer
+        writer.append_data(mat if video else mat.copy())
+
+    try:
+        if workers is None or workers <= 1:
+            for mat in render_frames(self,
+                                     ax,
+                                     function,
+                                     (frame_spec(value) for value in values),
+                                     data_type,
+                                     parameter_type,
+                                     reuse_artists,
+                                     kwargs,
+                                     capture,
+                                     color_buffer_size):
+                append_frame(mat)
+        elif len(values) > 0:
+            fig = ax.get_figure()
+            figure_options = {"figsize": tuple(fig.get_size_inches()),
+                              "dpi": fig.dpi,
+                              "frame_on": ax.get_frame_on()}
+            # The first frame is drawn here to find the bounding box that
+            # the workers crop every other frame to
+            for mat in render_frames(self,
+                                     ax,
+                                     function,
+                                     [frame_spec(values[0])],
+                                     data_type,
+                                     parameter_type,
+                                     False,
+                                     dict(kwargs),
+                                     capture):
+                append_frame(mat)
+            values = values[1:]
+            # Contiguous chunks of frames are rendered by the workers and
+            # encoded in order. At most two chunks per worker are in flight.
+            chunk_size = max(1, min(-(-len(values) // workers), 16))
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=init_worker,
+                    initargs=(model_snapshot(self), function.__name__,
+                              data_type, parameter_type, reuse_artists,
+                              kwargs, figure_options, capture,
+                              color_buffer_size)) as executor:
+                pending = deque()
+                for start in range(0, len(values), chunk_size):
+                    chunk = values[start:start + chunk_size]
+                    pending.append(executor.submit(
+                        render_chunk, [frame_spec(value) for value in chunk]))
+                    if len(pending) >= 2 * workers:
+                        for mat in pending.popleft().result():
+                            writer.append_data(mat)
+                while pending:
+                    for mat in pending.popleft().result():
+                        writer.append_data(mat)
+    finally:
+        writer.close()
+        if plt_interactive:
+            plt.ion()
+
+
+def render_frames(
+        self,
+        ax,
+        function,
+        frames,
+        data_type,
+        parameter_type,
+        reuse_artists,
+        kwargs,
+        capture=None,
+        color_buffer_size=None):
+    """Draws each frame with function onto ax and yields it as an RGBA
+    array. frames is an iterable of (frame_kwargs, title) tuples, where
+    frame_kwargs are the arguments passed to function for that frame.
+
+    capture is a dictionary of frame capture options. Its 'bbox_inches' is
+    the tight bounding box of the frames, which is computed from the first
+    frame and stored in capture if it is not given. If its 'drop_alpha' is
+    True, the alpha channel is left out of the frames.
+
+    If reuse_artists is True, the colors of the frames after the first are
+    precomputed in blocks of at most color_buffer_size bytes.
+
+    The frames are views of the canvas buffer and are only valid until the
+    next frame is drawn. They must be copied if they are kept."""
+    if capture is None:
+        capture = {}
+    fig = ax.get_figure()
+    style = kwargs.get("style", None)
+    if style is None:
+        style = self.default_style
+    frames = iter(frames)
+    for frame_kwargs, title in frames:
+        kwargs.update(frame_kwargs)
+        g = function(ax=ax, savefig=False, **kwargs)
+        handles, labels = [], []
         ax.legend(
             handles,
             labels,
-            title="Timestep "+str(time)+" "+time_unit,
+            title=title,
             loc="lower left",
             frameon=False)
-        restore_bbox = bbox_inches_tight_resize(fig)
-        fig.canvas.draw()
-        with io.BytesIO() as buff:
-            fig.savefig(buff, format='raw')
-            buff.seek(0)
-            data = np.frombuffer(buff.getvalue(), dtype=np.uint8)
-            w, h = fig.canvas.get_width_height()
-            mat = data.reshape((int(h), int(w), -1))
-        frames.append(mat)
-        restore_bbox()
-        if function == self.plot_continuous_nodes \
-                or function == self.plot_continuous_links \
-                or data_type == 'continuous':
-            fig.axes[1].remove()
-        ax.clear()
-    if plt_interactive:
-        plt.ion()
-    if save_format == "gif" or save_format == "GIF":
-        imageio.mimsave(save_name+"."+save_format,
-                        frames,
-                        format='GIF',
-                        fps=fps)
+        mat = grab_frame(fig, capture)
+        if reuse_artists:
+            break
+        clear_frame(self, ax, function, data_type)
+        yield mat
+    else:
+        return
+    yield mat
+    # Elements that the collection holds data for, in the order they were
+    # drawn in
+    if parameter_type == 'node':
+        data_elements = base.data_node_list(self, kwargs["value"][1], style)
+    else:
+        data_elements = base.data_link_list(self, kwargs["value"][1], style)
+    for parameter_results, colors, title in frame_colors(
+            g,
+            frames,
+            data_elements,
+            kwargs.get("parameter"),
+            kwargs.get("unit", None),
+            color_buffer_size):
+        update_collection(self,
+                          g,
+                          parameter_type,
+                          parameter_results,
+                          colors,
+                          style)
+        ax.get_legend().set_title(title)
+        yield grab_frame(fig, capture)
+    clear_frame(self, ax, function, data_type)
+
+
+def grab_frame(fig, capture):
+    """Captures fig cropped to the bounding box in capture, which is
+    computed from fig if it is not there yet."""
+    # The tight bounding box is computed for the first frame only, so that
+    # all frames have the same size
+    if capture.get("bbox_inches") is None:
+        capture["bbox_inches"] = tight_bbox_inches(fig)
+    restore_bbox = bbox_inches_tight_resize(fig, capture["bbox_inches"])
+    mat = capture_frame(fig, capture.get("drop_alpha", False))
+    restore_bbox()
+    return mat
+
 
+def frame_colors(
+        collection,
+        frames,
+        element_list,
+        parameter=None,
+        unit=None,
+        color_buffer_size=None):
+    """Yields the data, colors and title of each frame of frames for the
+    elements in element_list, in that order.
+
+    The data of consecutive frames is gathered into an (frames x elements)
+    matrix and mapped through the norm and colormap of collection at once,
+    into 8-bit RGBA colors. Each block of frames is at most
+    color_buffer_size bytes of colors, COLOR_BUFFER_SIZE by default."""
+    if color_buffer_size is None:
+        color_buffer_size = COLOR_BUFFER_SIZE
+    block_size = max(1, color_buffer_size // max(4 * len(element_list), 1))
+    positions = None
+    while True:
+        block = list(itertools.islice(frames, block_size))
+        if not block:
+            return
+        if positions is None:
+            positions = block[0][0]["value"][0].index.get_indexer(
+                element_list)
+        # The data is normalized in double precision, as it is when the
+        # frame is drawn from scratch
+        parameter_results = np.stack(
+            [frame_kwargs["value"][0].to_numpy()[positions]
+             for frame_kwargs, title in block]).astype(np.float64)
+        if unit is not None:
+            parameter_results = np.asarray(
+                unit_conversion(parameter_results, parameter, unit))
+        colors = np.empty(parameter_results.shape + (4,), dtype=np.uint8)
+        # The colors are computed in floating point in chunks of frames and
+        # rounded to bytes like Agg does, so that they are the same as the
+        # colors of a redrawn frame
+        chunk_frames = max(1, CHUNK_SIZE // max(len(element_list), 1))
+        for start in range(0, len(block), chunk_frames):
+            end = start + chunk_frames
+            colors[start:end] = np.rint(
+                collection.to_rgba(parameter_results[start:end]) * 255)
+        for i, (frame_kwargs, title) in enumerate(block):
+            yield parameter_results[i], colors[i], title
+
+
+def clear_frame(self, ax, function, data_type):
+    """Removes everything drawn for a frame from ax and its color bar."""
+    if function == self.plot_continuous_nodes \
+            or function == self.plot_continuous_links \
+            or data_type == 'continuous':
+        ax.get_figure().axes[1].remove()
+    ax.clear()
+
+
+def model_snapshot(self):
+    """Returns a copy of a VisWNModel object that can be sent to worker
+    processes. The WNTR network, simulator and simulation results are left
+    out, since frames are drawn from data passed in with each frame."""
+    snapshot = object.__new__(type(self))
+    snapshot.__dict__.update({key: value
+                              for key, value in self.__dict__.items()
+                              if key not in ("fig", "ax")})
+    snapshot.model = {key: value for key, value in self.model.items()
+                      if key not in ("wn", "sim", "results", "summary_cache",
+                                     "profiler", "batch")}
+    return snapshot
+
+
+# State of an animation worker process, set by init_worker
+_worker = {}
+
+
+def init_worker(snapshot, function_name, data_type, parameter_type,
+                reuse_artists, kwargs, figure_options, capture,
+                color_buffer_size):
+    """Initializes a worker process of animate_plot with the model snapshot
+    and the options shared by all frames."""
+    _worker.update(snapshot=snapshot,
+                   function_name=function_name,
+                   data_type=data_type,
+                   parameter_type=parameter_type,
+                   reuse_artists=reuse_artists,
+                   kwargs=kwargs,
+                   figure_options=figure_options,
+                   capture=capture,
+                   color_buffer_size=color_buffer_size)
+
+
+def render_chunk(frames):
+    """Renders a chunk of frames in a worker process on a new Agg figure and
+    returns them as a list of RGBA arrays."""
+    snapshot = _worker["snapshot"]
+    options = _worker["figure_options"]
+    fig = Figure(figsize=options["figsize"], dpi=options["dpi"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_frame_on(options["frame_on"])
+    # Frames are views of the canvas buffer, so each one is copied before
+    # the next is drawn
+    return [mat.copy()
+            for mat in render_frames(snapshot,
+                                     ax,
+                                     getattr(snapshot,
+                                             _worker["function_name"]),
+                                     frames,
+                                     _worker["data_type"],
+                                     _worker["parameter_type"],
+                                     _worker["reuse_artists"],
+                                     dict(_worker["kwargs"]),
+                                     dict(_worker["capture"]),
+                                     _worker["color_buffer_size"])]
+
+
+def update_collection(
+        self,
+        collection,
+        parameter_type,
+        parameter_results,
+        colors,
+        style):
+    """Updates a node or link collection drawn by plot_continuous_nodes or
+    plot_continuous_links with the data and 8-bit RGBA colors of another
+    timestep, given in the order of the collection. Node sizes and link
+    widths are updated too if they depend on the data."""
+    args = style.args
+    # The colors are set directly, so the collection must not map its data
+    # array to colors again when it is drawn
+    collection.set_array(None)
+    if parameter_type == 'node':
+        collection.set_facecolor(colors / 255)
+    else:
+        collection.set_edgecolor(colors / 255)
+    if parameter_type == 'node':
+        size = args['node_size']
     else:
-        imageio.mimsave(save_name+"."+save_format,
-                        frames,
-                        format='FFMPEG',
-                        fps=fps,
-                        quality=8,
-                        ffmpeg_log_level='quiet')
+        size = args['link_width']
+    if isinstance(size, tuple) and size[0] is not None \
+            and size[1] is not None:
+        sizes = normalize_parameter(parameter_results, size[0], size[1])
+        if parameter_type == 'node':
+            collection.set_sizes(sizes)
+        else:
+            collection.set_linewidths(sizes)
+
+
+def interpolate_timesteps(previous, following, weight):
+    """Linearly interpolates between the data of two consecutive timesteps,
+    given as Series or lists. weight is the fraction of the way from
+    previous to following."""
+    if isinstance(previous, pd.Series):
+        return previous * (1 - weight) + following * weight
+    return (np.asarray(previous) * (1 - weight)
+            + np.asarray(following) * weight).tolist()
+
+
+def get_writer(save_name, save_format, fps):
+    """Opens an imageio writer that frames can be appended to one at a
+    time."""
+    if save_format == "gif" or save_format == "GIF":
+        # The GIF duration is in milliseconds since imageio 2.28, see the
+        # imageio requirement in setup.py
+        return imageio.get_writer(save_name+"."+save_format,
+                                  format='GIF',
+                                  mode='I',
+                                  duration=1000/fps)
+    return imageio.get_writer(save_name+"."+save_format,
+                              format='FFMPEG',
+                              mode='I',
+                              fps=fps,
+                              quality=8,
+                              ffmpeg_log_level='quiet')
+
+
+def result_limits(self, parameter_type, parameter):
+    """Returns the minimum and maximum of a time-dependent parameter at each
+    element, as a (2 x elements) array. They are taken from the summary
+    statistics, which are computed in chunks of timesteps, so the results
+    are not copied or loaded in full."""
+    return np.stack([processing.get_parameter(
+        self, parameter_type, parameter, statistic,
+        include_tanks=True, include_reservoirs=True)[0].to_numpy()
+        for statistic in ("min", "max")])
 
 
 def make_vmin_vmax(parameter, kwargs):
-    for value in np.min(parameter, axis=0):
-        if value < -1e-5:
-            if kwargs.get("vmin", None) is None:
-                vmin = - \
-                    np.max(np.max(parameter, axis=0))
-            if kwargs.get("vmax", None) is None:
-                vmax = np.max(
-                    np.max(parameter, axis=0))
-            break
-        else:
-            if kwargs.get("vmin", None) is None:
-                vmin = np.min(
-                    np.min(parameter, axis=0))
-            if kwargs.get("vmax", None) is None:
-                vmax = np.max(
-                    np.max(parameter, axis=0))
+    """Returns the color bar limits of an animation of parameter, an
+    (timesteps x elements) array or the limits of result_limits, unless
+    they are given in kwargs. Data with negative values, such as flowrates,
+    gets limits centered on zero."""
+    values = np.asarray(parameter)
+    minimum = np.nanmin(values)
+    maximum = np.nanmax(values)
+    vmin = kwargs.get("vmin", None)
+    vmax = kwargs.get("vmax", None)
+    if vmin is None:
+        vmin = -maximum if minimum < -1e-5 else minimum
+    if vmax is None:
+        vmax = maximum
     return vmin, vmax
 
 
@@ -249,38 +626,29 @@ def make_intervals(parameter, kwargs):
     return intervals
 
 
-def bbox_inches_tight_resize(fig):
-    # Taken from matplotlib source code. This is how the bbox for
-    # saving figures with bbox_inches='tight' is done. Maybe there was a
-    # better way to do this? I don't know but tight_layout() wasn't doing
-    # the trick.
-    bbox_inches = fig.get_tightbbox(fig.canvas.get_renderer())
-    bbox_artists = fig.get_default_bbox_extra_artists()
-    bbox_filtered = []
-    for a in bbox_artists:
-        bbox = a.get_window_extent(fig.canvas.get_renderer())
-        if a.get_clip_on():
-            clip_box = a.get_clip_box()
-            if clip_box is not None:
-                bbox = Bbox.intersection(bbox, clip_box)
-            clip_path = a.get_clip_path()
-            if clip_path is not None and bbox is not None:
-                clip_path = clip_path.get_fully_transformed_path()
-                bbox = Bbox.intersection(bbox,
-                                         clip_path.get_extents())
-        if bbox is not None and (bbox.width != 0 or
-                                 bbox.height != 0):
-            if not np.isinf(bbox.width):
-                bbox_filtered.append(bbox)
-
-    if bbox_filtered:
-        _bbox = Bbox.union(bbox_filtered)
-        trans = Affine2D().scale(1.0 / fig.dpi)
-        bbox_extra = TransformedBbox(_bbox, trans)
-        bbox_inches = Bbox.union([bbox_inches, bbox_extra])
-
-    pad = 0.1
-    bbox_inches = bbox_inches.padded(pad)
-    restore_bbox = tight_bbox.adjust_bbox(fig, bbox_inches,
-                                          fig.canvas.fixed_dpi)
-    return restore_bbox
+def capture_frame(fig, drop_alpha=False):
+    """Draws fig and returns its pixels as an array of shape (height, width,
+    4), or (height, width, 3) if drop_alpha is True. On canvases based on
+    Agg the array is a view of the canvas buffer rather than a copy."""
+    canvas = fig.canvas
+    if hasattr(canvas, "buffer_rgba"):
+        canvas.draw()
+        mat = np.asarray(canvas.buffer_rgba())
+    else:
+        with io.BytesIO() as buff:
+            fig.savefig(buff, format='raw')
+            data = np.frombuffer(buff.getvalue(), dtype=np.uint8)
+        w, h = canvas.get_width_height()
+        mat = data.reshape((int(h), int(w), -1))
+    if drop_alpha:
+        mat = mat[..., :3]
+    return mat
+
+
+def bbox_inches_tight_resize(fig, bbox_inches=None):
+    """Adjusts fig to bbox_inches, by default its tight bounding box, as
+    savefig does with bbox_inches='tight'. Returns the function that
+    restores fig."""
+    if bbox_inches is None:
+        bbox_inches = tight_bbox_inches(fig)
+    return tight_bbox.adjust_bbox(fig, bbox_inches, fig.canvas.fixed_dpi)
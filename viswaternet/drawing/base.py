@@ -10,10 +10,54 @@ import networkx.drawing.nx_pylab as nxp
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 from matplotlib.lines import Line2D
+from matplotlib.figure import Figure
 from mpl_toolkits.axes_grid1 import make_axes_locatable
-from viswaternet.utils import save_fig, normalize_parameter
+from viswaternet.utils import save_fig, normalize_parameter, get_name_index
+from viswaternet.drawing.render import render_nodes, render_links, \
+    copy_collection, hide_ticks
+from viswaternet.utils.profiling import profiled
 
 
+def link_midpoints(model, link_list):
+    """Returns an (N, 2) array of the midpoints of the given links, read from
+    the link segments of the model's geometry store."""
+    link_index = get_name_index(model, "link")
+    indices = np.array([link_index[name] for name in link_list],
+                       dtype=np.intp)
+    return model["link_segments"][indices].mean(axis=1)
+
+
+def data_node_list(self, node_list, style):
+    """Returns the nodes of node_list that data is drawn for. Tanks and
+    reservoirs are left out when they are drawn as base elements."""
+    model = self.model
+    args = style.args
+    tank_names = set(model["tank_names"])
+    reservoir_names = set(model["reservoir_names"])
+    return [name for name in node_list
+            if ((name not in tank_names
+                 or args['draw_tanks'] is False)
+                and (name not in reservoir_names
+                     or args['draw_reservoirs'] is False))]
+
+
+def data_link_list(self, link_list, style):
+    """Returns the links of link_list that data is drawn for. Pumps and
+    valves are left out when they are drawn as base elements."""
+    model = self.model
+    args = style.args
+    pump_names = set(model["pump_names"])
+    valve_names = set(model["valve_names"])
+    return [name for name in link_list
+            if ((name not in pump_names
+                 or args['pump_element'] == 'node'
+                 or args['draw_pumps'] is False)
+                and (name not in valve_names
+                     or args['valve_element'] == 'node'
+                     or args['draw_valves'] is False))]
+
+
+@profiled(elements="node_list")
 def draw_nodes(
         self,
         ax,
@@ -87,7 +131,6 @@ def draw_nodes(
     """
 
     # Initalize parameters
-    model = self.model
     if style is None:
         style = self.default_style
     args = style.args
@@ -96,8 +139,6 @@ def draw_nodes(
     args = style.args
     if node_size is None:
         node_size = args['node_size']
-    draw_tanks = args['draw_tanks']
-    draw_reservoirs = args['draw_reservoirs']
     cmap = args['cmap']
     if node_shape is None:
         node_shape = args['node_shape']
@@ -112,12 +153,7 @@ def draw_nodes(
     # Checks if some data values are given
     if parameter_results.values.tolist():
         # If values is less than this value, we treat it as a negative.
-        node_list = [node_list[node_list.index(name)]
-                     for name in node_list
-                     if ((name not in model["tank_names"]
-                          or draw_tanks is False)
-                     and (name not in model["reservoir_names"]
-                          or draw_reservoirs is False))]
+        node_list = data_node_list(self, node_list, style)
         parameter_results = parameter_results.loc[node_list]
         parameter_results = parameter_results.values.tolist()
         if isinstance(node_size, tuple):
@@ -140,11 +176,10 @@ def draw_nodes(
             # value and vmin to the negative of the max data value. This
             # ensures that the colorbar is centered at 0.
             if vmin is None and vmax is None:
-                g = nxp.draw_networkx_nodes(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    nodelist=node_list,
+                g = render_nodes(
+                    self,
+                    ax,
+                    node_list,
                     node_size=node_size,
                     node_color=parameter_results,
                     cmap=cmap,
@@ -155,11 +190,10 @@ def draw_nodes(
                     edgecolors=node_border_color)
             # Otherwise, just pass the user-given parameters
             else:
-                g = nxp.draw_networkx_nodes(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    nodelist=node_list,
+                g = render_nodes(
+                    self,
+                    ax,
+                    node_list,
                     node_size=node_size,
                     node_color=parameter_results,
                     vmax=vmax,
@@ -184,11 +218,10 @@ def draw_nodes(
             # as networkx will handle the limits of the colorbar
             # itself.
             if vmin is None and vmax is None:
-                g = nxp.draw_networkx_nodes(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    nodelist=node_list,
+                g = render_nodes(
+                    self,
+                    ax,
+                    node_list,
                     node_size=node_size,
                     node_color=parameter_results,
                     cmap=cmap,
@@ -197,11 +230,10 @@ def draw_nodes(
                     edgecolors=node_border_color)
             # Otherwise, just pass the user-given parameters
             else:
-                g = nxp.draw_networkx_nodes(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    nodelist=node_list,
+                g = render_nodes(
+                    self,
+                    ax,
+                    node_list,
                     node_size=node_size,
                     node_color=parameter_results,
                     cmap=cmap,
@@ -214,11 +246,10 @@ def draw_nodes(
             return g
     # Draw without any data associated with draw_nodes
     else:
-        nxp.draw_networkx_nodes(
-            model["G"],
-            model["pos_dict"],
-            ax=ax,
-            nodelist=node_list,
+        render_nodes(
+            self,
+            ax,
+            node_list,
             node_size=node_size,
             node_color=node_color,
             node_shape=node_shape,
@@ -226,6 +257,7 @@ def draw_nodes(
             linewidths=node_border_width)
 
 
+@profiled(elements="link_list")
 def draw_links(
         self,
         ax,
@@ -264,8 +296,8 @@ def draw_links(
 
         Should only be used if calling draw_links() manually.
 
-        Refer to the matplotlib documentation for available link styles.
-            https://matplotlib.org/stable/gallery/lines_bars_and_markers/linestyles.html
+        Refer to the Linestyles example of the matplotlib gallery for
+        available link styles.
 
     link_arrows : string, array-like
         Whether arrows should be drawn for each link. Can either be a single
@@ -297,16 +329,11 @@ def draw_links(
         The style object to be used.
     """
     # Initalize parameters
-    model = self.model
     if style is None:
         style = self.default_style
     args = style.args
     if link_width is None:
         link_width = args['link_width']
-    pump_element = args['pump_element']
-    draw_pumps = args['draw_pumps']
-    valve_element = args['valve_element']
-    draw_valves = args['draw_valves']
     cmap = args['cmap']
     if link_style is None:
         link_style = args['link_style']
@@ -323,16 +350,7 @@ def draw_links(
         link_width = (np.ones(len(link_list)) * 1).tolist()
     # Checks if some data values are given
     if parameter_results.values.tolist():
-        link_list = [link_list[link_list.index(name)]
-                     for name in link_list
-                     if ((name not in model["pump_names"]
-                          or pump_element == 'node'
-                          or draw_pumps is False)
-                     and (name not in model["valve_names"]
-                          or valve_element == 'node'
-                          or draw_valves is False))]
-        edges = [model["pipe_list"][model['G_pipe_name_list'].index(name)]
-                 for name in link_list]
+        link_list = data_link_list(self, link_list, style)
         parameter_results = parameter_results.loc[link_list]
         parameter_results = parameter_results.values.tolist()
         if isinstance(link_width, tuple):
@@ -355,11 +373,10 @@ def draw_links(
             # value and vmin to the negative of the max data value. This
             # ensures that the colorbar is centered at 0.
             if vmin is None and vmax is None:
-                g = nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=edges,
+                g = render_links(
+                    self,
+                    ax,
+                    link_list,
                     edge_color=parameter_results,
                     edge_vmax=np.max(parameter_results),
                     edge_vmin=-np.max(parameter_results),
@@ -370,11 +387,10 @@ def draw_links(
                     node_size=0)
             # Otherwise, just pass the user-given parameters
             else:
-                g = nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=edges,
+                g = render_links(
+                    self,
+                    ax,
+                    link_list,
                     edge_color=parameter_results,
                     edge_vmax=vmax,
                     edge_vmin=vmin,
@@ -399,11 +415,10 @@ def draw_links(
             # as networkx will handle the limits of the colorbar
             # itself.
             if vmin is None and vmax is None:
-                g = nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=edges,
+                g = render_links(
+                    self,
+                    ax,
+                    link_list,
                     edge_color=parameter_results,
                     edge_cmap=cmap,
                     style=link_style,
@@ -412,11 +427,10 @@ def draw_links(
                     node_size=0)
             # Otherwise, just pass the user-given parameters
             else:
-                g = nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=edges,
+                g = render_links(
+                    self,
+                    ax,
+                    link_list,
                     edge_color=parameter_results,
                     edge_cmap=cmap,
                     style=link_style,
@@ -429,13 +443,10 @@ def draw_links(
             return g
     # Draw without any data associated with draw_links
     else:
-        edges = [model["pipe_list"][model['G_pipe_name_list'].index(name)]
-                 for name in link_list]
-        nxp.draw_networkx_edges(
-            model["G"],
-            model["pos_dict"],
-            ax=ax,
-            edgelist=edges,
+        render_links(
+            self,
+            ax,
+            link_list,
             edge_color=link_color,
             style=link_style,
             arrows=link_arrows,
@@ -443,6 +454,7 @@ def draw_links(
             node_size=0)
 
 
+@profiled
 def draw_base_elements(
         self,
         ax,
@@ -479,6 +491,24 @@ def draw_base_elements(
     model = self.model
     if style is None:
         style = self.default_style
+    # Inside plot_batch, the base elements are drawn once for each set of
+    # arguments and copied to every figure that draws them again
+    batch = model.get("batch")
+    if batch is not None:
+        key = (id(style), draw_nodes, draw_originator,
+               None if element_list is None else tuple(element_list))
+        if key not in batch:
+            batch[key] = base_layer(self, draw_nodes, element_list,
+                                    draw_originator, style)
+        if batch[key] is not None:
+            collections, data_limits = batch[key]
+            for collection in collections:
+                copy_collection(collection, ax)
+            if np.all(np.isfinite(data_limits)):
+                ax.update_datalim(data_limits)
+                ax.autoscale_view()
+            hide_ticks(ax)
+            return
     args = style.args
     draw_tanks = args['draw_tanks']
     draw_reservoirs = args['draw_reservoirs']
@@ -521,35 +551,34 @@ def draw_base_elements(
     # If draw_nodes is True, then draw draw_nodes
     if draw_nodes:
         node_list = model['node_names']
+        tank_names = set(model["tank_names"])
+        reservoir_names = set(model["reservoir_names"])
         if element_list is None or draw_originator == 'link':
-            node_list = [node_list[node_list.index(name)]
-                         for name in node_list
-                         if ((name not in model["tank_names"]
-                              or draw_tanks is False)
-                         and (name not in model["reservoir_names"]
-                              or draw_reservoirs is False))]
+            node_list = [name for name in node_list
+                         if (name not in tank_names
+                             or draw_tanks is False)
+                         and (name not in reservoir_names
+                              or draw_reservoirs is False)]
         else:
-            node_list = [node_list[node_list.index(name)]
-                         for name in node_list
-                         if ((name not in model["tank_names"]
-                              or draw_tanks is False)
-                         and (name not in model["reservoir_names"]
+            drawn_elements = set(element_list)
+            node_list = [name for name in node_list
+                         if (name not in tank_names
+                             or draw_tanks is False)
+                         and (name not in reservoir_names
                               or draw_reservoirs is False)
-                         and (name not in element_list))]
-        nxp.draw_networkx_nodes(
-            model["G"],
-            model["pos_dict"],
+                         and name not in drawn_elements]
+        render_nodes(
+            self,
+            ax,
+            node_list,
             node_size=base_node_size,
-            nodelist=node_list,
-            node_color=base_node_color,
-            ax=ax)
+            node_color=base_node_color)
     # If draw_reservoirs is True, then draw draw_reservoirs
     if draw_reservoirs:
-        nxp.draw_networkx_nodes(
-            model["G"],
-            model["pos_dict"],
-            ax=ax,
-            nodelist=model["reservoir_names"],
+        render_nodes(
+            self,
+            ax,
+            model["reservoir_names"],
             node_size=reservoir_size,
             node_color=reservoir_color,
             edgecolors=reservoir_border_color,
@@ -558,11 +587,10 @@ def draw_base_elements(
             label="Reservoirs")
     # If draw_tanks is True, then draw draw_tanks
     if draw_tanks:
-        nxp.draw_networkx_nodes(
-            model["G"],
-            model["pos_dict"],
-            ax=ax,
-            nodelist=model["tank_names"],
+        render_nodes(
+            self,
+            ax,
+            model["tank_names"],
             node_size=tank_size,
             node_color=tank_color,
             edgecolors=tank_border_color,
@@ -572,30 +600,30 @@ def draw_base_elements(
     # If draw_links is True, then draw draw_links
     if draw_links:
         pipe_name_list = model['G_pipe_name_list']
+        pump_names = set(model["pump_names"])
+        valve_names = set(model["valve_names"])
         if element_list is None or draw_originator == 'node':
-            edgelist = [model['pipe_list'][pipe_name_list.index(name)]
-                        for name in pipe_name_list
-                        if ((name not in model["pump_names"]
+            link_list = [name for name in pipe_name_list
+                         if (name not in pump_names
                              or pump_element == 'node'
                              or draw_pumps is False)
-                        and (name not in model["valve_names"]
-                             or valve_element == 'node'
-                             or draw_valves is False))]
+                         and (name not in valve_names
+                              or valve_element == 'node'
+                              or draw_valves is False)]
         else:
-            edgelist = [model['pipe_list'][pipe_name_list.index(name)]
-                        for name in pipe_name_list
-                        if ((name not in model["pump_names"]
+            drawn_elements = set(element_list)
+            link_list = [name for name in pipe_name_list
+                         if (name not in pump_names
                              or pump_element == 'node'
                              or draw_pumps is False)
-                        and (name not in model["valve_names"]
-                             or valve_element == 'node'
-                             or draw_valves is False)
-                        and (name not in element_list))]
-        nxp.draw_networkx_edges(
-            model["G"],
-            model["pos_dict"],
-            edgelist=edgelist,
-            ax=ax,
+                         and (name not in valve_names
+                              or valve_element == 'node'
+                              or draw_valves is False)
+                         and name not in drawn_elements]
+        render_links(
+            self,
+            ax,
+            link_list,
             edge_color=base_link_color,
             width=base_link_width,
             style=base_link_line_style,
@@ -603,21 +631,15 @@ def draw_base_elements(
     # If draw_valves is True, then draw draw_valves
     if draw_valves:
         if valve_element == 'node':
-            valve_coordinates = {}
             # For each valve, calculate midpoint along link it is located at
             # then store the coordinates of where valve should be drawn
-            for i, (point1, point2) in enumerate(model["G_list_valves_only"]):
-                midpoint = [(model["wn"].get_node(point1).coordinates[0]
-                             + model["wn"].get_node(point2).coordinates[0])/2,
-                            (model["wn"].get_node(point1).coordinates[1]
-                             + model["wn"].get_node(point2).coordinates[1])/2]
-                valve_coordinates[model["valve_names"][i]] = midpoint
+            valve_coordinates = link_midpoints(model, model["valve_names"])
             # Draw draw_valves after midpoint calculations
-            nxp.draw_networkx_nodes(
-                model["G"],
-                valve_coordinates,
-                ax=ax,
-                nodelist=model["valve_names"],
+            render_nodes(
+                self,
+                ax,
+                model["valve_names"],
+                coordinates=valve_coordinates,
                 node_size=valve_size,
                 node_color=valve_color,
                 edgecolors=valve_border_color,
@@ -625,11 +647,10 @@ def draw_base_elements(
                 node_shape=valve_shape,
                 label="Valves")
         elif valve_element == 'link':
-            nxp.draw_networkx_edges(
-                model["G"],
-                model["pos_dict"],
-                ax=ax,
-                edgelist=model["G_list_valves_only"],
+            render_links(
+                self,
+                ax,
+                model["valve_names"],
                 edge_color=valve_color,
                 width=valve_width,
                 style=valve_line_style,
@@ -637,21 +658,15 @@ def draw_base_elements(
     # If draw_pumps is True, then draw draw_pumps
     if draw_pumps:
         if pump_element == 'node':
-            pump_coordinates = {}
-            # For each valve, calculate midpoint along link it is located at
+            # For each pump, calculate midpoint along link it is located at
             # then store the coordinates of where pump should be drawn
-            for i, (point1, point2) in enumerate(model["G_list_pumps_only"]):
-                midpoint = [(model["wn"].get_node(point1).coordinates[0]
-                             + model["wn"].get_node(point2).coordinates[0])/2,
-                            (model["wn"].get_node(point1).coordinates[1]
-                             + model["wn"].get_node(point2).coordinates[1])/2]
-                pump_coordinates[model["pump_names"][i]] = midpoint
+            pump_coordinates = link_midpoints(model, model["pump_names"])
             # Draw draw_valves after midpoint calculations
-            nxp.draw_networkx_nodes(
-                model["G"],
-                pump_coordinates,
-                ax=ax,
-                nodelist=model["pump_names"],
+            render_nodes(
+                self,
+                ax,
+                model["pump_names"],
+                coordinates=pump_coordinates,
                 node_size=pump_size,
                 node_color=pump_color,
                 edgecolors=pump_border_color,
@@ -659,17 +674,36 @@ def draw_base_elements(
                 node_shape=pump_shape,
                 label="Pumps")
         elif pump_element == 'link':
-            nxp.draw_networkx_edges(
-                model["G"],
-                model["pos_dict"],
-                ax=ax,
-                edgelist=model["G_list_pumps_only"],
+            render_links(
+                self,
+                ax,
+                model["pump_names"],
                 edge_color=pump_color,
                 width=pump_width,
                 style=pump_line_style,
                 arrows=pump_arrows)
 
 
+def base_layer(self, draw_nodes, element_list, draw_originator, style):
+    """Draws base elements on the axes of a new figure for plot_batch.
+    Returns the collections and the data limits of the drawing, or None if
+    it includes artists other than collections, such as link arrows, that
+    can not be copied."""
+    fig = Figure()
+    ax = fig.add_subplot()
+    batch = self.model.pop("batch")
+    try:
+        draw_base_elements(self, ax, draw_nodes=draw_nodes,
+                           element_list=element_list,
+                           draw_originator=draw_originator, style=style)
+    finally:
+        self.model["batch"] = batch
+    if ax.patches or ax.lines or ax.texts:
+        return None
+    return list(ax.collections), ax.dataLim.get_points().copy()
+
+
+@profiled
 def plot_basic_elements(
         self,
         ax=None,
@@ -730,6 +764,7 @@ def plot_basic_elements(
         save_fig(self, save_name=save_name, style=style)
 
 
+@profiled
 def draw_legend(
         self,
         ax,
@@ -903,8 +938,9 @@ def draw_legend(
                     try:
                         cmap = mpl.colormaps[cmap]
                     except Exception:
-                        if isinstance(cmap, mpl.colors.LinearSegmentedColormap) \
-                                or isinstance(cmap, mpl.colors.ListedColormap):
+                        if isinstance(cmap,
+                                      (mpl.colors.LinearSegmentedColormap,
+                                       mpl.colors.ListedColormap)):
                             pass
                         else:
                             raise Exception('Invalid cmap!')
@@ -992,6 +1028,7 @@ def draw_legend(
             ax.add_artist(legend3)
 
 
+@profiled
 def draw_color_bar(
         self,
         ax,
@@ -1029,7 +1066,7 @@ def draw_color_bar(
     color_bar_label_font_size = args['color_bar_label_font_size']
     color_bar_label_font_color = args['color_bar_label_font_color']
     divider = make_axes_locatable(ax)
-    fig = plt.gcf()
+    fig = ax.get_figure()
     if color_bar_loc == 'right':
         cax = fig.add_axes([divider.get_position()[0]+divider.get_position()[2]
                             + 0.02, (divider.get_position()[1])
@@ -1085,6 +1122,7 @@ def draw_color_bar(
     cbar.ax.xaxis.label.set_color(color_bar_label_font_color)
 
 
+@profiled
 def draw_label(
         self,
         labels,
@@ -1150,7 +1188,7 @@ def draw_label(
 
     label_font_style : string
         The font style of the label. Takes 'normal', 'italic', or 'oblique'.
-   
+
     label_edge_width : integer
         The width of the label edge.
     """
@@ -1158,6 +1196,7 @@ def draw_label(
     if ax is None:
         ax = self.ax
     if draw_nodes is not None:
+        node_index = get_name_index(model, "node")
         for label, node, xCoord, yCoord in \
                 zip(labels, draw_nodes, x_coords, y_coords):
             if draw_arrow:
@@ -1167,8 +1206,8 @@ def draw_label(
                 else:
                     model["G"].add_node(label, pos=(xCoord, yCoord))
                     model["pos_dict"][label] = (
-                        model["wn"].get_node(node).coordinates[0] + xCoord,
-                        model["wn"].get_node(node).coordinates[1] + yCoord)
+                        model["node_coords"][node_index[node], 0] + xCoord,
+                        model["node_coords"][node_index[node], 1] + yCoord)
                     edge_list.append((node, label))
                     nxp.draw_networkx_edges(
                         model["G"], model["pos_dict"], edgelist=edge_list,
@@ -1179,8 +1218,8 @@ def draw_label(
             if draw_arrow is True:
                 if xCoord < 0:
                     ax.text(
-                        model["wn"].get_node(node).coordinates[0] + xCoord,
-                        model["wn"].get_node(node).coordinates[1] + yCoord,
+                        model["node_coords"][node_index[node], 0] + xCoord,
+                        model["node_coords"][node_index[node], 1] + yCoord,
                         s=label,
                         color=label_text_color,
                         style=label_font_style,
@@ -1193,8 +1232,8 @@ def draw_label(
                         fontsize=label_font_size)
                 if xCoord >= 0:
                     ax.text(
-                        model["wn"].get_node(node).coordinates[0] + xCoord,
-                        model["wn"].get_node(node).coordinates[1] + yCoord,
+                        model["node_coords"][node_index[node], 0] + xCoord,
+                        model["node_coords"][node_index[node], 1] + yCoord,
                         s=label,
                         color=label_text_color,
                         style=label_font_style,
@@ -1207,8 +1246,8 @@ def draw_label(
                         fontsize=label_font_size)
             else:
                 ax.text(
-                    model["wn"].get_node(node).coordinates[0] + xCoord,
-                    model["wn"].get_node(node).coordinates[1] + yCoord,
+                    model["node_coords"][node_index[node], 0] + xCoord,
+                    model["node_coords"][node_index[node], 1] + yCoord,
                     s=label, color=label_text_color, style=label_font_style,
                     bbox=dict(facecolor=label_face_color,
                               alpha=label_alpha, edgecolor=label_edge_color,
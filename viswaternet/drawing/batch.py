@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+The viswaternet.drawing.batch module draws many figures of the same network
+in one call.
+
+plot_batch draws the base elements of the network once for each style and
+copies them to every figure, instead of filtering the element lists and
+building the base collections again for each one. With workers, figures are
+drawn and saved by a pool of processes. The data of each figure is prepared
+by the main process, so the workers do not need the simulation results.
+
+Example
+-------
+>>>import viswaternet as vis
+>>>model = vis.VisWNModel(r'Networks/CTown.inp')
+>>>specs = [{'function': 'plot_continuous_nodes', 'parameter': 'pressure',
+...          'value': 'max', 'save_name': 'pressure_max_'},
+...         {'function': 'plot_continuous_links', 'parameter': 'velocity',
+...          'value': 'max', 'save_name': 'velocity_max_'}]
+>>>paths = model.plot_batch(specs, savefig=True, workers=4)
+"""
+import inspect
+import matplotlib.pyplot as plt
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from viswaternet.network import processing
+from viswaternet.network.summary_cache import is_threshold_value
+from viswaternet.utils import label_generator
+from viswaternet.utils.save_fig import save_fig
+from viswaternet.utils.profiling import profiled
+
+# Plotting functions whose data can be prepared by the main process, with
+# the element type and the argument holding the title of the color bar or
+# legend
+PREPARED_FUNCTIONS = {
+    "plot_continuous_nodes": ("node", "color_bar_title"),
+    "plot_continuous_links": ("link", "color_bar_title"),
+    "plot_discrete_nodes": ("node", "discrete_legend_title"),
+    "plot_discrete_links": ("link", "discrete_legend_title")}
+
+# Arguments of the plotting functions that are passed on to get_parameter
+ELEMENT_ARGUMENTS = ("element_list", "include_tanks", "include_reservoirs",
+                     "include_pumps", "include_valves")
+
+
+@profiled(elements="specs")
+def plot_batch(
+        self,
+        specs,
+        savefig=False,
+        workers=None,
+        figsize=None,
+        style=None):
+    """Draws a figure for each of a list of plot specifications. Figures that
+    draw the same base elements with the same style share them, so drawing a
+    batch is faster than calling the plotting functions one by one.
+
+    Arguments
+    ---------
+    specs : list
+        The figures to be drawn. Each specification is a dictionary with the
+        name of a plotting function of VisWNModel, such as
+        'plot_continuous_nodes', under 'function', and the arguments it is
+        called with. ax, savefig and style do not need to be given.
+
+    savefig : boolean
+        Determines if the figures are saved with the save_name of their
+        specification and closed. Otherwise they are left open.
+
+    workers : integer
+        The number of processes that draw and save the figures. Requires
+        savefig. Figures of functions other than plot_continuous_* and
+        plot_discrete_*, and figures with no parameter, are drawn by the main
+        process.
+
+    figsize : tuple
+        The size of the figures in inches. By default this is the figsize of
+        the VisWNModel object.
+
+    style : VisWaterNet Style Object
+        The style used by specifications that do not give their own.
+
+    Returns a list with the figure of each specification, or the path of
+    its image if savefig is True.
+    """
+    if figsize is None:
+        figsize = self.figsize
+    specs = [split_spec(spec, style) for spec in specs]
+    if workers is not None and workers > 1 and not savefig:
+        raise Exception("Figures can only be drawn by workers if they are "
+                        "saved. Set savefig to True.")
+    previous = self.model.get("batch")
+    self.model["batch"] = {}
+    try:
+        if workers is None or workers <= 1:
+            figures = [draw_spec(self, function_name, kwargs, figsize,
+                                 savefig, save_name)
+                       for function_name, kwargs, save_name in specs]
+        else:
+            figures = draw_parallel(self, specs, workers, figsize)
+    finally:
+        if previous is None:
+            self.model.pop("batch", None)
+        else:
+            self.model["batch"] = previous
+    if savefig:
+        return [future.result() for future in figures]
+    return figures
+
+
+def split_spec(spec, style):
+    """Returns the name of the plotting function, its arguments and the save
+    name of a plot specification."""
+    kwargs = dict(spec)
+    function = kwargs.pop("function", None)
+    if function is None:
+        raise Exception("Plot specifications need a function!")
+    function_name = getattr(function, "__name__", function)
+    kwargs.pop("ax", None)
+    kwargs.pop("savefig", None)
+    save_name = kwargs.pop("save_name", None)
+    if kwargs.get("style") is None and style is not None:
+        kwargs["style"] = style
+    return function_name, kwargs, save_name
+
+
+def draw_spec(self, function_name, kwargs, figsize, savefig, save_name,
+              fig=None):
+    """Draws a plot specification on a new figure. Returns the figure, or
+    the Future of its image if savefig is True, in which case the figure is
+    closed."""
+    if fig is None:
+        fig, ax = plt.subplots(figsize=figsize)
+    else:
+        ax = fig.add_subplot()
+    ax.set_frame_on(self.axis_frame)
+    getattr(self, function_name)(ax=ax, **kwargs)
+    if not savefig:
+        return fig
+    future = save_fig(self, save_name=save_name, style=kwargs.get("style"),
+                      fig=fig)
+    plt.close(fig)
+    return future
+
+
+def prepare_spec(self, function_name, kwargs):
+    """Returns the arguments of a plot specification with its data given as
+    [parameter_results, element_list] in value, so that it can be drawn
+    without the simulation results, or None if this is not possible."""
+    if function_name not in PREPARED_FUNCTIONS \
+            or kwargs.get("parameter") is None \
+            or isinstance(kwargs.get("value"), list):
+        return None
+    element_type, title_argument = PREPARED_FUNCTIONS[function_name]
+    # Missing arguments take the defaults of the plotting function
+    arguments = inspect.signature(getattr(self, function_name)).bind(
+        **kwargs)
+    arguments.apply_defaults()
+    arguments = arguments.arguments
+    parameter = arguments["parameter"]
+    value = arguments["value"]
+    unit = arguments["unit"]
+    parameter_results, element_list = processing.get_parameter(
+        self,
+        element_type,
+        parameter,
+        value=value,
+        **{name: arguments[name] for name in ELEMENT_ARGUMENTS
+           if name in arguments})
+    kwargs = dict(kwargs)
+    if kwargs.get(title_argument) is None:
+        kwargs[title_argument] = label_generator(parameter, value, unit)
+    kwargs["value"] = [parameter_results, element_list]
+    # Counts of timesteps above or below a threshold have no units, but the
+    # plotting function can not tell from the data
+    if is_threshold_value(value):
+        kwargs["unit"] = None
+    return kwargs
+
+
+def draw_parallel(self, specs, workers, figsize):
+    """Draws and saves the plot specifications with a pool of worker
+    processes. Returns the Future of each image, in order."""
+    # Imported here, as animate imports the plotting functions
+    from viswaternet.drawing.animate import model_snapshot
+    futures = [None] * len(specs)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=init_worker,
+                             initargs=(model_snapshot(self),
+                                       figsize)) as executor:
+        pending = deque()
+        for i, (function_name, kwargs, save_name) in enumerate(specs):
+            prepared = prepare_spec(self, function_name, kwargs)
+            if prepared is None:
+                futures[i] = draw_spec(self, function_name, kwargs, figsize,
+                                       True, save_name)
+                continue
+            futures[i] = executor.submit(draw_worker_spec, function_name,
+                                         prepared, save_name)
+            # Bounds the prepared data waiting for a worker
+            pending.append(futures[i])
+            if len(pending) >= 2 * workers:
+                pending.popleft().result()
+    return futures
+
+
+# State of a plot_batch worker process, set by init_worker
+_worker = {}
+
+
+def init_worker(snapshot, figsize):
+    """Initializes a worker process of plot_batch with the model snapshot
+    and the size of the figures."""
+    snapshot.model["batch"] = {}
+    _worker.update(snapshot=snapshot, figsize=figsize)
+
+
+def draw_worker_spec(function_name, kwargs, save_name):
+    """Draws and saves a prepared plot specification in a worker process on
+    a new Agg figure. Returns the path of the image."""
+    fig = Figure(figsize=_worker["figsize"])
+    FigureCanvasAgg(fig)
+    future = draw_spec(_worker["snapshot"], function_name, kwargs, None,
+                       True, save_name, fig=fig)
+    return future.result()
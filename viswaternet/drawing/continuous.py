@@ -5,11 +5,14 @@ continuous data drawing.
 
 import matplotlib.pyplot as plt
 from viswaternet.network import processing
+from viswaternet.network.summary_cache import is_threshold_value
 from viswaternet.utils import save_fig, unit_conversion, \
     fancyarrowpatch_to_linecollection, label_generator
 from viswaternet.drawing import base
+from viswaternet.utils.profiling import profiled
 
 
+@profiled
 def plot_continuous_nodes(
         self,
         ax=None,
@@ -31,7 +34,8 @@ def plot_continuous_nodes(
         save_name=None,
         style=None):
     """User-level function that draws continuous nodal data, base elements,
-    legends, and saves the figure.
+    legends, and saves the figure. Returns the collection the data is drawn
+    with.
 
     Arguments
     ---------
@@ -67,7 +71,7 @@ def plot_continuous_nodes(
     include_reservoirs : boolean
         Determines if data for draw_reservoirs are retrieved.
 
-    value : integer, string
+    value : integer, string, tuple
         For time-varying parameters only. Specifies which timestep or data
         summary will be plotted.
 
@@ -80,6 +84,15 @@ def plot_continuous_nodes(
             'mean'              Plots mean for each element
             'stddev'            Plots standard deviation for each element
             'range'             Plots range for each element
+            'p95'               Plots the given percentile (here the 95th)
+                                for each element
+            ('above', x)        Plots the number of timesteps each
+                                element is above x, given in the units
+                                of the simulation results
+            ('below', x)        Plots the number of timesteps each
+                                element is below x
+            ('max', 24, 48)     Plots any of the above over timesteps 24
+                                to 47 only
         ======================= =========================================
 
     unit : string
@@ -132,6 +145,7 @@ def plot_continuous_nodes(
         self.fig = fig
         self.ax = ax
         ax.set_frame_on(self.axis_frame)
+    g = None
     if parameter is not None:
         if not isinstance(value, list):
             parameter_results, node_list = processing.get_parameter(
@@ -145,7 +159,8 @@ def plot_continuous_nodes(
         else:
             parameter_results = value[0]
             node_list = value[1]
-        if unit is not None:
+        # Counts of timesteps above or below a threshold have no units
+        if unit is not None and not is_threshold_value(value):
             parameter_results = unit_conversion(
                 parameter_results, parameter, unit)
         g = base.draw_nodes(
@@ -180,8 +195,10 @@ def plot_continuous_nodes(
                      style=style)
     if savefig:
         save_fig(self, save_name=save_name, style=style)
+    return g
 
 
+@profiled
 def plot_continuous_links(
         self,
         ax=None,
@@ -203,7 +220,8 @@ def plot_continuous_links(
         color_bar_title=None,
         style=None):
     """User-level function that draws continuous link data, base elements,
-    legends, and saves the figure.
+    legends, and saves the figure. Returns the collection the data is drawn
+    with.
 
     Arguments
     ---------
@@ -237,7 +255,7 @@ def plot_continuous_links(
     include_valves : boolean
         Determines if data for draw_valves are retrieved
 
-    value : integer, string
+    value : integer, string, tuple
         For time-varying parameters only. Specifies which timestep or data
         summary will be plotted.
 
@@ -250,6 +268,15 @@ def plot_continuous_links(
             'mean'              Plots mean for each element
             'stddev'            Plots standard deviation for each element
             'range'             Plots range for each element
+            'p95'               Plots the given percentile (here the 95th)
+                                for each element
+            ('above', x)        Plots the number of timesteps each
+                                element is above x, given in the units
+                                of the simulation results
+            ('below', x)        Plots the number of timesteps each
+                                element is below x
+            ('max', 24, 48)     Plots any of the above over timesteps 24
+                                to 47 only
         ======================= =========================================
 
     unit : string
@@ -303,6 +330,7 @@ def plot_continuous_links(
         if ax is None:
             fig, ax = plt.subplots(figsize=self.figsize)
             ax.set_frame_on(self.axis_frame)
+    g = None
     if parameter is not None:
         if not isinstance(value, list):
             parameter_results, link_list = processing.get_parameter(
@@ -316,7 +344,8 @@ def plot_continuous_links(
         else:
             parameter_results = value[0]
             link_list = value[1]
-        if unit is not None:
+        # Counts of timesteps above or below a threshold have no units
+        if unit is not None and not is_threshold_value(value):
             parameter_results = unit_conversion(
                 parameter_results, parameter, unit)
         g = base.draw_links(
@@ -355,3 +384,4 @@ def plot_continuous_links(
                      style=style)
     if savefig:
         save_fig(self, save_name=save_name, style=style)
+    return g
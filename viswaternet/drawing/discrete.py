@@ -8,12 +8,16 @@ import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
-import networkx.drawing.nx_pylab as nxp
 from viswaternet.network import processing
-from viswaternet.utils import save_fig, unit_conversion, label_generator
+from viswaternet.network.summary_cache import is_threshold_value
+from viswaternet.utils import save_fig, unit_conversion, label_generator, \
+    get_name_index
 from viswaternet.drawing import base
+from viswaternet.drawing.render import render_nodes, render_links
+from viswaternet.utils.profiling import profiled
 
 
+@profiled(elements="element_list")
 def draw_discrete_nodes(
         self,
         ax,
@@ -83,11 +87,10 @@ def draw_discrete_nodes(
             if interval_elements:
                 node_list = [model["node_names"][i]
                              for i in element_list.get(interval_name).values()]
-                nxp.draw_networkx_nodes(
-                    model["G"], model["pos_dict"], ax=ax,
-                    nodelist=(
-                        [model["node_names"][i]
-                         for i in element_list.get(interval_name).values()]),
+                render_nodes(
+                    self,
+                    ax,
+                    node_list,
                     node_size=node_size[j],
                     node_color=color_list[j],
                     node_shape=node_shape[j],
@@ -118,11 +121,10 @@ def draw_discrete_nodes(
             if interval_elements:
                 node_list = [model["node_names"][i]
                              for i in element_list.get(interval_name).values()]
-                nxp.draw_networkx_nodes(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    nodelist=node_list,
+                render_nodes(
+                    self,
+                    ax,
+                    node_list,
                     node_size=node_size[j],
                     node_color=[cmap(float(cmapValue))],
                     node_shape=node_shape[j],
@@ -141,6 +143,7 @@ def draw_discrete_nodes(
             cmapValue += 1 / len(intervals)
 
 
+@profiled(elements="element_list")
 def draw_discrete_links(
         self,
         ax,
@@ -164,6 +167,9 @@ def draw_discrete_links(
 
     label_list : string, array-like
         List of labels for each interval.
+
+    The axis limits are padded around the node coordinates and any other
+    positions in the model's pos_dict, such as label anchors.
     """
     model = self.model
     if style is None:
@@ -188,25 +194,22 @@ def draw_discrete_links(
         for j, interval_name in enumerate(intervals):
             interval_elements = element_list.get(interval_name)
             if interval_elements:
-                edge_list = [model["pipe_list"][i]
+                link_list = [model["G_pipe_name_list"][i]
                              for i in element_list.get(interval_name).values()]
-                nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=edge_list,
+                render_links(
+                    self,
+                    ax,
+                    link_list,
                     edge_color=color_list[j],
                     width=link_width[j],
                     arrows=link_arrows[j],
                     style=link_style[j],
                     label=label_list[j])
             else:
-                nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=[(model['node_names'][0],
-                               model['node_names'][0])],
+                render_links(
+                    self,
+                    ax,
+                    [],
                     edge_color=color_list[j],
                     width=link_width[j],
                     arrows=link_arrows[j],
@@ -225,13 +228,12 @@ def draw_discrete_links(
         for j, interval_name in enumerate(intervals):
             interval_elements = element_list.get(interval_name)
             if interval_elements:
-                edge_list = [model["pipe_list"][i]
+                link_list = [model["G_pipe_name_list"][i]
                              for i in element_list.get(interval_name).values()]
-                nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=edge_list,
+                render_links(
+                    self,
+                    ax,
+                    link_list,
                     edge_color=[cmap(float(cmapValue))],
                     width=link_width[j],
                     arrows=link_arrows[j],
@@ -239,28 +241,27 @@ def draw_discrete_links(
                     label=label_list[j])
             else:
                 # Janky as always :)
-                nxp.draw_networkx_edges(
-                    model["G"],
-                    model["pos_dict"],
-                    ax=ax,
-                    edgelist=[(model['node_names'][0],
-                               model['node_names'][0])],
+                render_links(
+                    self,
+                    ax,
+                    [],
                     edge_color=[cmap(float(cmapValue))],
                     width=link_width[j],
                     arrows=link_arrows[j],
                     style=link_style[j],
                     label=label_list[j])
             cmapValue += 1 / len(intervals)
-    pos = model["pos_dict"]
-    edge_list_x = []
-    edge_list_y = []
-    for edge in pos.values():
-        edge_list_x.append(edge[0])
-        edge_list_y.append(edge[1])
-    minx = np.min(edge_list_x)
-    maxx = np.max(edge_list_x)
-    miny = np.min(edge_list_y)
-    maxy = np.max(edge_list_y)
+    coords = model["node_coords"]
+    # pos_dict only holds other positions when it has more entries than
+    # there are nodes, so the node coordinates are used directly otherwise
+    if len(model["pos_dict"]) > len(coords):
+        node_index = get_name_index(model, "node")
+        coords = np.vstack(
+            [coords] + [[position] for name, position
+                        in model["pos_dict"].items()
+                        if name not in node_index])
+    minx, miny = np.min(coords, axis=0)
+    maxx, maxy = np.max(coords, axis=0)
     w = maxx - minx
     h = maxy - miny
     padx, pady = 0.05 * w, 0.05 * h
@@ -269,6 +270,7 @@ def draw_discrete_links(
     ax.autoscale_view()
 
 
+@profiled
 def plot_discrete_nodes(
         self,
         ax=None,
@@ -316,7 +318,7 @@ def plot_discrete_nodes(
         - leak_discharg_coeff
         - quality
 
-    value : integer, string
+    value : integer, string, tuple
         For time-varying parameters only. Specifies which timestep or data
         summary will be plotted.
 
@@ -329,6 +331,15 @@ def plot_discrete_nodes(
             'mean'              Plots mean for each element
             'stddev'            Plots standard deviation for each element
             'range'             Plots range for each element
+            'p95'               Plots the given percentile (here the 95th)
+                                for each element
+            ('above', x)        Plots the number of timesteps each
+                                element is above x, given in the units
+                                of the simulation results
+            ('below', x)        Plots the number of timesteps each
+                                element is below x
+            ('max', 24, 48)     Plots any of the above over timesteps 24
+                                to 47 only
         ======================= =========================================
 
     unit : string
@@ -377,12 +388,8 @@ def plot_discrete_nodes(
     style : VisWaterNet Style Object
         The style object to be used.
     """
-    model = self.model
     if style is None:
         style = self.default_style
-    args = style.args
-    draw_reservoirs = args['draw_reservoirs']
-    draw_tanks = args['draw_tanks']
     if ax is None:
         if ax is None:
             fig, ax = plt.subplots(figsize=self.figsize)
@@ -400,15 +407,11 @@ def plot_discrete_nodes(
         else:
             parameter_results = value[0]
             node_list = value[1]
-        node_list = [node_list[node_list.index(name)]
-                     for name in node_list
-                     if ((name not in model["reservoir_names"]
-                          or draw_reservoirs is False)
-                     and (name not in model["tank_names"]
-                          or draw_tanks is False))]
+        node_list = base.data_node_list(self, node_list, style)
         parameter_results = parameter_results.loc[node_list]
         parameter_results = parameter_results.values.tolist()
-        if unit is not None:
+        # Counts of timesteps above or below a threshold have no units
+        if unit is not None and not is_threshold_value(value):
             parameter_results = unit_conversion(
                 parameter_results, parameter, unit)
         interval_results, interval_names = processing.bin_parameter(
@@ -447,6 +450,7 @@ def plot_discrete_nodes(
         save_fig(self, save_name=save_name, style=style)
 
 
+@profiled
 def plot_discrete_links(
         self,
         ax=None,
@@ -494,7 +498,7 @@ def plot_discrete_links(
         - reaction_rate
         - quality
 
-    value : integer, string
+    value : integer, string, tuple
         For time-varying parameters only. Specifies which timestep or data
         summary will be plotted.
 
@@ -507,6 +511,15 @@ def plot_discrete_links(
             'mean'              Plots mean for each element
             'stddev'            Plots standard deviation for each element
             'range'             Plots range for each element
+            'p95'               Plots the given percentile (here the 95th)
+                                for each element
+            ('above', x)        Plots the number of timesteps each
+                                element is above x, given in the units
+                                of the simulation results
+            ('below', x)        Plots the number of timesteps each
+                                element is below x
+            ('max', 24, 48)     Plots any of the above over timesteps 24
+                                to 47 only
         ======================= =========================================
 
     unit : string
@@ -580,19 +593,21 @@ def plot_discrete_links(
         else:
             parameter_results = value[0]
             link_list = value[1]
-        link_list = [link_list[link_list.index(name)]
-                     for name in link_list
-                     if ((name not in model["pump_names"]
-                          or pump_element == 'node'
-                          or draw_pumps is False
-                          or include_pumps is False)
-                     and (name not in model["valve_names"]
+        pump_names = set(model["pump_names"])
+        valve_names = set(model["valve_names"])
+        link_list = [name for name in link_list
+                     if (name not in pump_names
+                         or pump_element == 'node'
+                         or draw_pumps is False
+                         or include_pumps is False)
+                     and (name not in valve_names
                           or valve_element == 'node'
                           or draw_valves is False
-                          or include_valves is False))]
+                          or include_valves is False)]
         parameter_results = parameter_results.loc[link_list]
         parameter_results = parameter_results.values.tolist()
-        if unit is not None:
+        # Counts of timesteps above or below a threshold have no units
+        if unit is not None and not is_threshold_value(value):
             parameter_results = unit_conversion(
                 parameter_results, parameter, unit)
         interval_results, interval_names = processing.bin_parameter(
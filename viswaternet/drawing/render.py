@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+The viswaternet.drawing.render module contains the low level functions that
+add node and link collections to the figure. Every other drawing function
+goes through render_nodes and render_links.
+
+Two renderers are available and are selected with the renderer argument of
+VisWNModel. The 'networkx' renderer draws through the networkx drawing
+functions. The 'native' renderer builds a single PathCollection for nodes and
+a single LineCollection for links directly from the coordinate arrays stored
+on the model, skipping networkx's per call validation and position lookups.
+Links drawn with arrows always use the networkx renderer, since arrows
+require one FancyArrowPatch per link.
+"""
+import numpy as np
+import networkx.drawing.nx_pylab as nxp
+from matplotlib.collections import LineCollection, PathCollection
+from viswaternet.utils import get_name_index
+from viswaternet.utils.profiling import profiled
+
+RENDERERS = ("networkx", "native")
+
+
+@profiled(elements="node_list")
+def render_nodes(
+        self,
+        ax,
+        node_list,
+        coordinates=None,
+        node_size=300,
+        node_color="#1f78b4",
+        node_shape="o",
+        cmap=None,
+        vmin=None,
+        vmax=None,
+        linewidths=None,
+        edgecolors=None,
+        label=None):
+    """Draws a set of nodes as a single PathCollection and returns it.
+
+    Arguments
+    ---------
+    ax : axes._subplots.AxesSubplot
+        Matplotlib axes object.
+
+    node_list : array-like
+        Names of the nodes to be drawn.
+
+    coordinates : array-like
+        (N, 2) coordinates of the markers. Used for markers that are not
+        located at a node, such as pumps and valves drawn as nodes. By
+        default the coordinates of the nodes in node_list are used.
+
+    The remaining arguments are the same as those of
+    networkx.draw_networkx_nodes.
+    """
+    model = self.model
+    if getattr(self, "renderer", "networkx") == "networkx":
+        if coordinates is None:
+            pos = model["pos_dict"]
+        else:
+            pos = dict(zip(node_list, np.asarray(coordinates).tolist()))
+        return nxp.draw_networkx_nodes(
+            model["G"],
+            pos,
+            ax=ax,
+            nodelist=node_list,
+            node_size=node_size,
+            node_color=node_color,
+            node_shape=node_shape,
+            cmap=cmap,
+            vmin=vmin,
+            vmax=vmax,
+            linewidths=linewidths,
+            edgecolors=edgecolors,
+            label=label)
+    if len(node_list) == 0:
+        return PathCollection(None)
+    if coordinates is None:
+        node_index = get_name_index(model, "node")
+        xy = model["node_coords"][[node_index[name] for name in node_list]]
+    else:
+        xy = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    node_collection = ax.scatter(
+        xy[:, 0],
+        xy[:, 1],
+        s=node_size,
+        c=node_color,
+        marker=node_shape,
+        cmap=cmap,
+        vmin=vmin,
+        vmax=vmax,
+        linewidths=linewidths,
+        edgecolors=edgecolors,
+        label=label)
+    hide_ticks(ax)
+    node_collection.set_zorder(2)
+    return node_collection
+
+
+@profiled(elements="link_list")
+def render_links(
+        self,
+        ax,
+        link_list,
+        edge_color="k",
+        width=1.0,
+        style="solid",
+        arrows=None,
+        edge_cmap=None,
+        edge_vmin=None,
+        edge_vmax=None,
+        node_size=300,
+        label=None):
+    """Draws a set of links as a single LineCollection and returns it.
+
+    If link_list is empty and a label is given, an empty collection is drawn
+    so that the label still shows up in the legend.
+
+    Arguments
+    ---------
+    ax : axes._subplots.AxesSubplot
+        Matplotlib axes object.
+
+    link_list : array-like
+        Names of the links to be drawn.
+
+    The remaining arguments are the same as those of
+    networkx.draw_networkx_edges.
+    """
+    model = self.model
+    link_index = get_name_index(model, "link")
+    indices = [link_index[name] for name in link_list]
+    if getattr(self, "renderer", "networkx") == "networkx" or arrows:
+        if indices:
+            edgelist = [model["pipe_list"][i] for i in indices]
+        elif label is not None:
+            # Zero length link so that the label is added to the legend
+            edgelist = [(model['node_names'][0], model['node_names'][0])]
+        else:
+            edgelist = []
+        return nxp.draw_networkx_edges(
+            model["G"],
+            model["pos_dict"],
+            ax=ax,
+            edgelist=edgelist,
+            edge_color=edge_color,
+            width=width,
+            style=style,
+            arrows=arrows,
+            edge_cmap=edge_cmap,
+            edge_vmin=edge_vmin,
+            edge_vmax=edge_vmax,
+            label=label,
+            node_size=node_size)
+    if not indices and label is None:
+        return []
+    segments = model["link_segments"][indices]
+    values = None
+    if edge_color is None:
+        edge_color = "k"
+    elif not isinstance(edge_color, str):
+        colors = np.asarray(edge_color)
+        # Numeric colors are mapped through the color map
+        if colors.ndim == 1 and colors.dtype.kind in "iuf" \
+                and len(colors) == len(segments):
+            values = colors
+            edge_color = None
+    edge_collection = LineCollection(
+        segments,
+        colors=edge_color,
+        linewidths=width,
+        antialiaseds=(1,),
+        linestyle=style)
+    if values is not None:
+        edge_collection.set_array(values)
+        edge_collection.set_cmap(edge_cmap)
+        edge_collection.set_clim(edge_vmin, edge_vmax)
+    edge_collection.set_zorder(1)
+    edge_collection.set_label(label)
+    ax.add_collection(edge_collection)
+    if indices:
+        minx, miny = np.min(segments, axis=(0, 1))
+        maxx, maxy = np.max(segments, axis=(0, 1))
+        padx, pady = 0.05 * (maxx - minx), 0.05 * (maxy - miny)
+        corners = (minx - padx, miny - pady), (maxx + padx, maxy + pady)
+        ax.update_datalim(corners)
+        ax.autoscale_view()
+    hide_ticks(ax)
+    return edge_collection
+
+
+def copy_collection(collection, ax):
+    """Adds a copy of a node or link collection drawn on another axes to ax
+    and returns it. The data limits of ax are not updated.
+
+    Arguments
+    ---------
+    collection : PathCollection or LineCollection
+        The collection to be copied.
+
+    ax : axes._subplots.AxesSubplot
+        Matplotlib axes object.
+    """
+    if isinstance(collection, LineCollection):
+        # Link paths are plain polylines, so their vertices are their
+        # segments. get_segments is much slower.
+        copy = LineCollection([path.vertices
+                               for path in collection.get_paths()])
+    else:
+        copy = PathCollection(collection.get_paths(),
+                              sizes=collection.get_sizes(),
+                              offsets=collection.get_offsets())
+        copy.set_offset_transform(ax.transData)
+    copy.update_from(collection)
+    # Data coordinates are drawn with the transforms of the new axes, while
+    # markers keep the identity transform they are drawn with
+    if collection.get_transform() is collection.axes.transData:
+        copy.set_transform(ax.transData)
+    copy.set_zorder(collection.get_zorder())
+    ax.add_collection(copy, autolim=False)
+    return copy
+
+
+def hide_ticks(ax):
+    ax.tick_params(
+        axis="both",
+        which="both",
+        bottom=False,
+        left=False,
+        labelbottom=False,
+        labelleft=False)
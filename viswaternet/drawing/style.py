@@ -270,6 +270,11 @@ save_format : string
 dpi : integer
     The DPI of the saved image. A higher DPI will result in images
     with a higher resolution.
+
+save_async : boolean
+    Determines if png and jpg images are encoded and written to file in the
+    background, so that the next figure can be drawn in the meantime. Use
+    VisWNModel.wait_for_saves to wait until they have been written.
 """
 from viswaternet.utils.markers import *
 
@@ -347,7 +352,8 @@ class NetworkStyle:
                 'color_bar_label_font_size': 10,
                 'color_bar_label_font_color': 'k',
                 'save_format': 'png',
-                'dpi': 'figure'}
+                'dpi': 'figure',
+                'save_async': False}
         args.update(kwargs)
         self.args = args
 
@@ -423,7 +429,8 @@ class NetworkStyle:
                 'color_bar_width': 0.03,
                 'color_bar_height': 0.8,
                 'save_format': 'png',
-                'dpi': 'figure'}
+                'dpi': 'figure',
+                'save_async': False}
         args.update(self.args)
         self.args = args
         
\ No newline at end of file
@@ -6,11 +6,14 @@ unique data drawing.
 import matplotlib.pyplot as plt
 import pandas as pd
 from viswaternet.network import processing
-from viswaternet.utils import convert_excel, save_fig, unit_conversion
+from viswaternet.utils import convert_excel, save_fig, unit_conversion, \
+    get_name_index
 from viswaternet.drawing import base
 from viswaternet.drawing import discrete
+from viswaternet.utils.profiling import profiled
 
 
+@profiled
 def plot_unique_data(
         self,
         ax=None,
@@ -199,14 +202,17 @@ def plot_unique_data(
         if parameter_type == 'link' \
                 or parameter == 'diameter' \
                 or parameter == 'roughness':
+            pump_names = set(model["pump_names"])
+            valve_names = set(model["valve_names"])
+            drawn_elements = set(element_list)
             link_list = [name for name in element_list
-                         if ((name not in model["pump_names"]
+                         if ((name not in pump_names
                               or pump_element == 'node'
                               or draw_pumps is False)
-                             and (name not in model["valve_names"]
+                             and (name not in valve_names
                                   or valve_element == 'node'
                                   or draw_valves is False)
-                             and (name not in element_list))]
+                             and (name not in drawn_elements))]
             if not link_list:
                 draw_links = False
         base.draw_legend(
@@ -243,12 +249,13 @@ def plot_unique_data(
     elif parameter == "diameter" or parameter == "roughness":
         parameter_results, link_list = processing.get_parameter(
             self, "link", parameter)
-        link_list = [link_list[link_list.index(name)]
-                     for name in link_list
-                     if ((name not in model["pump_names"]
+        pump_names = set(model["pump_names"])
+        valve_names = set(model["valve_names"])
+        link_list = [name for name in link_list
+                     if ((name not in pump_names
                           or pump_element == 'node'
                           or draw_pumps is False)
-                     and (name not in model["valve_names"]
+                     and (name not in valve_names
                           or valve_element == 'node'
                           or draw_valves is False))]
         parameter_results = parameter_results.loc[link_list]
@@ -262,11 +269,11 @@ def plot_unique_data(
         interval_results = {}
         for interval_name in interval_names:
             interval_results[interval_name] = {}
+        link_index = get_name_index(model, "link")
         for i, link in enumerate(link_list):
             interval_results["{:.{j}f}".format(
                 parameter_results[i],
-                j=legend_decimal_places)][link] = \
-                model["G_pipe_name_list"].index(link)
+                j=legend_decimal_places)][link] = link_index[link]
         # return interval_results,parameter_results,uniques
         discrete.draw_discrete_links(
             self,
@@ -295,14 +302,12 @@ def plot_unique_data(
         interval_results = {}
         for interval_name in interval_names:
             interval_results[interval_name] = {}
+        node_index = get_name_index(model, "node")
         for i, node in enumerate(node_list):
             if parameter_results[i] is None:
-                interval_results["No Tag"][node] = model["node_names"].index(
-                    node)
+                interval_results["No Tag"][node] = node_index[node]
                 continue
-            interval_results[parameter_results[i]][node] = model[
-                "node_names"
-            ].index(node)
+            interval_results[parameter_results[i]][node] = node_index[node]
         discrete.draw_discrete_nodes(
             self,
             ax,
@@ -323,11 +328,11 @@ def plot_unique_data(
             for interval in interval_names:
                 interval_results[interval] = {}
             if parameter_type == 'node':
+                node_index = get_name_index(model, "node")
                 for element, data in zip(
                         custom_data_values[0],
                         custom_data_values[1]):
-                    interval_results[data][element] = \
-                        model["node_names"].index(element)
+                    interval_results[data][element] = node_index[element]
                 discrete.draw_discrete_nodes(
                     self,
                     ax,
@@ -336,11 +341,11 @@ def plot_unique_data(
                     label_list=label_list,
                     style=style)
             elif parameter_type == 'link':
+                link_index = get_name_index(model, "link")
                 for element, data in zip(
                         custom_data_values[0],
                         custom_data_values[1]):
-                    interval_results[data][element] = \
-                        model["G_pipe_name_list"].index(element)
+                    interval_results[data][element] = link_index[element]
                 discrete.draw_discrete_links(
                     self,
                     ax,
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""
+The viswaternet.lazy module contains the code that defers imports until the
+imported names are first used.
+
+The viswaternet, viswaternet.network and viswaternet.drawing packages import
+their modules through lazy_attributes, and the methods of VisWNModel are
+LazyMethods, so importing viswaternet does not import WNTR,
+matplotlib.pyplot or pandas. Loading a snapshot with
+VisWNModel.load_snapshot does not import WNTR or matplotlib.pyplot.
+"""
+import importlib
+
+
+def lazy_attributes(package, attributes):
+    """Returns the __getattr__ and __dir__ functions of a package whose
+    attributes are imported the first time they are accessed.
+
+    Arguments
+    ---------
+    package : string
+        Name of the package.
+
+    attributes : dict
+        The module each attribute is imported from. An attribute named after
+        the module it maps to is the module itself. Other attributes are
+        looked up as submodules of the package.
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name):
+        if name not in attributes:
+            submodule = package + "." + name
+            try:
+                value = importlib.import_module(submodule)
+            except ModuleNotFoundError as error:
+                # Missing dependencies of an existing submodule are raised
+                if error.name != submodule:
+                    raise
+                raise AttributeError("module " + repr(package)
+                                     + " has no attribute "
+                                     + repr(name)) from None
+            namespace[name] = value
+            return value
+        module = importlib.import_module(attributes[name])
+        if module.__name__ == package + "." + name:
+            value = module
+        else:
+            value = getattr(module, name)
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(attributes))
+
+    return __getattr__, __dir__
+
+
+class LazyMethod:
+    """Method defined in another module, which is imported the first time
+    the method is accessed. The function then replaces the LazyMethod on the
+    class it was defined on.
+
+    Arguments
+    ---------
+    module : string
+        Name of the module the function is defined in.
+
+    wrapper : callable
+        Applied to the function before it is set on the class, such as
+        classmethod.
+    """
+
+    def __init__(self, module, wrapper=None):
+        self.module = module
+        self.wrapper = wrapper
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        function = getattr(importlib.import_module(self.module), self.name)
+        if self.wrapper is not None:
+            function = self.wrapper(function)
+        setattr(self.owner, self.name, function)
+        return function.__get__(instance, owner)
@@ -1,2 +1,10 @@
-from .initialize import VisWNModel
-from .processing import bin_parameter, get_parameter, get_demand_patterns
\ No newline at end of file
+from viswaternet.lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "VisWNModel": "viswaternet.network.initialize",
+    "bin_parameter": "viswaternet.network.processing",
+    "get_parameter": "viswaternet.network.processing",
+    "get_demand_patterns": "viswaternet.network.processing",
+    "run_ensemble": "viswaternet.network.ensemble",
+    "synthetic_network": "viswaternet.network.synthetic",
+    "synthetic_results": "viswaternet.network.synthetic"})
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+"""
+The viswaternet.network.binary_results module contains the code that reads
+simulation results directly from the EPANET binary output file.
+
+With results_backend='binary', VisWNModel keeps the output file written by
+the EPANET simulator on disk instead of reading all of it into pandas
+DataFrames. The results of each timestep are mapped into memory with
+numpy.memmap, so only the parts of the file that are indexed are read, and
+extended-period simulations of large networks do not have to fit in memory.
+
+BinaryResults has the node and link dictionaries of WNTR SimulationResults,
+with the same keys. Each entry is a BinaryFrame, which has the index,
+columns and iloc of a DataFrame. Values are converted to SI units the same
+way WNTR converts them, when they are read.
+
+Example
+-------
+>>>import viswaternet as vis
+>>>model = vis.VisWNModel(r'Networks/CTown.inp', results_backend='binary')
+>>>frame = model.model['results'].node['pressure']
+>>>frame.iloc[10, :5]
+"""
+import os
+import shutil
+import tempfile
+import warnings
+import weakref
+import numpy as np
+import pandas as pd
+import wntr
+from wntr.epanet.util import EN, FlowUnits, HydParam, MassUnits, QualParam, \
+    QualType, StatisticsType, to_si
+
+RESULTS_BACKENDS = ("memory", "binary")
+
+# Length of the element IDs in the output file, in bytes
+ID_LENGTH = 32
+
+# Position of each result in the node and link blocks of a timestep, in the
+# order WNTR stores them
+NODE_RESULTS = {"demand": 0, "head": 1, "pressure": 2, "quality": 3}
+LINK_RESULTS = {"quality": 3, "flowrate": 0, "velocity": 1, "headloss": 2,
+                "status": 4, "setting": 5, "friction_factor": 7,
+                "reaction_rate": 6}
+
+# Results whose columns WNTR does not name
+UNNAMED_COLUMNS = ("headloss", "status", "setting")
+
+
+class BinaryArray:
+    """Read-only 2D array of a result in an EPANET output file, with a row
+    per timestep and a column per element. Indexing it reads the selected
+    values from the file and returns them as a numpy array in SI units.
+    Slicing rows only returns another BinaryArray, so a window of timesteps
+    can be taken without reading it.
+    """
+
+    def __init__(self, raw, convert, columns=None):
+        self._raw = raw
+        self._convert = convert
+        if columns is None:
+            columns = np.arange(raw.shape[1])
+        self._columns = columns
+
+    @property
+    def shape(self):
+        return self._raw.shape
+
+    @property
+    def dtype(self):
+        return self._raw.dtype
+
+    @property
+    def ndim(self):
+        return 2
+
+    def __len__(self):
+        return self._raw.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return BinaryArray(self._raw[key], self._convert, self._columns)
+        if not isinstance(key, tuple):
+            key = (key,)
+        rows = key[0]
+        columns = key[1] if len(key) > 1 else slice(None)
+        if is_scalar_key(columns):
+            # Converters take the elements on the last axis
+            values = np.array(self._raw[rows, columns])[..., np.newaxis]
+            values = self._convert(values, self._columns[[columns]])
+            return values[..., 0][()]
+        values = np.array(self._raw[rows, columns])
+        return self._convert(values, self._columns[columns])
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:, :]
+        if dtype is not None:
+            values = values.astype(dtype, copy=False)
+        return values
+
+
+class BinaryFrame:
+    """Result of every element at every timestep, read from an EPANET output
+    file. Has the index, columns and iloc of the DataFrame WNTR would return
+    for the result, but to_numpy returns a BinaryArray that reads the file
+    when it is indexed."""
+
+    def __init__(self, array, index, columns):
+        self._array = array
+        self.index = index
+        self.columns = columns
+
+    @property
+    def shape(self):
+        return self._array.shape
+
+    @property
+    def iloc(self):
+        return BinaryIndexer(self)
+
+    @property
+    def values(self):
+        return np.asarray(self._array)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, name):
+        return self.iloc[:, self.columns.get_loc(name)]
+
+    def to_numpy(self):
+        return self._array
+
+    def to_frame(self):
+        """Reads the whole result into a DataFrame."""
+        return pd.DataFrame(self.values, index=self.index,
+                            columns=self.columns)
+
+
+class BinaryIndexer:
+    """Integer location indexer of a BinaryFrame. Returns a scalar, Series
+    or DataFrame like DataFrame.iloc."""
+
+    def __init__(self, frame):
+        self._frame = frame
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        rows, columns = key
+        frame = self._frame
+        if np.ndim(rows) == 1 and np.ndim(columns) == 1:
+            values = frame._array[np.ix_(rows, columns)]
+        else:
+            values = frame._array[rows, columns]
+        if is_scalar_key(rows) and is_scalar_key(columns):
+            return values
+        if is_scalar_key(rows):
+            return pd.Series(values, index=frame.columns[columns],
+                             name=frame.index[rows])
+        if is_scalar_key(columns):
+            return pd.Series(values, index=frame.index[rows],
+                             name=frame.columns[columns])
+        return pd.DataFrame(values, index=frame.index[rows],
+                            columns=frame.columns[columns])
+
+
+def is_scalar_key(key):
+    """Returns True if key selects a single row or column."""
+    return not isinstance(key, slice) and np.ndim(key) == 0
+
+
+class BinaryResults:
+    """Simulation results read from an EPANET binary output file.
+
+    Arguments
+    ---------
+    path : string
+        Path of the output file.
+
+    darcy_weisbach : boolean
+        Set to True if the network uses the Darcy-Weisbach headloss formula,
+        so that pipe roughness settings are converted accordingly.
+
+    convert_status : boolean
+        Converts the EPANET link status codes to the WNTR status values, as
+        WNTR does by default.
+
+    convergence_error : boolean
+        If True, an exception is raised if the output file is incomplete
+        because the simulation did not converge. Otherwise the timesteps
+        that were written are used and a warning is issued.
+    """
+
+    def __init__(self, path, darcy_weisbach=False, convert_status=True,
+                 convergence_error=False):
+        self.path = path
+        self.darcy_weisbach = darcy_weisbach
+        self.convert_status = convert_status
+        with open(path, "rb") as f:
+            prolog = np.frombuffer(f.read(4 * 15), dtype=np.int32)
+            nodes, tanks, links, pumps = (int(prolog[2]), int(prolog[3]),
+                                          int(prolog[4]), int(prolog[5]))
+            self.quality_type = QualType(prolog[7])
+            self.flow_units = FlowUnits(prolog[9])
+            statistics = StatisticsType(prolog[11])
+            report_start, report_step, duration = prolog[12:15]
+            # Skips the title, the input and report file names and the name
+            # of the chemical
+            f.seek(240 + 260 + 260 + ID_LENGTH, os.SEEK_CUR)
+            quality_units = f.read(ID_LENGTH).decode(errors="ignore")
+            mass = quality_units.replace("\x00", "").split("/", 1)[0]
+            self.mass_units = MassUnits[mass] if mass in ("mg", "ug") \
+                else MassUnits.mg
+            node_names = [f.read(ID_LENGTH).decode().replace("\x00", "")
+                          for _ in range(nodes)]
+            link_names = [f.read(ID_LENGTH).decode().replace("\x00", "")
+                          for _ in range(links)]
+            f.seek(2 * 4 * links, os.SEEK_CUR)
+            self.link_types = np.frombuffer(f.read(4 * links),
+                                            dtype=np.int32)
+            # Tank indices and areas, node elevations, link lengths and
+            # diameters, the energy use of each pump and the peak energy
+            offset = (f.tell() + 4 * (2 * tanks + nodes + 2 * links)
+                      + 4 * 7 * pumps + 4)
+        # Report times are computed the same way as in WNTR
+        times = np.arange(report_start,
+                          duration + report_step - (duration % report_step),
+                          report_step)
+        if statistics in (StatisticsType.Maximum, StatisticsType.Minimum,
+                          StatisticsType.Range):
+            times = np.array([report_start + report_step])
+        width = 4 * nodes + 8 * links
+        written = (os.path.getsize(path) - offset) // (4 * width)
+        periods = min(len(times), written)
+        self.error_code = None
+        if periods < len(times):
+            message = ("Simulation did not converge at time "
+                       + str(times[periods]) + " s.")
+            if convergence_error:
+                raise RuntimeError(message)
+            warnings.warn(message)
+            self.error_code = wntr.sim.results.ResultsStatus.error
+            times = times[:periods]
+        self.data = np.memmap(path, dtype=np.float32, mode="r",
+                              offset=offset, shape=(periods, width))
+        self.network_name = path
+        index = pd.Index(times)
+        names = {"node": pd.Index(node_names, dtype=object, name="name"),
+                 "link": pd.Index(link_names, dtype=object, name="name")}
+        self.node = {}
+        self.link = {}
+        for element_type, results, start, count in (
+                ("node", NODE_RESULTS, 0, nodes),
+                ("link", LINK_RESULTS, 4 * nodes, links)):
+            frames = getattr(self, element_type)
+            for attribute, position in results.items():
+                first = start + position * count
+                array = BinaryArray(
+                    self.data[:, first:first + count],
+                    self.converter(element_type, attribute))
+                columns = names[element_type]
+                if attribute in UNNAMED_COLUMNS:
+                    columns = columns.rename(None)
+                frames[attribute] = BinaryFrame(array, index, columns)
+
+    def converter(self, element_type, attribute):
+        """Returns the function that converts values of a result to SI units.
+        It takes the values, whose last axis holds the elements, and the
+        position of each of those elements."""
+        flow_units = self.flow_units
+        if attribute == "quality":
+            if self.quality_type is QualType.Chem:
+                parameter = QualParam.Concentration
+            elif self.quality_type is QualType.Age:
+                parameter = QualParam.WaterAge
+            else:
+                return lambda values, columns: values
+            return lambda values, columns: parameter._to_si(
+                flow_units, values, mass_units=self.mass_units)
+        if attribute == "reaction_rate":
+            return lambda values, columns: QualParam.ReactionRate._to_si(
+                flow_units, values, self.mass_units)
+        if attribute == "friction_factor":
+            return lambda values, columns: values
+        if attribute == "status":
+            return self.convert_link_status
+        if attribute in ("headloss", "setting"):
+            return lambda values, columns: self.convert_by_link_type(
+                attribute, values, columns)
+        parameter = {"demand": HydParam.Demand,
+                     "head": HydParam.HydraulicHead,
+                     "pressure": HydParam.Pressure,
+                     "flowrate": HydParam.Flow,
+                     "velocity": HydParam.Velocity}[attribute]
+        return lambda values, columns: parameter._to_si(flow_units, values)
+
+    def convert_link_status(self, values, columns):
+        """Converts EPANET link status codes to WNTR status values."""
+        if self.convert_status:
+            status = values.copy()
+            status[values <= 2] = 0
+            status[values == 3] = 1
+            status[values >= 5] = 1
+            status[values == 4] = 2
+            return status
+        return values
+
+    def convert_by_link_type(self, attribute, values, columns):
+        """Converts headloss or setting values, whose units depend on the
+        type of each link."""
+        link_types = self.link_types[columns]
+        values = values.copy()
+        if attribute == "headloss":
+            groups = [(link_types < 2, HydParam.HeadLoss),
+                      (link_types >= 2, HydParam.Length)]
+        else:
+            # Pump settings are relative speeds and have no units
+            groups = [(link_types == EN.PIPE, HydParam.RoughnessCoeff),
+                      (link_types == EN.PRV, HydParam.Pressure),
+                      (link_types == EN.PSV, HydParam.Pressure),
+                      (link_types == EN.PBV, HydParam.Pressure),
+                      (link_types == EN.FCV, HydParam.Flow)]
+        for mask, parameter in groups:
+            if mask.any():
+                values[..., mask] = to_si(self.flow_units, values[..., mask],
+                                          parameter,
+                                          darcy_weisbach=self.darcy_weisbach)
+        return values
+
+
+class BinaryResultsReader(wntr.epanet.io.BinFile):
+    """Reader passed to the WNTR EpanetSimulator that returns BinaryResults
+    instead of reading the output file into memory. If path is set, the
+    output file is moved there before it is read."""
+
+    def __init__(self, path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def read(self, filename, convergence_error=False, darcy_weisbach=False,
+             convert=True):
+        if self.path is not None:
+            os.replace(filename, self.path)
+            filename = self.path
+        return BinaryResults(filename, darcy_weisbach=darcy_weisbach,
+                             convert_status=self.convert_status,
+                             convergence_error=convergence_error)
+
+
+def run_sim(sim, path=None):
+    """Runs an EpanetSimulator created with a BinaryResultsReader in a
+    temporary directory and returns its BinaryResults.
+
+    The output file is moved to path if given. Otherwise it is left in the
+    temporary directory, which is removed once the results are no longer
+    used.
+    """
+    directory = tempfile.mkdtemp(prefix="viswaternet-")
+    sim.reader.path = path
+    try:
+        results = sim.run_sim(file_prefix=os.path.join(directory, "temp"))
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    if path is None:
+        # Views of the memory map keep it alive, so the directory is only
+        # removed once none of them are left
+        weakref.finalize(results.data, shutil.rmtree, directory, True)
+    else:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
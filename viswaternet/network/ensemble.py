@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+"""
+The viswaternet.network.ensemble module contains the code that simulates
+scenarios of a network and summarizes their results across the scenarios.
+
+run_ensemble simulates each scenario of a VisWNModel object's network, with
+a pool of processes if workers is given, and reduces the results of each
+scenario to one value per element with a summary such as the minimum
+pressure. No VisWNModel object is built for the scenarios, so the geometry
+and name indices of the model are shared by the whole ensemble.
+
+The reduced results are stored in the model as the parameter 'ensemble_'
+followed by the name of the result, such as 'ensemble_pressure', with a row
+per scenario. They are plotted like a time-dependent parameter whose
+timesteps are the scenarios:
+
+- 'mean', 'stddev', 'min', 'max', 'range' and percentiles such as 'p95'
+  summarize each element over the scenarios.
+- ('above', threshold) and ('below', threshold) give the fraction of
+  scenarios in which the element is strictly above or below threshold, the
+  probability of exceedance.
+- An integer gives the values of a single scenario.
+
+Example
+-------
+>>>import viswaternet as vis
+>>>model = vis.VisWNModel(r'Networks/CTown.inp')
+>>>scenarios = [{'demand_multiplier': m} for m in (0.8, 0.9, 1.0, 1.1, 1.2)]
+>>>model.run_ensemble(scenarios, parameters=['pressure'], value='min',
+...                   workers=4)
+>>>model.plot_continuous_nodes(parameter='ensemble_pressure',
+...                            value=('below', 20))
+"""
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+import numpy as np
+import pandas as pd
+from viswaternet.network.processing import SIMULATION_PARAMETERS
+from viswaternet.network.summary_cache import is_summary_value, \
+    get_summary_statistic
+from viswaternet.utils.profiling import profiled
+
+# Prefix of the names of ensemble parameters
+ENSEMBLE_PREFIX = "ensemble_"
+
+# Keys of a scenario dictionary
+SCENARIO_MODIFICATIONS = ("demand_multiplier", "base_demand", "roughness")
+
+
+@profiled(elements="scenarios")
+def run_ensemble(
+        self,
+        scenarios,
+        parameters=("pressure",),
+        value="max",
+        workers=None):
+    """Simulates scenarios of the network and stores the results of each
+    scenario, reduced to one value per element, as ensemble parameters.
+
+    Arguments
+    ---------
+    scenarios : list, dict
+        The modifications of the network made in each scenario. A scenario
+        is either a dictionary with any of the following keys, or a function
+        that takes the WNTR WaterNetworkModel of the scenario and modifies
+        it. Functions have to be defined at the top level of a module if
+        workers is given. If scenarios is a dictionary, its keys name the
+        scenarios.
+
+        ===================== ==========================================
+            demand_multiplier   Multiplier applied to all demands
+            base_demand         Dictionary of junction names and their
+                                base demand
+            roughness           Dictionary of pipe names and their
+                                roughness coefficient
+        ===================== ==========================================
+
+    parameters : list
+        Time-dependent parameters stored for each scenario, such as
+        'pressure' or 'flowrate'. Parameters with both node and link
+        results, such as 'quality', refer to the nodes. ('link', 'quality')
+        refers to the links.
+
+    value : integer, string, tuple
+        Reduces the results of each scenario to one value per element. Takes
+        the summaries and timesteps accepted by get_parameter, such as 'max'
+        or 'p95'.
+
+    workers : integer
+        The number of processes that run the simulations. By default they
+        are run one after another by the current process.
+
+    Returns the names of the ensemble parameters, such as
+    ['ensemble_pressure'].
+    """
+    model = self.model
+    if isinstance(scenarios, dict):
+        index = pd.Index(list(scenarios))
+        scenarios = list(scenarios.values())
+    else:
+        scenarios = list(scenarios)
+        index = pd.RangeIndex(len(scenarios))
+    if not scenarios:
+        raise Exception("An ensemble needs at least one scenario.")
+    if value is None or isinstance(value, (list, bool)):
+        raise Exception("Invalid value!")
+    requests = []
+    for parameter in parameters:
+        if isinstance(parameter, tuple):
+            parameter_type, parameter = parameter
+        elif parameter in SIMULATION_PARAMETERS["node"]:
+            parameter_type = "node"
+        else:
+            parameter_type = "link"
+        if parameter not in SIMULATION_PARAMETERS[parameter_type]:
+            raise Exception(str(parameter) + " is not a time-dependent "
+                            + parameter_type + " parameter.")
+        requests.append((parameter_type, parameter))
+    # Models loaded from a snapshot do not have the WNTR network model
+    if "wn" not in model:
+        raise Exception("Ensembles are not available without the network "
+                        "model.")
+    network = pickle.dumps(model["wn"])
+    if workers is None or workers <= 1:
+        runner = ScenarioRunner(network, requests, value)
+        try:
+            summaries = [runner.run(scenario) for scenario in scenarios]
+        finally:
+            runner.close()
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=init_worker,
+                                 initargs=(network, requests,
+                                           value)) as executor:
+            summaries = list(executor.map(run_worker_scenario, scenarios))
+    ensemble = model.setdefault("ensemble_parameters",
+                                {"node": {}, "link": {}})
+    names = []
+    for i, (parameter_type, parameter) in enumerate(requests):
+        name = ENSEMBLE_PREFIX + parameter
+        columns = model["node_names"] if parameter_type == "node" \
+            else model["G_pipe_name_list"]
+        ensemble[parameter_type][name] = pd.DataFrame(
+            np.vstack([summary[i] for summary in summaries]),
+            index=index, columns=columns)
+        names.append(name)
+    return names
+
+
+class ScenarioRunner:
+    """Simulates scenarios of a pickled WNTR WaterNetworkModel in a
+    temporary directory and reduces their results."""
+
+    def __init__(self, network, requests, value):
+        self.network = network
+        self.wn = pickle.loads(network)
+        self.requests = requests
+        self.value = value
+        self.directory = tempfile.mkdtemp(prefix="viswaternet-")
+
+    def run(self, scenario):
+        """Simulates a scenario and returns the reduced results of each
+        requested parameter."""
+        import wntr
+        if callable(scenario):
+            # Changes made by a function can not be undone, so it modifies
+            # a copy of the network
+            wn = pickle.loads(self.network)
+            scenario(wn)
+            undo = None
+        else:
+            wn = self.wn
+            undo = apply_scenario(wn, scenario)
+        try:
+            results = wntr.sim.EpanetSimulator(wn).run_sim(
+                file_prefix=os.path.join(self.directory, "scenario"))
+        finally:
+            if undo is not None:
+                apply_scenario(wn, undo)
+        return [reduce_results(results, parameter_type, parameter,
+                               self.value)
+                for parameter_type, parameter in self.requests]
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def apply_scenario(wn, scenario):
+    """Applies the modifications of a scenario dictionary to a WNTR
+    WaterNetworkModel. Returns the scenario that undoes them."""
+    undo = {}
+    for key, modification in scenario.items():
+        if key == "demand_multiplier":
+            undo[key] = wn.options.hydraulic.demand_multiplier
+            wn.options.hydraulic.demand_multiplier = modification
+        elif key == "base_demand":
+            undo[key] = {}
+            for name, base_demand in modification.items():
+                demand = wn.get_node(name).demand_timeseries_list[0]
+                undo[key][name] = demand.base_value
+                demand.base_value = base_demand
+        elif key == "roughness":
+            undo[key] = {}
+            for name, roughness in modification.items():
+                pipe = wn.get_link(name)
+                undo[key][name] = pipe.roughness
+                pipe.roughness = roughness
+        else:
+            raise Exception("Invalid scenario modification " + str(key)
+                            + ". Choose from "
+                            + ", ".join(SCENARIO_MODIFICATIONS) + ".")
+    return undo
+
+
+def reduce_results(results, parameter_type, parameter, value):
+    """Reduces the results of a parameter to one value per element, in the
+    same order as the result columns."""
+    if is_summary_value(value):
+        return get_summary_statistic({"results": results}, parameter_type,
+                                     parameter, value)
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        frame = getattr(results, parameter_type)[parameter]
+        return frame.to_numpy()[value]
+    raise Exception("Invalid value!")
+
+
+# State of a run_ensemble worker process, set by init_worker
+_worker = {}
+
+
+def init_worker(network, requests, value):
+    """Initializes a worker process of run_ensemble with the pickled network
+    and the results to be kept."""
+    runner = ScenarioRunner(network, requests, value)
+    # Worker processes do not run atexit functions, but run multiprocessing
+    # finalizers with an exit priority when they exit
+    Finalize(runner, runner.close, exitpriority=0)
+    _worker["runner"] = runner
+
+
+def run_worker_scenario(scenario):
+    """Simulates a scenario in a worker process."""
+    return _worker["runner"].run(scenario)
@@ -21,12 +21,185 @@ figsize : tuple
 
 axis_frame : boolean
     Determines if a frame is drawn around the generated plot.
+
+lazy_simulation : boolean
+    If True, the hydraulic simulation is not run when the model is created.
+    Instead it is run the first time simulation results are needed, for
+    instance when a time-dependent parameter such as pressure is requested.
+    Layout-only plots and plots of static attributes such as elevation or
+    diameter never run the simulation.
+
+cache_dir : string
+    Directory used to cache simulation results between runs. If given,
+    results are loaded from the cache instead of running the simulation
+    when the network and simulator options have not changed. By default no
+    cache is used.
+
+cache_size : integer
+    Maximum size of the cache directory in bytes. The least recently used
+    entries are removed when the cache grows past this size.
+
+results : WNTR SimulationResults Object
+    Simulation results of the network, such as the results of a previous
+    run or the results generated by viswaternet.network.synthetic_results.
+    If given, the simulation is not run.
+
+renderer : string
+    Determines how nodes and links are drawn. 'networkx' draws through the
+    networkx drawing functions. 'native' draws each group of nodes or links
+    as a single matplotlib collection built from the model's coordinate
+    arrays, which is considerably faster for large networks. Links drawn
+    with arrows always use networkx.
+
+results_backend : string
+    Determines how simulation results are kept. 'memory' reads them into
+    pandas DataFrames with WNTR. 'binary' keeps the EPANET binary output
+    file on disk and reads only the timesteps and elements that are used,
+    so the results of long simulations of large networks do not have to
+    fit in memory. See viswaternet.network.binary_results. With cache_dir,
+    the output file is kept in the cache.
+
+result_attributes : list
+    Simulation results to keep, such as ['pressure', 'flowrate',
+    'quality']. Each name applies to the node and link results that have
+    it. The results of other attributes are dropped once the simulation has
+    run, and the kept ones are stored as contiguous float32 arrays, which
+    reduces the memory held by the model. Parameters that were dropped can
+    not be plotted. By default all results are kept.
 """
 import os
-import wntr
+import copy
 import numpy as np
+import pandas as pd
 from packaging.version import parse
 from viswaternet.drawing.style import NetworkStyle as style
+from viswaternet.network.processing import SIMULATION_PARAMETERS
+from viswaternet.lazy import LazyMethod
+
+
+def run_simulation(model):
+    """Runs the EPANET simulation of model["wn"] and stores the simulator and
+    its results in the model dictionary. If a result cache is configured,
+    cached results are used instead of running the simulation when
+    available."""
+    import wntr
+    from viswaternet.network import result_cache, binary_results
+    binary = model.get("results_backend") == "binary"
+    if binary:
+        sim = wntr.sim.EpanetSimulator(
+            model["wn"], reader=binary_results.BinaryResultsReader())
+    else:
+        sim = wntr.sim.EpanetSimulator(model["wn"])
+    model["sim"] = sim
+    cache_dir = model.get("cache_dir")
+    if cache_dir is not None:
+        if binary:
+            results = result_cache.load_binary_results(
+                cache_dir, model["cache_key"],
+                darcy_weisbach=(
+                    model["wn"].options.hydraulic.headloss == "D-W"))
+        else:
+            results = result_cache.load_results(cache_dir,
+                                                model["cache_key"])
+        if results is not None:
+            model["results"] = keep_results(results,
+                                            model.get("result_attributes"))
+            return
+    if binary:
+        path = None
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            path = result_cache.binary_path(cache_dir, model["cache_key"])
+
+        def run():
+            return binary_results.run_sim(sim, path=path)
+    else:
+        run = sim.run_sim
+    profiler = model.get("profiler")
+    if profiler is None:
+        results = run()
+    else:
+        with profiler.stage("run_sim"):
+            results = run()
+    if cache_dir is not None:
+        if binary:
+            result_cache.evict(cache_dir, model["cache_size"], keep=path)
+        else:
+            result_cache.store_results(cache_dir, model["cache_key"],
+                                       results, max_size=model["cache_size"])
+    model["results"] = keep_results(results, model.get("result_attributes"))
+
+
+def keep_results(results, attributes):
+    """Returns a copy of simulation results with only the given attributes,
+    each stored as a C-contiguous float32 array with the names of the
+    elements as columns and the report times as index. Results are returned
+    unchanged if attributes is None. Results that are not held in memory,
+    such as those of the binary results backend, are only dropped."""
+    if attributes is None:
+        return results
+    kept = copy.copy(results)
+    for element_type in ("node", "link"):
+        frames = {}
+        for attribute, frame in getattr(results, element_type).items():
+            if attribute not in attributes:
+                continue
+            if isinstance(frame, pd.DataFrame):
+                frame = pd.DataFrame(
+                    np.ascontiguousarray(frame.to_numpy(), dtype=np.float32),
+                    index=frame.index, columns=frame.columns, copy=False)
+            frames[attribute] = frame
+        setattr(kept, element_type, frames)
+    return kept
+
+
+def build_arrays(model):
+    """Builds the name indices and geometry arrays of a model dictionary
+    from its name lists, pipe_list and pos_dict."""
+    pipe_list = model["pipe_list"]
+    G_pipe_name_list = np.array(model["G_pipe_name_list"])
+    G_list_pumps_only_mask = np.isin(np.array(G_pipe_name_list),
+                                     np.array(model["pump_names"]))
+    G_list_valves_only_mask = np.isin(np.array(G_pipe_name_list),
+                                      np.array(model["valve_names"]))
+    G_list_pumps_only = np.array(pipe_list)[G_list_pumps_only_mask]
+    G_list_valves_only = np.array(pipe_list)[G_list_valves_only_mask]
+    # Name to index dictionaries for constant time lookups of an element's
+    # position in node_names and G_pipe_name_list, and the inverse index to
+    # name arrays
+    model["node_index"] = {name: i for i, name
+                           in enumerate(model["node_names"])}
+    model["link_index"] = {name: i for i, name
+                           in enumerate(model["G_pipe_name_list"])}
+    model["node_name_array"] = np.array(model["node_names"], dtype=object)
+    model["link_name_array"] = np.array(model["G_pipe_name_list"],
+                                        dtype=object)
+    # Array-backed geometry: (N, 2) node coordinates, (E, 2) start and end
+    # node indices of each link, and (E, 2, 2) link segments
+    pos_dict = model["pos_dict"]
+    node_coords = np.array(
+        [pos_dict[name] for name in model["node_names"]],
+        dtype=np.float64).reshape(-1, 2)
+    node_index = model["node_index"]
+    link_endpoints = np.array([(node_index[start], node_index[end])
+                               for start, end in pipe_list],
+                              dtype=np.int32).reshape(-1, 2)
+    model["node_coords"] = node_coords
+    model["link_endpoints"] = link_endpoints
+    model["link_segments"] = node_coords[link_endpoints]
+    model["G_list_pumps_only"] = G_list_pumps_only.tolist()
+    model["G_list_valves_only"] = G_list_valves_only.tolist()
+
+
+class DeferredModel(dict):
+    """Model dictionary that runs the hydraulic simulation the first time
+    model["sim"] or model["results"] is accessed."""
+
+    def __missing__(self, key):
+        if key in ("sim", "results"):
+            run_simulation(self)
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
 
 
 class VisWNModel:
@@ -34,8 +207,38 @@ class VisWNModel:
                  inp_file=None,
                  network_model=None,
                  figsize=(12, 12),
-                 axis_frame=False):
-        model = {}
+                 axis_frame=False,
+                 lazy_simulation=False,
+                 cache_dir=None,
+                 cache_size=2**30,
+                 results=None,
+                 renderer="networkx",
+                 results_backend="memory",
+                 result_attributes=None):
+        # WNTR is only imported when a model is built from a network, so
+        # that loading a snapshot does not import it
+        import wntr
+        from viswaternet.network import result_cache, binary_results
+        from viswaternet.drawing.render import RENDERERS
+        if renderer not in RENDERERS:
+            raise Exception("Invalid renderer. Choose from "
+                            + ", ".join(RENDERERS) + ".")
+        if results_backend not in binary_results.RESULTS_BACKENDS:
+            raise Exception("Invalid results backend. Choose from "
+                            + ", ".join(binary_results.RESULTS_BACKENDS)
+                            + ".")
+        model = DeferredModel()
+        model["results_backend"] = results_backend
+        if result_attributes is not None:
+            result_attributes = tuple(result_attributes)
+            available = set(SIMULATION_PARAMETERS["node"]) \
+                | set(SIMULATION_PARAMETERS["link"])
+            for attribute in result_attributes:
+                if attribute not in available:
+                    raise Exception("Invalid result attribute "
+                                    + str(attribute) + ". Choose from "
+                                    + ", ".join(sorted(available)) + ".")
+            model["result_attributes"] = result_attributes
         dirname = os.getcwd()
 
         if network_model is not None:
@@ -50,12 +253,21 @@ class VisWNModel:
         image_path = os.getcwd()
         model["image_path"] = image_path
 
-        # Run hydraulic simulation and store results
+        # Run hydraulic simulation and store results. In lazy mode the
+        # simulation is deferred until results are first requested.
         model["wn"] = wn
-        sim = wntr.sim.EpanetSimulator(wn)
-        model["sim"] = sim
-        results = sim.run_sim()
-        model["results"] = results
+        if cache_dir is not None:
+            model["cache_dir"] = os.path.join(dirname, cache_dir)
+            model["cache_size"] = cache_size
+            if network_model is None:
+                model["cache_key"] = result_cache.results_key(
+                    wn, inp_file=inp_file)
+            else:
+                model["cache_key"] = result_cache.results_key(wn)
+        if results is not None:
+            model["results"] = keep_results(results, result_attributes)
+        elif not lazy_simulation:
+            run_simulation(model)
         # =====================================================================
         #   Create name lists for easy reference
         #   junc_names excludes resevoirs and tanks
@@ -88,29 +300,50 @@ class VisWNModel:
             pos_dict[name] = node.coordinates
         model["pos_dict"] = pos_dict
 
-        G_pipe_name_list = np.array(wn.link_name_list)
-        G_list_pumps_only_mask = np.isin(np.array(G_pipe_name_list),
-                                         np.array(pump_names))
-        G_list_valves_only_mask = np.isin(np.array(G_pipe_name_list),
-                                          np.array(valve_names))
-        G_list_pumps_only = np.array(pipe_list)[G_list_pumps_only_mask]
-        G_list_valves_only = np.array(pipe_list)[G_list_valves_only_mask]
-        model["G_pipe_name_list"] = G_pipe_name_list.tolist()
-        model["G_list_pumps_only"] = G_list_pumps_only.tolist()
-        model["G_list_valves_only"] = G_list_valves_only.tolist()
+        model["G_pipe_name_list"] = wn.link_name_list
+        # Element type of each node ('Junction', 'Tank', 'Reservoir') and link
+        # ('Pipe', 'Pump', 'Valve'), in the same order as the name lists
+        model["node_types"] = np.array(
+            [wn.get_node(name).node_type for name in model["node_names"]],
+            dtype=object)
+        model["link_types"] = np.array(
+            [wn.get_link(name).link_type
+             for name in model["G_pipe_name_list"]],
+            dtype=object)
+        model["report_timestep"] = wn.options.time.report_timestep
+        model["duration"] = wn.options.time.duration
+        build_arrays(model)
 
         self.model = model
         self.figsize = figsize
         self.axis_frame = axis_frame
+        self.renderer = renderer
         self.default_style = style()
-    from viswaternet.network.processing import get_parameter, bin_parameter
-    from viswaternet.drawing.base import draw_nodes, draw_links, \
-        draw_base_elements, plot_basic_elements, draw_label, draw_legend, \
-        draw_color_bar
-    from viswaternet.drawing.discrete import draw_discrete_nodes, \
-        draw_discrete_links, plot_discrete_nodes, plot_discrete_links
-    from viswaternet.drawing.continuous import plot_continuous_links, \
-        plot_continuous_nodes
-    from viswaternet.drawing.animate import animate_plot
-    from viswaternet.drawing.unique import plot_unique_data
-    from viswaternet.utils.convert_excel import convert_excel
+    # Methods defined in other modules, which are imported the first time
+    # one of their methods is used
+    get_parameter = LazyMethod("viswaternet.network.processing")
+    bin_parameter = LazyMethod("viswaternet.network.processing")
+    draw_nodes = LazyMethod("viswaternet.drawing.base")
+    draw_links = LazyMethod("viswaternet.drawing.base")
+    draw_base_elements = LazyMethod("viswaternet.drawing.base")
+    plot_basic_elements = LazyMethod("viswaternet.drawing.base")
+    draw_label = LazyMethod("viswaternet.drawing.base")
+    draw_legend = LazyMethod("viswaternet.drawing.base")
+    draw_color_bar = LazyMethod("viswaternet.drawing.base")
+    draw_discrete_nodes = LazyMethod("viswaternet.drawing.discrete")
+    draw_discrete_links = LazyMethod("viswaternet.drawing.discrete")
+    plot_discrete_nodes = LazyMethod("viswaternet.drawing.discrete")
+    plot_discrete_links = LazyMethod("viswaternet.drawing.discrete")
+    plot_continuous_links = LazyMethod("viswaternet.drawing.continuous")
+    plot_continuous_nodes = LazyMethod("viswaternet.drawing.continuous")
+    animate_plot = LazyMethod("viswaternet.drawing.animate")
+    plot_batch = LazyMethod("viswaternet.drawing.batch")
+    plot_unique_data = LazyMethod("viswaternet.drawing.unique")
+    convert_excel = LazyMethod("viswaternet.utils.convert_excel")
+    profile = LazyMethod("viswaternet.utils.profiling")
+    save_fig = LazyMethod("viswaternet.utils.save_fig")
+    wait_for_saves = LazyMethod("viswaternet.utils.save_fig")
+    run_ensemble = LazyMethod("viswaternet.network.ensemble")
+    save_snapshot = LazyMethod("viswaternet.network.snapshot")
+    load_snapshot = LazyMethod("viswaternet.network.snapshot",
+                               wrapper=classmethod)
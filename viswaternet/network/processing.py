@@ -6,8 +6,36 @@ data from the EPANET simulation. It also handles the binning of parameters
 for discrete plotting.
 """
 import numpy as np
+import pandas as pd
+from viswaternet.utils import get_name_index
+from viswaternet.network.summary_cache import is_summary_value, \
+    is_threshold_value, parse_summary_value, get_summary_statistic
+from viswaternet.utils.profiling import profiled
 
+# Time-dependent parameters produced by the hydraulic and water quality
+# simulation. Used to decide whether a parameter needs simulation results
+# before the simulation has been run.
+SIMULATION_PARAMETERS = {
+    "node": ("demand", "head", "pressure", "quality", "leak_demand",
+             "leak_area", "leak_discharge_coeff"),
+    "link": ("flowrate", "velocity", "headloss", "status", "setting",
+             "friction_factor", "reaction_rate", "quality")}
 
+
+def is_simulation_parameter(model, parameter_type, parameter):
+    """Returns True if parameter is taken from the simulation results rather
+    than from the network model attributes.
+
+    If the simulation has not been run yet (see the lazy_simulation argument
+    of VisWNModel), the check is made against SIMULATION_PARAMETERS so that
+    static attributes can be retrieved without running the simulation.
+    """
+    if "results" not in model:
+        return parameter in SIMULATION_PARAMETERS[parameter_type]
+    return parameter in getattr(model["results"], parameter_type)
+
+
+@profiled(elements="return")
 def get_parameter(
         self,
         parameter_type,
@@ -43,7 +71,7 @@ def get_parameter(
         - leak_discharg_coeff
         - quality
 
-    value : integer, string
+    value : integer, string, tuple
         For time-varying parameters only. Specifies which timestep or data
         summary will be plotted.
 
@@ -56,8 +84,21 @@ def get_parameter(
             'mean'              Plots mean for each element
             'stddev'            Plots standard deviation for each element
             'range'             Plots range for each element
+            'p95'               Plots the given percentile (here the 95th)
+                                for each element
+            ('above', x)        Plots the number of timesteps each
+                                element is above x, given in the units
+                                of the simulation results
+            ('below', x)        Plots the number of timesteps each
+                                element is below x
+            ('max', 24, 48)     Plots any of the above over timesteps 24
+                                to 47 only
         ======================= =========================================
 
+        For ensemble parameters (see run_ensemble), the timesteps are the
+        scenarios, and ('above', x) and ('below', x) give the fraction of
+        scenarios in which each element is above or below x.
+
     element_list : array-like
         List of network elements that data will be retrieved for.
 
@@ -71,163 +112,95 @@ def get_parameter(
         Determines if data for draw_valves are retrieved.
     """
     model = self.model
-    results = model["results"]
     if parameter_type == "node":
-        # If no element list is provided, set element list to all nodes of
-        # the model
-        if element_list is None:
-            element_list = list.copy(model["node_names"])
-        # Get indices of nodes in model["node_names"]
-        indices = [model["node_names"].index(i) for i in element_list]
-        # WNTR differentiates between node attributes and simulation results.
-        # To account for this all simulation result logic is put into a try
-        # block and if a KeyError occurs, it goes into the except block to
-        # get the node attribute instead.
-        try:
-            # If no value type is given (timestep, max, etc) then return
-            # parameter at all timesteps
-            if value is None:
-                parameter_results = results.node[parameter].iloc[:, indices]
-            else:
-                if value == "max":
-                    parameter_results = np.max(
-                        results.node[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "min":
-                    parameter_results = np.min(
-                        results.node[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "mean":
-                    parameter_results = np.mean(
-                        results.node[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "stddev":
-                    parameter_results = np.std(
-                        results.node[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "range":
-                    parameter_results = np.ptp(
-                        results.node[parameter].iloc[:, indices],
-                        axis=0)
-                # If an int is given, assume it is a timestep and get parameter
-                # at given timestep
-                elif isinstance(value, int):
-                    parameter_results = (
-                        results.node[parameter].iloc[value, indices])
-        # Node attribute fetching logic
-        except KeyError:
-            parameter_results = model["wn"].query_node_attribute(parameter)
-            elements_in_results = list(parameter_results.index)
-            element_list_temp = list.copy(element_list)
-            # Some elements do not have certain attributes. For instance,
-            # reservoirs do not have an elevation. This code removes those
-            # elements from the results
-            for element in element_list_temp:
-                try:
-                    if elements_in_results.index(element):
-                        pass
-                except ValueError:
-                    element_list.remove(element)
-            indices = [elements_in_results.index(i) for i in element_list]
-            parameter_results = parameter_results.iloc[indices]
-        if include_tanks:
-            pass
-        else:
-            for tank in model["tank_names"]:
-                # Try block to catch KeyErrors in instance where tank does
-                # not exist in parameter_results
-                try:
-                    parameter_results.drop(tank, inplace=True)
-                    element_list.remove(tank)
-                except KeyError:
-                    pass
-        if include_reservoirs:
-            pass
-        else:
-            for reservoir in model["reservoir_names"]:
-                # Try block to catch KeyErrors in instance where reservoir
-                # does not exist in parameter_results
-                try:
-                    parameter_results.drop(reservoir, inplace=True)
-                    element_list.remove(reservoir)
-                except KeyError:
-                    pass
+        names = model["node_names"]
+        excluded_types = [element_type for element_type, include
+                          in (("Tank", include_tanks),
+                              ("Reservoir", include_reservoirs))
+                          if not include]
     elif parameter_type == "link":
-        # If no element list is provided, set element list to all links of
-        # the model
-        if element_list is None:
-            element_list = list.copy(model["G_pipe_name_list"])
-        indices = [model["G_pipe_name_list"].index(i) for i in element_list]
-        # WNTR differentiates between link attributes and simulation results.
-        # To account for this all simulation result logic is put into a try
-        # block and if a KeyError occurs, it goes into the except block to
-        # get the link attribute instead.
-        try:
-            if value is None:
-                parameter_results = results.link[parameter].iloc[:, indices]
-            else:
-                if value == "max":
-                    parameter_results = np.max(
-                        results.link[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "min":
-                    parameter_results = np.min(
-                        results.link[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "mean":
-                    parameter_results = np.mean(
-                        results.link[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "stddev":
-                    parameter_results = np.std(
-                        results.link[parameter].iloc[:, indices],
-                        axis=0)
-                elif value == "range":
-                    parameter_results = np.ptp(
-                        results.link[parameter].iloc[:, indices],
-                        axis=0)
-                elif type(value) is int:
-                    parameter_results = (
-                        results.link[parameter].iloc[value, indices])
-        # Link attribute fetching logic
-        except KeyError:
-            parameter_results = model["wn"].query_link_attribute(parameter)
-            elements_in_results = list(parameter_results.index)
-            element_list_temp = list.copy(element_list)
-            # Some elements do not have certain attributes. For instance,
-            # reservoirs do not have an elevation. This code removes those
-            # elements from the results
-            for element in element_list_temp:
-                try:
-                    if elements_in_results.index(element):
-                        pass
-                except ValueError:
-                    element_list.remove(element)
-            indices = [elements_in_results.index(i) for i in element_list]
-            parameter_results = parameter_results.iloc[indices]
-        if include_pumps:
-            pass
+        names = model["G_pipe_name_list"]
+        excluded_types = [element_type for element_type, include
+                          in (("Pump", include_pumps),
+                              ("Valve", include_valves))
+                          if not include]
+    # If no element list is provided, set element list to all elements of
+    # the model
+    if element_list is None:
+        element_list = names
+    name_index = get_name_index(model, parameter_type)
+    name_array = model[parameter_type + "_name_array"]
+    element_types = model[parameter_type + "_types"]
+    # Indices of the elements in the model name lists
+    indices = np.fromiter((name_index[name] for name in element_list),
+                          dtype=np.intp, count=len(element_list))
+    # Results that were dropped with the result_attributes argument of
+    # VisWNModel can not be retrieved
+    result_attributes = model.get("result_attributes")
+    if result_attributes is not None \
+            and parameter in SIMULATION_PARAMETERS[parameter_type] \
+            and parameter not in result_attributes:
+        raise Exception("The " + parameter + " results were not kept. Add "
+                        "it to the result_attributes of the model.")
+    # WNTR differentiates between element attributes and simulation results.
+    # Simulation results are only accessed for time-dependent parameters so
+    # that a lazily simulated model is not simulated for static ones.
+    # Ensemble parameters have a row per scenario instead of per timestep
+    ensemble = model.get("ensemble_parameters", {}).get(parameter_type, {})
+    if parameter in ensemble \
+            or is_simulation_parameter(model, parameter_type, parameter):
+        if parameter in ensemble:
+            frame = ensemble[parameter]
+        else:
+            frame = getattr(model["results"], parameter_type)[parameter]
+        # If no value type is given (timestep, max, etc) then return
+        # parameter at all timesteps for every element in element_list
+        if value is None:
+            return frame.iloc[:, indices], name_array[indices].tolist()
+        # Result columns are in the same order as the model name lists, so
+        # the indices select the result columns directly
+        indices = indices[~np.isin(element_types[indices], excluded_types)]
+        # Summary statistics are computed for all elements at once and
+        # cached, see viswaternet.network.summary_cache
+        if is_summary_value(value):
+            statistic = get_summary_statistic(model, parameter_type,
+                                              parameter, value, frame=frame)
+            # Scenario counts of ensembles are given as probabilities
+            if parameter in ensemble and is_threshold_value(value):
+                window = parse_summary_value(value)[2] or (None, None)
+                scenarios = len(range(len(frame))[slice(*window)])
+                statistic = statistic / scenarios
+            parameter_results = pd.Series(statistic[indices],
+                                          index=frame.columns[indices])
+        # If an int is given, assume it is a timestep and get parameter
+        # at given timestep
+        elif isinstance(value, (int, np.integer)) \
+                and not isinstance(value, bool):
+            parameter_results = pd.Series(frame.to_numpy()[value, indices],
+                                          index=frame.columns[indices],
+                                          name=frame.index[value])
         else:
-            for pump in model["pump_names"]:
-                # Try block to catch KeyErrors in instance where pump does
-                # not exist in parameter_results
-                try:
-                    parameter_results.drop(pump, inplace=True)
-                    element_list.remove(pump)
-                except KeyError:
-                    pass
-        if include_valves:
-            pass
+            raise Exception('Invalid value!')
+    # Attribute fetching logic
+    else:
+        # Models loaded from a snapshot do not have the WNTR network model
+        if "wn" not in model:
+            raise Exception("The " + parameter + " attribute is not "
+                            "available without the network model.")
+        if parameter_type == "node":
+            attribute = model["wn"].query_node_attribute(parameter)
         else:
-            for valve in model["valve_names"]:
-                # Try block to catch KeyErrors in instance where valve
-                # does not exist in parameter_results
-                try:
-                    parameter_results.drop(valve, inplace=True)
-                    element_list.remove(valve)
-                except KeyError:
-                    pass
-    return parameter_results, element_list
+            attribute = model["wn"].query_link_attribute(parameter)
+        # Some elements do not have certain attributes. For instance,
+        # reservoirs do not have an elevation. Those elements are removed
+        # along with the excluded element types.
+        positions = pd.Index(attribute.index).get_indexer(
+            name_array[indices])
+        keep = (positions >= 0) \
+            & ~np.isin(element_types[indices], excluded_types)
+        indices = indices[keep]
+        parameter_results = attribute.iloc[positions[keep]]
+    return parameter_results, name_array[indices].tolist()
 
 
 def get_demand_patterns(self):
@@ -251,20 +224,20 @@ def get_demand_patterns(self):
             demand_pattern = (
                 model["wn"].get_node(
                     junction).demand_timeseries_list[0].pattern.name)
-            demand_patterns = np.append(demand_patterns, demand_pattern)
+            demand_patterns.append(demand_pattern)
         except AttributeError:
-            demand_patterns = np.append(demand_patterns, "None")
+            demand_patterns.append("None")
 
     # Initialize pattern dictionary
     demand_pattern_nodes = {}
     for pattern in patterns:
         demand_pattern_nodes[pattern] = {}
     # Create pattern dictionary in the same form as what get_parameter outputs
+    node_index = get_name_index(model, "node")
     for i, junc_name in enumerate(model["junc_names"]):
-        for pattern in patterns:
-            if demand_patterns[i] == pattern:
-                demand_pattern_nodes[pattern][junc_name] = \
-                    model["junc_names"].index(junc_name)
+        if demand_patterns[i] in demand_pattern_nodes:
+            demand_pattern_nodes[demand_patterns[i]][junc_name] = \
+                node_index[junc_name]
 
     # Remove None key if no junctions are in it
     if len(demand_pattern_nodes['None']) == 0:
@@ -273,6 +246,7 @@ def get_demand_patterns(self):
     return demand_pattern_nodes, patterns
 
 
+@profiled(elements="element_list")
 def bin_parameter(
         self,
         parameter_results,
@@ -316,87 +290,58 @@ def bin_parameter(
     # spaced bins. There are currently no options to automatically create
     # bins other than linearlly spaced ones, use custom bin intervals to do
     # this
-    if intervals == "automatic":
+    parameter_results = np.asarray(parameter_results, dtype=np.float64)
+    # Elements without a value (NaN) are not placed in any interval
+    has_value = ~np.isnan(parameter_results)
+    if isinstance(intervals, str) and intervals == "automatic":
         bins = num_intervals + 1
         intervals = np.linspace(
-            np.min(parameter_results), np.max(parameter_results), bins)
+            np.nanmin(parameter_results), np.nanmax(parameter_results), bins)
         intervals = intervals.tolist()
-    interval_results = {}
-    interval_names = []
-    elements_with_parameter = element_list
-    element_type = None
-    for element_with_parameter in elements_with_parameter:
-        if (element_with_parameter in model["node_names"]) is True:
-            continue
-        else:
-            element_list = model["G_pipe_name_list"]
+    edges = np.asarray(intervals, dtype=np.float64)
+    element_type = "node"
+    node_index = get_name_index(model, "node")
+    for element in element_list:
+        if element not in node_index:
             element_type = "link"
             break
-    if element_type != "link":
-        element_list = model["node_names"]
-    for i in range(len(intervals)):
-        if i == 0:
-            if np.min(parameter_results) < intervals[i]:
-                interval_names.append("< {0:1.{j}f}".format(
-                    intervals[i],
-                    j=legend_decimal_places))
-            interval_names.append("{0:1.{j}f} - {1:1.{j}f}".format(
-                intervals[i], intervals[i + 1],
-                j=legend_decimal_places))
-        elif i < len(intervals) - 1:
-            interval_names.append("{0:1.{j}f} - {1:1.{j}f}".format(
-                intervals[i], intervals[i + 1],
-                j=legend_decimal_places))
-        elif i == len(intervals) - 1:
-            if np.max(parameter_results) > intervals[i]:
-                interval_names.append("> {0:1.{j}f}".format(
-                    intervals[i],
-                    j=legend_decimal_places))
-    for bin_name in interval_names:
-        interval_results[bin_name] = {}
-    for i in range(len(intervals)):
-        if i == 0:
-            for j, parameter in enumerate(parameter_results):
-                if parameter >= intervals[i] and parameter < intervals[i + 1]:
-
-                    interval_results["{0:1.{j}f} - {1:1.{j}f}".format(
-                        intervals[i],
-                        intervals[i + 1],
-                        j=legend_decimal_places)][elements_with_parameter[j]] \
-                        = element_list.index(elements_with_parameter[j])
-                if parameter < intervals[i]:
-                    interval_results["< {0:1.{j}f}".format(
-                        intervals[i],
-                        j=legend_decimal_places)][elements_with_parameter[j]] \
-                        = element_list.index(elements_with_parameter[j])
-        elif i == len(intervals) - 2:
-            for j, parameter in enumerate(parameter_results):
-                if parameter >= intervals[i] and parameter <= intervals[i + 1]:
-                    interval_results["{0:1.{j}f} - {1:1.{j}f}".format(
-                        intervals[i],
-                        intervals[i + 1],
-                        j=legend_decimal_places)][elements_with_parameter[j]] \
-                        = element_list.index(elements_with_parameter[j])
-        elif i < len(intervals) - 2:
-            for j, parameter in enumerate(parameter_results):
-                if parameter >= intervals[i] and parameter < intervals[i + 1]:
-                    interval_results["{0:1.{j}f} - {1:1.{j}f}".format(
-                        intervals[i],
-                        intervals[i + 1],
-                        j=legend_decimal_places)][elements_with_parameter[j]] \
-                        = element_list.index(elements_with_parameter[j])
-        elif i == len(intervals) - 1:
-            for j, parameter in enumerate(parameter_results):
-                if parameter > intervals[i]:
-                    interval_results["> {0:1.{j}f}".format(
-                        intervals[i],
-                        j=legend_decimal_places)][elements_with_parameter[j]] \
-                        = element_list.index(elements_with_parameter[j])
-    if disable_interval_deleting is True:
-        pass
-    else:
-        for bin_name in interval_names:
-            if not interval_results[bin_name]:
-                del interval_names[interval_names.index(bin_name)]
-                del interval_results[bin_name]
+    element_index = get_name_index(model, element_type)
+    # Integer bin code of every element. Bin i holds values from edges[i]
+    # up to but not including edges[i + 1], except for the last bin, which
+    # includes its upper edge. Code -1 holds values below the first edge and
+    # code len(edges) - 1 values above the last edge.
+    codes = np.searchsorted(edges, parameter_results, side="right") - 1
+    codes[parameter_results == edges[-1]] = len(edges) - 2
+    bin_names = ["{0:1.{j}f} - {1:1.{j}f}".format(
+        edges[i], edges[i + 1], j=legend_decimal_places)
+        for i in range(len(edges) - 1)]
+    bin_names.append("> {0:1.{j}f}".format(
+        edges[-1], j=legend_decimal_places))
+    bin_names.append("< {0:1.{j}f}".format(
+        edges[0], j=legend_decimal_places))
+    # The below and above intervals are only added if there are values
+    # outside of the edges
+    interval_names = bin_names[:-2]
+    if np.any(codes[has_value] == -1):
+        interval_names.insert(0, bin_names[-1])
+    if np.any(codes[has_value] == len(edges) - 1):
+        interval_names.append(bin_names[-2])
+    interval_results = {bin_name: {} for bin_name in interval_names}
+    # Group the elements by bin code, keeping the order of element_list
+    # within each interval
+    order = np.argsort(codes, kind="stable")
+    order = order[has_value[order]]
+    sorted_codes = codes[order]
+    boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+    for group in np.split(order, boundaries):
+        if len(group) == 0:
+            continue
+        interval = interval_results[bin_names[codes[group[0]]]]
+        for j in group.tolist():
+            interval[element_list[j]] = element_index[element_list[j]]
+    if disable_interval_deleting is not True:
+        interval_names = [bin_name for bin_name in interval_names
+                          if interval_results[bin_name]]
+        interval_results = {bin_name: interval_results[bin_name]
+                            for bin_name in interval_names}
     return interval_results, interval_names
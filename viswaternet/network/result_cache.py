@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+The viswaternet.network.result_cache module contains the code that stores
+simulation results on disk so that a network that has not changed does not
+have to be simulated again.
+
+Cached results are keyed on a hash of the network contents plus the simulator
+options, and are stored as uncompressed .npz files containing the node and
+link result frames. With the binary results backend, the EPANET output
+file itself is cached as a .bin file instead, see
+viswaternet.network.binary_results. When the total size of the cache
+directory grows past the size limit, the least recently used entries are
+removed.
+"""
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+import wntr
+from viswaternet.network.binary_results import BinaryResults
+
+# Bump when the layout of the cache files changes so old entries are ignored
+CACHE_VERSION = 1
+
+
+def results_key(wn, inp_file=None):
+    """Returns the cache key for the simulation results of a network.
+
+    Arguments
+    ---------
+    wn : WNTR WaterNetworkModel Object
+        The network to be simulated.
+
+    inp_file : string
+        Path of the EPANET input file the network was read from. If given,
+        the key is computed from the file contents. Otherwise it is computed
+        from the network model itself.
+    """
+    sha = hashlib.sha256()
+    if inp_file is not None:
+        with open(inp_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+    else:
+        sha.update(json.dumps(wntr.network.to_dict(wn), sort_keys=True,
+                              default=str).encode())
+    options = {"cache_version": CACHE_VERSION,
+               "simulator": "EpanetSimulator",
+               "epanet_version": 2.2,
+               "wntr_version": str(wntr.__version__)}
+    sha.update(json.dumps(options, sort_keys=True).encode())
+    return sha.hexdigest()
+
+
+def load_results(cache_dir, key):
+    """Loads cached simulation results. Returns None if there is no entry
+    for key."""
+    path = os.path.join(cache_dir, key + ".npz")
+    try:
+        data = np.load(path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    with data:
+        times = data["times"]
+        names = {"node": data["node_names"].tolist(),
+                 "link": data["link_names"].tolist()}
+        frames = {"node": {}, "link": {}}
+        for entry in data.files:
+            element_type, _, attribute = entry.partition(".")
+            if element_type in frames and attribute:
+                frames[element_type][attribute] = pd.DataFrame(
+                    data[entry], index=times, columns=names[element_type])
+        network_name = str(data["network_name"])
+    # Mark entry as recently used for eviction
+    os.utime(path)
+    results = wntr.sim.SimulationResults()
+    results.network_name = network_name
+    results.node = frames["node"]
+    results.link = frames["link"]
+    return results
+
+
+def binary_path(cache_dir, key):
+    """Returns the path of the cached EPANET output file for key."""
+    return os.path.join(cache_dir, key + ".bin")
+
+
+def load_binary_results(cache_dir, key, darcy_weisbach=False):
+    """Loads a cached EPANET output file as BinaryResults. Returns None if
+    there is no entry for key. darcy_weisbach is True if the network uses
+    the Darcy-Weisbach headloss formula."""
+    path = binary_path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    os.utime(path)
+    return BinaryResults(path, darcy_weisbach=darcy_weisbach)
+
+
+def store_results(cache_dir, key, results, max_size=None):
+    """Writes simulation results to the cache and evicts the least recently
+    used entries if the cache is larger than max_size bytes."""
+    os.makedirs(cache_dir, exist_ok=True)
+    arrays = {}
+    times = []
+    for element_type in ("node", "link"):
+        names = []
+        frames = getattr(results, element_type)
+        for attribute, frame in frames.items():
+            arrays[element_type + "." + attribute] = frame.to_numpy()
+            names = frame.columns
+            times = frame.index
+        arrays[element_type + "_names"] = np.array(names, dtype=str)
+    arrays["times"] = np.asarray(times)
+    arrays["network_name"] = np.array(str(results.network_name))
+    # Write to a temporary file first so that a partially written entry is
+    # never picked up by another process
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(f, **arrays)
+    path = os.path.join(cache_dir, key + ".npz")
+    os.replace(tmp_path, path)
+    if max_size is not None:
+        evict(cache_dir, max_size, keep=path)
+
+
+def evict(cache_dir, max_size, keep=None):
+    """Removes the least recently used cache entries until the cache is no
+    larger than max_size bytes."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith((".npz", ".bin")) and entry.path != keep:
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    if keep is not None:
+        total += os.path.getsize(keep)
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+The viswaternet.network.snapshot module contains the code that saves a
+VisWNModel object to a file and loads it again without the EPANET input
+file.
+
+A snapshot holds what is needed to draw the network: the name lists, the
+type of each element, the node coordinates, the start and end node of each
+link, the simulation results and the default style of the model. It is
+stored as an uncompressed .npz file, so it is loaded without parsing the
+input file with WNTR, running the simulation or unpickling any objects.
+
+A model loaded from a snapshot can draw any plot of the saved results, but
+static attributes such as elevation or diameter, which are read from the
+WNTR network model, are not available.
+
+Example
+-------
+>>>import viswaternet as vis
+>>>model = vis.VisWNModel(r'Networks/CTown.inp')
+>>>model.save_snapshot('CTown.npz', result_attributes=['pressure'])
+>>>model = vis.VisWNModel.load_snapshot('CTown.npz')
+>>>model.plot_continuous_nodes(parameter='pressure', value='max')
+"""
+import os
+import json
+import networkx as nx
+import numpy as np
+import pandas as pd
+from matplotlib.path import Path
+from viswaternet.drawing.style import NetworkStyle
+
+# Bump when the layout of snapshot files changes. Snapshots of other
+# versions are not loaded.
+SNAPSHOT_VERSION = 1
+
+# Name lists of the model dictionary stored in a snapshot
+NAME_LISTS = ("node_names", "G_pipe_name_list", "junc_names", "tank_names",
+              "reservoir_names", "pump_names", "valve_names")
+
+
+def encode_style_value(value):
+    """Returns a style argument in a form that JSON keeps. Tuples, such as
+    node_size=(100, 400), are tagged so that they are not loaded as lists."""
+    if isinstance(value, tuple):
+        return {"tuple": [encode_style_value(item) for item in value]}
+    if isinstance(value, list):
+        return [encode_style_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode_style_value(item) for key, item in value.items()}
+    return value
+
+
+def decode_style_value(value):
+    """Rebuilds the tuples of a style argument stored by
+    encode_style_value. Used as the object_hook of json.loads."""
+    if list(value) == ["tuple"]:
+        return tuple(value["tuple"])
+    return value
+
+
+class SnapshotResults:
+    """Simulation results of a model loaded from a snapshot, with the node
+    and link dictionaries of DataFrames of WNTR SimulationResults."""
+
+    def __init__(self, network_name=None):
+        self.network_name = network_name
+        self.node = {}
+        self.link = {}
+
+
+def save_snapshot(self, path, result_attributes=None):
+    """Saves the model to a snapshot file that can be loaded with
+    VisWNModel.load_snapshot. The simulation is run first if it has not
+    been run yet.
+
+    Arguments
+    ---------
+    path : string
+        Path of the snapshot file. '.npz' is appended if path does not end
+        with it.
+
+    result_attributes : list
+        Simulation results to save, such as ['pressure', 'flowrate'].
+        By default all results of the model are saved.
+    """
+    model = self.model
+    arrays = {}
+    for name in NAME_LISTS:
+        arrays[name] = np.array(model[name], dtype=str)
+    arrays["node_types"] = np.array(model["node_types"], dtype=str)
+    arrays["link_types"] = np.array(model["link_types"], dtype=str)
+    arrays["node_coords"] = model["node_coords"]
+    arrays["link_endpoints"] = model["link_endpoints"]
+    results = model["results"]
+    times = []
+    for element_type in ("node", "link"):
+        for attribute, frame in getattr(results, element_type).items():
+            if result_attributes is not None \
+                    and attribute not in result_attributes:
+                continue
+            arrays["results." + element_type + "." + attribute] = \
+                np.asarray(frame.to_numpy())
+            times = frame.index
+    arrays["times"] = np.asarray(times)
+    style = {}
+    defaults = NetworkStyle().args
+    for name, value in self.default_style.args.items():
+        if name in defaults and value is defaults[name]:
+            continue
+        # Markers are stored as arrays, other arguments as JSON
+        if isinstance(value, Path):
+            arrays["style." + name + ".vertices"] = value.vertices
+            arrays["style." + name + ".codes"] = np.asarray(
+                value.codes if value.codes is not None else [],
+                dtype=np.uint8)
+            continue
+        value = encode_style_value(value)
+        try:
+            json.dumps(value)
+        except TypeError:
+            raise Exception("The style argument " + name + " can not be "
+                            "saved to a snapshot.")
+        style[name] = value
+    info = {"version": SNAPSHOT_VERSION,
+            "figsize": list(self.figsize),
+            "axis_frame": self.axis_frame,
+            "renderer": self.renderer,
+            "inp_file": model.get("inp_file"),
+            "report_timestep": model["report_timestep"],
+            "duration": model["duration"],
+            "network_name": str(getattr(results, "network_name", "")),
+            "style": style}
+    arrays["info"] = np.array(json.dumps(info))
+    np.savez(path, **arrays)
+
+
+def load_snapshot(cls, path):
+    """Loads a VisWNModel object from a snapshot file written by
+    save_snapshot.
+
+    Arguments
+    ---------
+    path : string
+        Path of the snapshot file.
+    """
+    # Imported here, as initialize binds the functions of this module
+    from viswaternet.network.initialize import DeferredModel, build_arrays
+    with np.load(path, allow_pickle=False) as data:
+        info = json.loads(str(data["info"]),
+                          object_hook=decode_style_value)
+        if info.get("version") != SNAPSHOT_VERSION:
+            raise Exception("Snapshot version " + str(info.get("version"))
+                            + " is not supported. Save the snapshot again "
+                            "with this version of VisWaterNet.")
+        model = DeferredModel()
+        for name in NAME_LISTS:
+            model[name] = data[name].tolist()
+        model["node_types"] = data["node_types"].astype(object)
+        model["link_types"] = data["link_types"].astype(object)
+        node_coords = data["node_coords"]
+        link_endpoints = data["link_endpoints"]
+        results = SnapshotResults(info["network_name"])
+        times = pd.Index(data["times"])
+        columns = {"node": pd.Index(model["node_names"], dtype=object),
+                   "link": pd.Index(model["G_pipe_name_list"],
+                                    dtype=object)}
+        markers = {}
+        for entry in data.files:
+            kind, _, name = entry.partition(".")
+            if kind == "results":
+                element_type, _, attribute = name.partition(".")
+                getattr(results, element_type)[attribute] = pd.DataFrame(
+                    data[entry], index=times, columns=columns[element_type],
+                    copy=False)
+            elif kind == "style":
+                name, _, part = name.rpartition(".")
+                markers.setdefault(name, {})[part] = data[entry]
+    node_names = model["node_names"]
+    model["pipe_list"] = [(node_names[start], node_names[end])
+                          for start, end in link_endpoints.tolist()]
+    model["pos_dict"] = dict(zip(node_names, map(tuple,
+                                                 node_coords.tolist())))
+    G = nx.MultiDiGraph()
+    G.add_nodes_from(node_names)
+    G.add_edges_from(
+        (start, end, name)
+        for (start, end), name in zip(model["pipe_list"],
+                                      model["G_pipe_name_list"]))
+    model["G"] = G
+    build_arrays(model)
+    model["results"] = results
+    # Only the saved results can be plotted
+    model["result_attributes"] = tuple(set(results.node) | set(results.link))
+    model["results_backend"] = "memory"
+    model["report_timestep"] = info["report_timestep"]
+    model["duration"] = info["duration"]
+    if info["inp_file"] is not None:
+        model["inp_file"] = info["inp_file"]
+    model["image_path"] = os.getcwd()
+    loaded = object.__new__(cls)
+    loaded.model = model
+    loaded.figsize = tuple(info["figsize"])
+    loaded.axis_frame = info["axis_frame"]
+    loaded.renderer = info["renderer"]
+    style = dict(info["style"])
+    for name, marker in markers.items():
+        codes = marker["codes"]
+        style[name] = Path(marker["vertices"],
+                           codes if len(codes) else None)
+    loaded.default_style = NetworkStyle(**style)
+    return loaded
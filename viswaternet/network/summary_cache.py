@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""
+The viswaternet.network.summary_cache module contains the code that computes
+and stores summary statistics of time-dependent parameters, such as the
+maximum pressure at each node over all timesteps.
+
+Summaries are requested with the value argument of get_parameter:
+
+- 'min', 'max', 'mean', 'stddev' or 'range' over all timesteps.
+- A percentile over all timesteps, such as 'p95' or 'p99.9'.
+- ('above', threshold) or ('below', threshold), the number of timesteps at
+  which the parameter is strictly above or below threshold. The threshold
+  is given in the units of the simulation results (SI).
+- Any of the above restricted to a window of timesteps by appending the
+  first timestep and the timestep after the last one, for example
+  ('max', 24, 48) or ('above', 20, 0, 24).
+
+Windows are taken as views of the result array, and the statistics are
+computed in chunks, so no copy of the result frame is made. With the
+binary results backend, only one chunk of the output file is read at a time.
+
+The statistics of a parameter are computed for every element at once and
+kept in a per-model cache keyed on (parameter_type, parameter, statistic),
+so plotting the same summary again only selects the requested elements. The
+cache holds at most SUMMARY_CACHE_SIZE entries and drops the least recently
+used ones first. An entry is recomputed when the result frame it was
+computed from is replaced, for instance after the simulation is run again.
+"""
+import warnings
+from collections import OrderedDict
+import numpy as np
+
+# Statistics computed together in a single pass over the result array
+SUMMARY_STATISTICS = ("min", "max", "mean", "stddev", "range")
+
+# Maximum number of cached statistics per model
+SUMMARY_CACHE_SIZE = 64
+
+# Statistics that count timesteps rather than summarize the parameter values
+THRESHOLD_STATISTICS = ("above", "below")
+
+# Approximate number of values read per chunk when computing statistics
+CHUNK_SIZE = 2**20
+
+
+def parse_summary_value(value):
+    """Splits a summary value into its statistic, the argument of the
+    statistic (percentile or threshold) and the timestep window. Returns
+    None if value is not a summary value."""
+    if isinstance(value, tuple) and len(value) > 0:
+        statistic, arguments = value[0], value[1:]
+    else:
+        statistic, arguments = value, ()
+    if not isinstance(statistic, str):
+        return None
+    argument = None
+    if statistic in THRESHOLD_STATISTICS:
+        if len(arguments) == 0:
+            return None
+        argument, arguments = arguments[0], arguments[1:]
+    elif statistic[:1] == "p" and statistic not in SUMMARY_STATISTICS:
+        try:
+            argument = float(statistic[1:])
+        except ValueError:
+            return None
+        if not 0 <= argument <= 100:
+            return None
+        statistic = "percentile"
+    elif statistic not in SUMMARY_STATISTICS:
+        return None
+    if len(arguments) == 0:
+        window = None
+    elif len(arguments) == 2:
+        window = tuple(arguments)
+    else:
+        return None
+    return statistic, argument, window
+
+
+def is_summary_value(value):
+    """Returns True if value requests a summary of a time-dependent
+    parameter rather than a single timestep."""
+    return parse_summary_value(value) is not None
+
+
+def is_threshold_value(value):
+    """Returns True if value requests a count of timesteps above or below a
+    threshold. Such results do not have the units of the parameter."""
+    parsed = parse_summary_value(value)
+    return parsed is not None and parsed[0] in THRESHOLD_STATISTICS
+
+
+def compute_summary_statistics(data):
+    """Computes the minimum, maximum, mean, standard deviation and range of
+    each column of a 2D array in a single pass over its rows.
+
+    Means and standard deviations are accumulated in double precision and
+    shifted by the first row to avoid loss of precision for parameters with
+    a large mean and small variation, such as head. NaN values are skipped,
+    as pandas skips them, and a column of only NaN values gives NaN. All
+    statistics are returned with the dtype of data.
+    """
+    timesteps, elements = data.shape
+    first = data[0]
+    shift = np.nan_to_num(first.astype(np.float64))
+    minimum = first.copy()
+    maximum = first.copy()
+    total = np.zeros(elements, dtype=np.float64)
+    total_squared = np.zeros(elements, dtype=np.float64)
+    counts = np.zeros(elements, dtype=np.int64)
+    chunk_rows = max(1, CHUNK_SIZE // max(elements, 1))
+    for start in range(0, timesteps, chunk_rows):
+        chunk = np.asarray(data[start:start + chunk_rows])
+        # fmin and fmax ignore NaN unless both values are NaN
+        np.fmin(minimum, np.fmin.reduce(chunk, axis=0), out=minimum)
+        np.fmax(maximum, np.fmax.reduce(chunk, axis=0), out=maximum)
+        shifted = chunk - shift
+        missing = np.isnan(shifted)
+        if missing.any():
+            shifted[missing] = 0
+            counts += len(chunk) - missing.sum(axis=0)
+        else:
+            counts += len(chunk)
+        total += shifted.sum(axis=0)
+        total_squared += np.einsum("ij,ij->j", shifted, shifted)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / counts
+        variance = np.maximum(total_squared / counts - mean**2, 0)
+    return {"min": minimum,
+            "max": maximum,
+            "mean": (mean + shift).astype(data.dtype),
+            "stddev": np.sqrt(variance).astype(data.dtype),
+            "range": maximum - minimum}
+
+
+def compute_percentile(data, q):
+    """Computes the q-th percentile of each column of a 2D array, skipping
+    NaN values. Columns are processed in chunks so that only one chunk is
+    copied at a time."""
+    timesteps, elements = data.shape
+    percentile = np.empty(elements, dtype=data.dtype)
+    chunk_columns = max(1, CHUNK_SIZE // max(timesteps, 1))
+    for start in range(0, elements, chunk_columns):
+        end = start + chunk_columns
+        chunk = np.asarray(data[:, start:end])
+        # nanpercentile is much slower, so it is only used when needed
+        if np.isnan(chunk).any():
+            with warnings.catch_warnings():
+                # Columns of only NaN values give NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                percentile[start:end] = np.nanpercentile(chunk, q, axis=0)
+        else:
+            percentile[start:end] = np.percentile(chunk, q, axis=0)
+    return percentile
+
+
+def compute_threshold_count(data, threshold, statistic):
+    """Counts the rows of each column of a 2D array that are strictly above
+    (statistic='above') or below (statistic='below') threshold."""
+    timesteps, elements = data.shape
+    counts = np.zeros(elements, dtype=np.int64)
+    chunk_rows = max(1, CHUNK_SIZE // max(elements, 1))
+    compare = np.greater if statistic == "above" else np.less
+    for start in range(0, timesteps, chunk_rows):
+        counts += compare(np.asarray(data[start:start + chunk_rows]),
+                          threshold).sum(axis=0)
+    return counts
+
+
+def get_summary_statistic(model, parameter_type, parameter, value,
+                          frame=None):
+    """Returns a summary of a time-dependent parameter for every element of
+    the network, in the same order as the result columns.
+
+    Arguments
+    ---------
+    model : dict
+        The model dictionary of a VisWNModel object.
+
+    parameter_type : string
+        Takes either 'node' or 'link'.
+
+    parameter : string
+        Time-dependent parameter, such as pressure or flowrate.
+
+    value : string, tuple
+        The summary to be computed. See the module documentation for the
+        available summaries.
+
+    frame : DataFrame
+        The results of the parameter, with a row per timestep. By default
+        they are taken from the simulation results of the model.
+    """
+    parsed = parse_summary_value(value)
+    if parsed is None:
+        raise Exception('Invalid value!')
+    statistic, argument, window = parsed
+    # A 1-tuple such as ('max',) is the same summary as its statistic, and
+    # is cached under the statistic
+    if isinstance(value, tuple) and len(value) == 1:
+        value = value[0]
+    if frame is None:
+        frame = getattr(model["results"], parameter_type)[parameter]
+    cache = model.setdefault("summary_cache", OrderedDict())
+    key = (parameter_type, parameter, value)
+    entry = cache.get(key)
+    # Entries computed from a result frame that has since been replaced
+    # are stale
+    if entry is not None and entry[0] is frame:
+        cache.move_to_end(key)
+        return entry[1]
+    data = frame.to_numpy()
+    if window is not None:
+        # Basic slicing returns a view, so the window is not copied
+        data = data[window[0]:window[1]]
+        if len(data) == 0:
+            raise Exception('Timestep window ' + str(window)
+                            + ' contains no timesteps!')
+    if statistic == "percentile":
+        statistics = {value: compute_percentile(data, argument)}
+    elif statistic in THRESHOLD_STATISTICS:
+        statistics = {value: compute_threshold_count(data, argument,
+                                                     statistic)}
+    else:
+        # All basic statistics are computed at once and cached under the
+        # value each of them would be requested with
+        statistics = {}
+        for name, values in compute_summary_statistics(data).items():
+            if window is None:
+                statistics[name] = values
+            else:
+                statistics[(name,) + window] = values
+    for name, values in statistics.items():
+        cache[(parameter_type, parameter, name)] = (frame, values)
+        cache.move_to_end((parameter_type, parameter, name))
+    cache.move_to_end(key)
+    while len(cache) > SUMMARY_CACHE_SIZE:
+        cache.popitem(last=False)
+    return cache[key][1]
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+"""
+The viswaternet.network.synthetic module contains the code that generates
+synthetic networks and simulation results of any size, so that plotting,
+binning and animation can be tested on networks much larger than the
+bundled examples without running EPANET.
+
+Example
+-------
+>>>import viswaternet as vis
+>>>wn = vis.network.synthetic_network(100000)
+>>>results = vis.network.synthetic_results(wn, node_attributes=['pressure'],
+...                                         link_attributes=['flowrate'])
+>>>model = vis.VisWNModel(network_model=wn, results=results)
+"""
+import numpy as np
+import pandas as pd
+import wntr
+
+# Attributes of the simulation results produced by the EpanetSimulator
+NODE_ATTRIBUTES = ("demand", "head", "pressure", "quality")
+LINK_ATTRIBUTES = ("quality", "flowrate", "velocity", "headloss", "status",
+                   "setting", "friction_factor", "reaction_rate")
+
+# Distance between neighbouring junctions in meters
+SPACING = 100
+
+
+def synthetic_network(
+        num_junctions,
+        layout="grid",
+        num_reservoirs=1,
+        num_tanks=1,
+        num_pumps=1,
+        num_valves=1,
+        num_patterns=4,
+        seed=None):
+    """Generates a WNTR WaterNetworkModel with coordinates, demands and
+    demand patterns.
+
+    Arguments
+    ---------
+    num_junctions : integer
+        The number of junctions in the network.
+
+    layout : string
+        'grid' places the junctions on a square grid with pipes between
+        horizontal and vertical neighbours, for about two pipes per
+        junction. 'tree' connects each junction to a random earlier one,
+        for one pipe per junction, like a branched rural network.
+
+    num_reservoirs : integer
+        The number of reservoirs. The first num_pumps reservoirs are
+        connected to a random junction by a pump, the others by a pipe.
+
+    num_tanks : integer
+        The number of tanks. Each tank is connected to a random junction by
+        a pipe.
+
+    num_pumps : integer
+        The number of pumps. Pumps that are not next to a reservoir replace
+        random pipes between junctions.
+
+    num_valves : integer
+        The number of pressure reducing valves. Valves replace random pipes
+        between junctions.
+
+    num_patterns : integer
+        The number of 24 hour demand patterns, which are assigned to the
+        junctions in turn.
+
+    seed : integer
+        Seed of the random number generator, so that the same network can
+        be generated again.
+    """
+    if layout not in ("grid", "tree"):
+        raise Exception("Invalid layout. Choose from grid, tree.")
+    if num_junctions < 1:
+        raise Exception("A network needs at least one junction!")
+    rng = np.random.default_rng(seed)
+    wn = wntr.network.WaterNetworkModel()
+    wn.options.time.duration = 24 * 3600
+    wn.options.time.hydraulic_timestep = 3600
+    wn.options.time.pattern_timestep = 3600
+    wn.options.time.report_timestep = 3600
+
+    if layout == "grid":
+        columns = int(np.ceil(np.sqrt(num_junctions)))
+        index = np.arange(num_junctions)
+        x = (index % columns) * SPACING
+        y = (index // columns) * SPACING
+        right = index[(index % columns < columns - 1)
+                      & (index + 1 < num_junctions)]
+        below = index[index + columns < num_junctions]
+        edges = np.concatenate([np.column_stack([right, right + 1]),
+                                np.column_stack([below, below + columns])])
+    else:
+        parents = (rng.random(num_junctions - 1)
+                   * np.arange(1, num_junctions)).astype(np.int64)
+        angles = rng.random(num_junctions - 1) * 2 * np.pi
+        x = np.zeros(num_junctions)
+        y = np.zeros(num_junctions)
+        # Parents come before their children, so each junction is placed
+        # next to an already placed one
+        for child, parent in enumerate(parents, start=1):
+            x[child] = x[parent] + SPACING * np.cos(angles[child - 1])
+            y[child] = y[parent] + SPACING * np.sin(angles[child - 1])
+        edges = np.column_stack([parents, np.arange(1, num_junctions)])
+
+    hours = np.arange(24)
+    for i in range(num_patterns):
+        shift = rng.uniform(0, 24)
+        multipliers = np.clip(
+            1 + 0.5 * np.sin(2 * np.pi * (hours - shift) / 24)
+            + rng.normal(0, 0.1, 24), 0, None)
+        wn.add_pattern("PAT" + str(i), multipliers.tolist())
+
+    elevations = 50 + 10 * np.sin(x / (20 * SPACING)) \
+        + 10 * np.cos(y / (20 * SPACING))
+    base_demands = rng.uniform(0, 0.002, num_junctions)
+    for i in range(num_junctions):
+        wn.add_junction(
+            "J" + str(i),
+            base_demand=base_demands[i],
+            demand_pattern=("PAT" + str(i % num_patterns)
+                            if num_patterns > 0 else None),
+            elevation=elevations[i],
+            coordinates=(x[i], y[i]))
+
+    # Pumps and valves between junctions replace pipes of the layout
+    link_types = np.full(len(edges), "Pipe", dtype=object)
+    replaced = rng.permutation(len(edges))
+    num_junction_pumps = max(num_pumps - num_reservoirs, 0)
+    link_types[replaced[:num_junction_pumps]] = "Pump"
+    link_types[replaced[num_junction_pumps:
+                        num_junction_pumps + num_valves]] = "Valve"
+    if num_pumps > 0:
+        wn.add_curve("PUMP_CURVE", "HEAD", [(0.1, 60.0)])
+    diameters = rng.choice([0.1, 0.15, 0.2, 0.3], len(edges))
+    counts = {"Pipe": 0, "Pump": 0, "Valve": 0}
+    for (start, end), link_type, diameter in zip(edges, link_types,
+                                                 diameters):
+        add_link(wn, link_type, counts, "J" + str(start), "J" + str(end),
+                 diameter)
+
+    attached = rng.integers(0, num_junctions, num_reservoirs + num_tanks)
+    for i in range(num_reservoirs):
+        junction = attached[i]
+        wn.add_reservoir("R" + str(i),
+                         base_head=elevations[junction] + 40,
+                         coordinates=(x[junction] - SPACING / 2,
+                                      y[junction] - SPACING / 2))
+        add_link(wn, "Pump" if i < num_pumps else "Pipe", counts,
+                 "R" + str(i), "J" + str(junction), 0.3)
+    for i in range(num_tanks):
+        junction = attached[num_reservoirs + i]
+        wn.add_tank("T" + str(i),
+                    elevation=elevations[junction] + 20,
+                    init_level=5,
+                    min_level=0,
+                    max_level=10,
+                    diameter=20,
+                    coordinates=(x[junction] + SPACING / 2,
+                                 y[junction] + SPACING / 2))
+        add_link(wn, "Pipe", counts, "T" + str(i), "J" + str(junction), 0.3)
+    return wn
+
+
+def add_link(wn, link_type, counts, start, end, diameter):
+    """Adds a pipe, pump or pressure reducing valve to wn, named after its
+    type and the number of links of that type added so far."""
+    number = str(counts[link_type])
+    counts[link_type] += 1
+    if link_type == "Pump":
+        wn.add_pump("PU" + number, start, end, pump_type="HEAD",
+                    pump_parameter="PUMP_CURVE")
+    elif link_type == "Valve":
+        wn.add_valve("V" + number, start, end, diameter=diameter,
+                     valve_type="PRV", initial_setting=30)
+    else:
+        wn.add_pipe("P" + number, start, end, length=SPACING,
+                    diameter=diameter, roughness=100)
+
+
+def synthetic_results(
+        wn,
+        timesteps=None,
+        node_attributes=None,
+        link_attributes=None,
+        dtype=np.float32,
+        seed=None):
+    """Generates time-varying results for every element of wn, in the same
+    form as the results of the EpanetSimulator. The values vary smoothly in
+    space and time and are in a plausible range, but they are not the
+    solution of the hydraulic equations.
+
+    Arguments
+    ---------
+    wn : WNTR WaterNetworkModel Object
+        The network that results are generated for.
+
+    timesteps : integer
+        The number of report timesteps. By default this is given by the
+        duration and report timestep of wn.
+
+    node_attributes : list
+        The node attributes that are generated. By default all the node
+        attributes of the EpanetSimulator are generated. Results of large
+        networks take a lot of memory, so only the attributes that are used
+        should be generated.
+
+    link_attributes : list
+        The link attributes that are generated. By default all the link
+        attributes of the EpanetSimulator are generated.
+
+    dtype : numpy dtype
+        The dtype of the results.
+
+    seed : integer
+        Seed of the random number generator.
+    """
+    rng = np.random.default_rng(seed)
+    if node_attributes is None:
+        node_attributes = NODE_ATTRIBUTES
+    if link_attributes is None:
+        link_attributes = LINK_ATTRIBUTES
+    report_timestep = wn.options.time.report_timestep
+    if timesteps is None:
+        timesteps = int(wn.options.time.duration / report_timestep) + 1
+    times = np.arange(timesteps) * report_timestep
+    # Daily cycle of each timestep, shape (timesteps, 1)
+    cycle = np.sin(2 * np.pi * times / 86400)[:, None]
+
+    node_names = wn.node_name_list
+    coordinates = np.array([wn.get_node(name).coordinates
+                            for name in node_names], dtype=np.float64)
+    elevations = np.array([getattr(wn.get_node(name), "elevation", 0.0)
+                           for name in node_names], dtype=np.float64)
+    # Pressure falls off with distance from the lower left corner of the
+    # network, scaled to between 0 and 1
+    if len(node_names) > 0:
+        coordinates = coordinates - coordinates.min(axis=0)
+    distance = coordinates.sum(axis=1) / max(2 * coordinates.max(
+        initial=0), 1.0)
+    phase = rng.uniform(0, 2 * np.pi, len(node_names))
+    node_generators = {
+        "pressure": lambda: 60 - 30 * distance + 5 * np.sin(
+            2 * np.pi * times[:, None] / 86400 + phase),
+        "head": lambda: elevations + node_generators["pressure"](),
+        "demand": lambda: rng.uniform(0, 0.002, len(node_names))
+        * (1 + 0.5 * cycle),
+        "quality": lambda: np.clip(
+            1 - distance + 0.1 * cycle, 0, None),
+    }
+
+    link_names = wn.link_name_list
+    diameters = np.array([getattr(wn.get_link(name), "diameter", 0.3)
+                          for name in link_names], dtype=np.float64)
+    flow = rng.uniform(-0.02, 0.02, len(link_names))
+    link_generators = {
+        "flowrate": lambda: flow * (1 + 0.3 * cycle),
+        "velocity": lambda: np.abs(link_generators["flowrate"]())
+        / (np.pi * diameters**2 / 4),
+        "headloss": lambda: 0.01 * link_generators["velocity"]()**2,
+        "status": lambda: np.ones((timesteps, len(link_names))),
+        "setting": lambda: np.zeros((timesteps, len(link_names))),
+        "friction_factor": lambda: np.broadcast_to(
+            rng.uniform(0.015, 0.03, len(link_names)),
+            (timesteps, len(link_names))),
+        "reaction_rate": lambda: np.zeros((timesteps, len(link_names))),
+        "quality": lambda: np.broadcast_to(
+            rng.uniform(0, 1, len(link_names)),
+            (timesteps, len(link_names))) * (1 + 0.1 * cycle),
+    }
+
+    results = wntr.sim.SimulationResults()
+    results.network_name = wn.name
+    results.node = {}
+    results.link = {}
+    for element_type, attributes, generators, names in (
+            ("node", node_attributes, node_generators, node_names),
+            ("link", link_attributes, link_generators, link_names)):
+        for attribute in attributes:
+            if attribute not in generators:
+                raise Exception("Invalid " + element_type + " attribute "
+                                + str(attribute) + "!")
+            values = np.ascontiguousarray(
+                np.broadcast_to(generators[attribute](),
+                                (timesteps, len(names))), dtype=dtype)
+            getattr(results, element_type)[attribute] = pd.DataFrame(
+                values, index=times, columns=names)
+    return results
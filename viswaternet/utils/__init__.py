@@ -1,7 +1,8 @@
-
 from .convert_excel import convert_excel
 from .normalize_parameter import normalize_parameter
-from .save_fig import save_fig
+from .save_fig import save_fig, wait_for_saves
 from .unit_conversion import unit_conversion
 from .fancyarrowpatch_to_linecollection import fancyarrowpatch_to_linecollection
-from .label_generator import label_generator
\ No newline at end of file
+from .label_generator import label_generator
+from .get_name_index import get_name_index
+from .profiling import Profiler, profiled
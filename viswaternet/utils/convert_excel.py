@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+from viswaternet.utils.get_name_index import get_name_index
 
 
 def convert_excel(self,
@@ -22,20 +23,20 @@ def convert_excel(self,
             interval_results[interval] = {}
 
         if parameter_type == 'node':
+            node_index = get_name_index(model, "node")
             for element, data in zip(
                 df.iloc[:, element_index].dropna(
                 ), df.iloc[:, value_index].dropna()
             ):
 
-                interval_results[data][element] = model["node_names"].index(
-                    element)
+                interval_results[data][element] = node_index[element]
 
         if parameter_type == 'link':
+            link_index = get_name_index(model, "link")
             for element, data in zip(
                     df.iloc[:, element_index].dropna(),
                     df.iloc[:, value_index].dropna()):
-                interval_results[data][element] = \
-                    model["G_pipe_name_list"].index(element)
+                interval_results[data][element] = link_index[element]
 
         return interval_results, interval_names
     if data_type == "continuous" or "discrete":
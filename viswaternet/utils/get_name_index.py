@@ -0,0 +1,11 @@
+def get_name_index(model, parameter_type):
+    """Returns the dictionary mapping element names to their index in
+    model["node_names"] or model["G_pipe_name_list"]."""
+    key = parameter_type + "_index"
+    if key in model:
+        return model[key]
+    if parameter_type == "node":
+        names = model["node_names"]
+    else:
+        names = model["G_pipe_name_list"]
+    return {name: i for i, name in enumerate(names)}
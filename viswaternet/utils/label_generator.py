@@ -23,6 +23,15 @@ def label_generator(parameter, value, unit=None):
         'roughness': 'Roughness',
         'diameter': 'Diameter',
     }
+    # Ensemble parameters (see viswaternet.network.ensemble) are titled like
+    # the parameter they summarize, with scenarios in place of timesteps
+    if parameter.startswith('ensemble_'):
+        title_label = label_generator(parameter[len('ensemble_'):], value,
+                                      unit).replace(' timestep ',
+                                                    ' scenario ')
+        if title_label.startswith('Timesteps with '):
+            return 'Probability of ' + title_label[len('Timesteps with '):]
+        return 'Ensemble ' + title_label
     if parameter == 'base_demand' \
             or parameter == 'demand' \
             or parameter == 'flowrate':
@@ -74,6 +83,19 @@ def label_generator(parameter, value, unit=None):
     
     else:
         unit_titles = {None: ''}
+    # Summaries over a window of timesteps, e.g. ('max', 24, 48), are
+    # titled like the summary over all timesteps plus the window
+    window_label = ''
+    if isinstance(value, tuple):
+        if value[0] in ('above', 'below'):
+            window = value[2:]
+            value = value[:2]
+        else:
+            window = value[1:]
+            value = value[0]
+        if len(window) == 2:
+            window_label = ' from timestep ' + str(window[0]) \
+                + ' to ' + str(window[1])
     if isinstance(value, int):
         title_label = parameter_titles[parameter] \
                       + " " + unit_titles[unit] \
@@ -98,8 +120,25 @@ def label_generator(parameter, value, unit=None):
         title_label = 'Range of ' \
                       + parameter_titles[parameter] \
                       + " " + unit_titles[unit]
+    elif isinstance(value, str) and value[:1] == 'p':
+        percentile = float(value[1:])
+        if percentile.is_integer():
+            percentile = int(percentile)
+        if str(percentile)[-2:] in ('11', '12', '13'):
+            suffix = 'th'
+        else:
+            suffix = {'1': 'st', '2': 'nd', '3': 'rd'}.get(
+                str(percentile)[-1], 'th')
+        title_label = str(percentile) + suffix + ' Percentile of ' \
+                      + parameter_titles[parameter] \
+                      + " " + unit_titles[unit]
+    elif isinstance(value, tuple):
+        # Thresholds are given in the units of the simulation results
+        title_label = 'Timesteps with ' \
+                      + label_generator(parameter, None) \
+                      + ' ' + value[0] + ' ' + str(value[1])
     elif value is None:
         title_label = parameter_titles[parameter] + " " + unit_titles[unit]
     else:
         title_label = parameter_titles[parameter] + " " + unit_titles[unit]
-    return title_label
+    return title_label + window_label
@@ -0,0 +1,176 @@
+"""
+The viswaternet.utils.profiling module contains the code that records how
+long each stage of a plot takes.
+
+Profiling is turned on with VisWNModel.profile. Every profiled function that
+is called inside the with block is recorded as a stage, nested inside the
+stage of the function that called it, with its wall time and, where it
+applies, the number of nodes or links it handled.
+
+Example
+-------
+>>>import viswaternet as vis
+>>>model = vis.VisWNModel(r'Networks/CTown.inp')
+>>>with model.profile() as profiler:
+...    model.plot_continuous_nodes(parameter='pressure', value='max')
+>>>print(profiler.format())
+plot_continuous_nodes                      0.055 s
+  get_parameter                            0.001 s     388 elements
+  draw_nodes                               0.005 s     388 elements
+    render_nodes                           0.003 s     388 elements
+  draw_base_elements                       0.016 s
+...
+>>>profiler.to_json('profile.json')
+
+When profiling is off, a profiled function only checks whether a profiler is
+set on the model before calling the function it wraps.
+"""
+import functools
+import inspect
+import json
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    """Records nested stages with their wall time and element counts.
+
+    Each stage is a dictionary with the keys 'name', 'start' (seconds since
+    the profiler was created), 'duration' (seconds), 'elements' (None if the
+    stage does not handle a set of elements) and 'stages', the list of the
+    stages nested inside it.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = []
+        self._open = []
+
+    @contextmanager
+    def stage(self, name, elements=None):
+        """Records the code run inside the with block as a stage named
+        name, nested inside the stage that is currently open."""
+        record = {"name": name,
+                  "start": time.perf_counter() - self.origin,
+                  "duration": None,
+                  "elements": elements,
+                  "stages": []}
+        if self._open:
+            self._open[-1]["stages"].append(record)
+        else:
+            self.stages.append(record)
+        self._open.append(record)
+        try:
+            yield record
+        finally:
+            record["duration"] = (time.perf_counter() - self.origin
+                                  - record["start"])
+            self._open.pop()
+
+    def report(self):
+        """Returns the recorded stages as a list of nested dictionaries."""
+        return self.stages
+
+    def totals(self):
+        """Returns the number of calls and the total duration and element
+        count of each stage name, summed over all recorded stages."""
+        totals = {}
+
+        def add(stages):
+            for record in stages:
+                total = totals.setdefault(
+                    record["name"],
+                    {"calls": 0, "duration": 0.0, "elements": 0})
+                total["calls"] += 1
+                total["duration"] += record["duration"] or 0.0
+                total["elements"] += record["elements"] or 0
+                add(record["stages"])
+        add(self.stages)
+        return totals
+
+    def to_json(self, path=None):
+        """Returns the report as a JSON string, and writes it to path if
+        given."""
+        text = json.dumps({"stages": self.stages, "totals": self.totals()},
+                          indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def format(self):
+        """Returns the report as an indented text tree."""
+        lines = []
+
+        def add(stages, depth):
+            for record in stages:
+                line = "{:<40}{:>8.3f} s".format(
+                    "  " * depth + record["name"], record["duration"] or 0.0)
+                if record["elements"] is not None:
+                    line += "{:>8} elements".format(record["elements"])
+                lines.append(line)
+                add(record["stages"], depth + 1)
+        add(self.stages, 0)
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile(self, profiler=None):
+    """Profiles the calls made to a VisWNModel object inside the with block
+    and yields the Profiler they are recorded with. Stages are added to
+    profiler if one is given, so several blocks can be recorded together.
+    """
+    if profiler is None:
+        profiler = Profiler()
+    previous = self.model.get("profiler")
+    self.model["profiler"] = profiler
+    try:
+        yield profiler
+    finally:
+        if previous is None:
+            self.model.pop("profiler", None)
+        else:
+            self.model["profiler"] = previous
+
+
+def get_profiler(self):
+    """Returns the profiler of a VisWNModel object, or None if it is not
+    being profiled."""
+    model = getattr(self, "model", None)
+    if isinstance(model, dict):
+        return model.get("profiler")
+    return None
+
+
+def profiled(function=None, elements=None):
+    """Decorator that records calls of a function taking a VisWNModel
+    object as its first argument as stages of the model's profiler.
+
+    elements is the name of the argument holding the list of elements the
+    function handles. 'return' counts the elements of the list returned as
+    the second item of the function's results instead, as get_parameter
+    does.
+    """
+    if function is None:
+        return functools.partial(profiled, elements=elements)
+    name = function.__name__
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        profiler = get_profiler(self)
+        if profiler is None:
+            return function(self, *args, **kwargs)
+        with profiler.stage(name) as record:
+            results = function(self, *args, **kwargs)
+            if elements == "return":
+                element_list = results[1]
+            elif elements is not None:
+                element_list = signature.bind(
+                    self, *args, **kwargs).arguments.get(elements)
+            else:
+                element_list = None
+            if element_list is not None:
+                record["elements"] = len(element_list)
+        return results
+    return wrapper
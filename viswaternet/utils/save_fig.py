@@ -1,8 +1,41 @@
-import matplotlib.pyplot as plt
+import numpy as np
+import io
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from matplotlib.transforms import Bbox, TransformedBbox, Affine2D
+from .profiling import profiled
 
+# Formats that are encoded in the background when the save_async style
+# argument is set. Other formats are saved before save_fig returns.
+ASYNC_FORMATS = ("png", "jpg", "jpeg")
 
-def save_fig(self, save_name=None, style=None):
+# Number of threads that encode figures, and the number of snapshots that may
+# wait for them before save_fig blocks. Each snapshot holds the uncompressed
+# image, so this bounds the memory held by pending saves.
+SAVE_WORKERS = min(4, os.cpu_count() or 1)
+MAX_PENDING_SAVES = 2 * SAVE_WORKERS
+
+_executor = None
+_slots = threading.BoundedSemaphore(MAX_PENDING_SAVES)
+_pending = set()
+_failed = []
+_lock = threading.Lock()
+
+
+@profiled
+def save_fig(self, save_name=None, style=None, fig=None):
+    """Saves fig, or the current figure if fig is None, to the working
+    directory, named after the network with save_name as a prefix.
+
+    If the save_async style argument is set, the rendered image is copied
+    and encoded and written by a background thread, so the next figure can
+    be drawn while this one is compressed. A Future is returned whose result
+    is the path of the image once it has been written. Use wait_for_saves
+    to wait for all background saves.
+    """
+    # pyplot is imported on first use to keep the package import fast
+    import matplotlib.pyplot as plt
     model = self.model
     if style is None:
         style = self.default_style
@@ -28,5 +61,135 @@ def save_fig(self, save_name=None, style=None):
     else:
         file_name = networkName
     image_path_full = os.path.join(os.getcwd(), file_name)
-    plt.savefig(image_path_full, dpi=dpi,
-                format=save_format, bbox_inches="tight")
+    if (not args.get('save_async', False)
+            or str(save_format).lower() not in ASYNC_FORMATS):
+        if fig is None:
+            plt.savefig(image_path_full, dpi=dpi,
+                        format=save_format, bbox_inches="tight")
+        else:
+            fig.savefig(image_path_full, dpi=dpi,
+                        format=save_format, bbox_inches="tight")
+        future = Future()
+        future.set_result(image_path_full)
+        return future
+    if fig is None:
+        fig = plt.gcf()
+    if dpi == 'figure':
+        dpi = fig.dpi
+    image = snapshot_figure(fig, dpi)
+    # Blocks while too many snapshots are waiting to be encoded
+    _slots.acquire()
+    try:
+        future = get_executor().submit(write_image, image_path_full, image,
+                                       save_format, dpi)
+    except BaseException:
+        _slots.release()
+        raise
+    with _lock:
+        _pending.add(future)
+    future.add_done_callback(finish_save)
+    return future
+
+
+def snapshot_figure(fig, dpi):
+    """Renders fig at dpi, cropped as savefig does with bbox_inches='tight',
+    and returns a copy of the RGBA image."""
+    # The tight bounding box depends on the size of text at the saved dpi
+    figure_dpi = fig.dpi
+    fig.dpi = dpi
+    try:
+        bbox_inches = tight_bbox_inches(fig)
+    finally:
+        fig.dpi = figure_dpi
+    with io.BytesIO() as buff:
+        fig.savefig(buff, format='raw', dpi=dpi, bbox_inches=bbox_inches)
+        data = np.frombuffer(buff.getvalue(), dtype=np.uint8)
+    width = int(bbox_inches.width * dpi)
+    return data.reshape((-1, width, 4))
+
+
+def write_image(path, image, save_format, dpi):
+    """Encodes an RGBA image and writes it to path, the same way savefig
+    does. Returns path."""
+    import matplotlib.image as mpimg
+    mpimg.imsave(path, image, format=save_format, dpi=dpi)
+    return path
+
+
+def tight_bbox_inches(fig):
+    # Taken from matplotlib source code. This is how the bbox for
+    # saving figures with bbox_inches='tight' is done. Maybe there was a
+    # better way to do this? I don't know but tight_layout() wasn't doing
+    # the trick.
+    bbox_inches = fig.get_tightbbox(fig.canvas.get_renderer())
+    bbox_artists = fig.get_default_bbox_extra_artists()
+    bbox_filtered = []
+    for a in bbox_artists:
+        bbox = a.get_window_extent(fig.canvas.get_renderer())
+        if a.get_clip_on():
+            clip_box = a.get_clip_box()
+            if clip_box is not None:
+                bbox = Bbox.intersection(bbox, clip_box)
+            clip_path = a.get_clip_path()
+            if clip_path is not None and bbox is not None:
+                clip_path = clip_path.get_fully_transformed_path()
+                bbox = Bbox.intersection(bbox,
+                                         clip_path.get_extents())
+        if bbox is not None and (bbox.width != 0 or
+                                 bbox.height != 0):
+            if not np.isinf(bbox.width):
+                bbox_filtered.append(bbox)
+
+    if bbox_filtered:
+        _bbox = Bbox.union(bbox_filtered)
+        trans = Affine2D().scale(1.0 / fig.dpi)
+        bbox_extra = TransformedBbox(_bbox, trans)
+        bbox_inches = Bbox.union([bbox_inches, bbox_extra])
+
+    pad = 0.1
+    return bbox_inches.padded(pad)
+
+
+def get_executor():
+    """Returns the thread pool that figures are saved with, creating it on
+    first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=SAVE_WORKERS,
+                thread_name_prefix="viswaternet-save")
+        return _executor
+
+
+def finish_save(future):
+    """Releases the slot of a finished save, and keeps it until
+    wait_for_saves is called if it failed."""
+    with _lock:
+        _pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            _failed.append(future)
+    _slots.release()
+
+
+def wait_for_saves(self, timeout=None):
+    """Waits until all figures saved in the background have been written.
+    Raises the exception of the first save that failed since the last call.
+
+    Arguments
+    ---------
+    timeout : float
+        The maximum number of seconds to wait. An exception is raised if
+        figures are still being saved after that.
+    """
+    with _lock:
+        futures = list(_pending)
+    not_done = wait(futures, timeout=timeout).not_done
+    with _lock:
+        failed = _failed[:]
+        del _failed[:]
+    if failed:
+        failed[0].result()
+    if not_done:
+        raise Exception(str(len(not_done))
+                        + " figures are still being saved!")
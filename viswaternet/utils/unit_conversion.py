@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+
+
 def unit_conversion(parameter_results, parameter, new_unit):
     cf = {
         "base_demand": {
@@ -45,7 +49,13 @@ def unit_conversion(parameter_results, parameter, new_unit):
         "quality": {"min": 1/60, "hr": 1/3600, "day": 1/86400},
         "time": {"s": 1, "min": 1/60, "hr": 1/3600, "day": 1/86400}
     }
-    if isinstance(parameter_results, int):
+    # Ensemble parameters have the units of the parameter they summarize
+    if parameter.startswith("ensemble_"):
+        parameter = parameter[len("ensemble_"):]
+    # Scalars, such as the times of interpolated frames, and Series, whose
+    # labels are kept, are multiplied directly
+    if np.isscalar(parameter_results) \
+            or isinstance(parameter_results, pd.Series):
         parameter_results = parameter_results * cf[parameter][new_unit]
     else:
         parameter_results = \